@@ -1,10 +1,20 @@
 import streamlit as st
 import pandas as pd
 import pydeck as pdk
-import re
 import os
-from math import isnan
-import json
+
+from treasure_cache import DatasetSnapshot, collect_source_paths
+from treasure_clusters import ClusterIndex
+from treasure_coord_sidecar import apply_sidecar
+from treasure_coords import parse_coordinates
+from treasure_deck import SplicedDeck, serialize_layer
+from treasure_density import DensityIndex
+from treasure_ingest import assemble_sources, iter_dataset_sources
+from treasure_parse_stats import PARSE_STATS
+from treasure_reload import HotReloader
+from treasure_schema import compact_frame
+from treasure_style import MapStyle
+from treasure_viewport import PointGrid, in_bounds, viewport_bounds
 
 
 # Configuration for point sizes based on likelihood
@@ -14,6 +24,73 @@ LIKELIHOOD_RADIUS_CONFIG = {
     "low": 4000       # For likelihood < 60%
 }
 
+# Configuration for the compiled dataset snapshot used on cold starts
+SNAPSHOT_CONFIG = {
+    "enabled": True,               # Serve load_data from the snapshot when sources are unchanged
+    "cache_dir": ".treasure_cache" # Relative to the app directory
+}
+
+# Configuration for reading raw/ country files
+INGEST_CONFIG = {
+    "workers": 4,          # Files read and parsed concurrently; 1 reads them in turn
+    "executor": "thread",  # "thread" or "process"
+    "workbook_cache_dir": ".treasure_cache/workbooks", # Parsed Excel sheets keyed by workbook hash; None to disable
+    "coordinate_sidecar": ".treasure_cache/coordinates.json" # Written by treasure_coord_sidecar.py; None to always parse
+}
+
+# Configuration for the in-memory layout of the combined frame
+MEMORY_CONFIG = {
+    "compact": True  # Categorical Area/value, float32 coordinates, Arrow URL lists (see treasure_schema)
+}
+
+# Configuration for the point data sent to the browser with the map
+MAP_TRANSPORT_CONFIG = {
+    "trimmed": True  # Only position, color, radius, row id and name; False sends every column for the tooltip
+}
+
+# Configuration for clustering points when the map is zoomed out. The level
+# follows the app's zoom_level, and the chart does not report the browser's
+# own zooming back to the script, so zooming in on a cluster would never
+# split it; off until the map reports its view
+CLUSTER_CONFIG = {
+    "enabled": False,
+    "max_zoom": 6,      # Zoom levels up to this draw clusters; closer in draws every point
+    "cell_pixels": 64   # Points within one cell of this many pixels form a cluster (power of two)
+}
+
+# Configuration for the hexagon and heatmap density views
+DENSITY_CONFIG = {
+    "max_zoom": 8,      # Deepest zoom level binned on its own; closer in reuses it
+    "cell_pixels": 32   # Width of a hexagon bin on screen
+}
+
+# Ways to draw the treasures; the density views send bins, never points
+MAP_VIEWS = ("Points", "Hexagons", "Heatmap")
+
+# Configuration for sending only the part of the map in view. The view is
+# the app's map_center and zoom_level, which the chart does not update when
+# the user pans or zooms it, so culling stays off by default; even when on,
+# views further out than min_zoom send every point
+VIEWPORT_CONFIG = {
+    "enabled": False,
+    "min_zoom": 4,
+    "width": 1200,   # Assumed map size in pixels; the chart is 600 high and fills the wide column
+    "height": 600,
+    "margin": 0.5    # Also send this fraction of the view on every side, so small pans stay covered
+}
+
+# Configuration for developer diagnostics
+DEBUG_CONFIG = {
+    "parse_stats": False  # Count coordinate formats, dropped rows and parse time per source file
+}
+
+# Configuration for hot reloading edited source files into the running app
+RELOAD_CONFIG = {
+    "enabled": True,
+    "poll_interval": 2.0,          # Seconds between checks of the source files
+    "workbooks": ["treasure.xlsx"] # Add "treasure-dev.xlsx" to watch the dev workbook too
+}
+
 # Set page title and configuration
 st.set_page_config(
     page_title="Treasure Map Explorer",
@@ -21,120 +98,6 @@ st.set_page_config(
     layout="wide"
 )
 
-def parse_coordinates(coord_str):
-    """Parse coordinates from various string formats to latitude and longitude."""
-    if pd.isna(coord_str) or coord_str == "":
-        return None, None
-    
-    # Convert to string if not already
-    coord_str = str(coord_str)
-    
-    try:
-        # Try to extract coordinates in format like "12.345, -67.890"
-        pattern = r"(-?\d+\.?\d*)[,\s]+(-?\d+\.?\d*)"
-        match = re.search(pattern, coord_str)
-        
-        if match:
-            lat = float(match.group(1))
-            lon = float(match.group(2))
-            # Basic validation for lat/lon ranges
-            if -90 <= lat <= 90 and -180 <= lon <= 180:
-                return lat, lon
-            else:
-                # If values are swapped, try to correct them
-                if -90 <= lon <= 90 and -180 <= lat <= 180:
-                    return lon, lat
-        
-        # Try to extract coordinates in DMS format like "53°21'N, 4°14'W"
-        dms_pattern = r"(\d+)°(\d+)'([NS])[,\s]+(\d+)°(\d+)'([EW])"
-        dms_match = re.search(dms_pattern, coord_str)
-        
-        if dms_match:
-            lat_deg = int(dms_match.group(1))
-            lat_min = int(dms_match.group(2))
-            lat_dir = dms_match.group(3)
-            
-            lon_deg = int(dms_match.group(4))
-            lon_min = int(dms_match.group(5))
-            lon_dir = dms_match.group(6)
-            
-            # Convert to decimal degrees
-            lat = lat_deg + (lat_min / 60)
-            if lat_dir == 'S':
-                lat = -lat
-                
-            lon = lon_deg + (lon_min / 60)
-            if lon_dir == 'W':
-                lon = -lon
-                
-            return lat, lon
-        
-        # Try to extract coordinates in decimal degrees with direction like "55.2415° N, 6.5167° W"
-        decimal_dir_pattern = r"(\d+\.?\d*)°\s*([NS])[,\s]+(\d+\.?\d*)°\s*([EW])"
-        decimal_dir_match = re.search(decimal_dir_pattern, coord_str)
-        
-        if decimal_dir_match:
-            lat = float(decimal_dir_match.group(1))
-            lat_dir = decimal_dir_match.group(2)
-            lon = float(decimal_dir_match.group(3))
-            lon_dir = decimal_dir_match.group(4)
-            
-            if lat_dir == 'S':
-                lat = -lat
-            if lon_dir == 'W':
-                lon = -lon
-                
-            return lat, lon
-        
-        # Try to extract coordinates in DMS format with seconds like "54° 16' 25\" N, 5° 40' 36\" W"
-        dms_sec_pattern = r"(\d+)°\s*(\d+)'\s*(\d+)\"?\s*([NS])[,\s]+(\d+)°\s*(\d+)'\s*(\d+)\"?\s*([EW])"
-        dms_sec_match = re.search(dms_sec_pattern, coord_str)
-        
-        if dms_sec_match:
-            lat_deg = int(dms_sec_match.group(1))
-            lat_min = int(dms_sec_match.group(2))
-            lat_sec = int(dms_sec_match.group(3))
-            lat_dir = dms_sec_match.group(4)
-            
-            lon_deg = int(dms_sec_match.group(5))
-            lon_min = int(dms_sec_match.group(6))
-            lon_sec = int(dms_sec_match.group(7))
-            lon_dir = dms_sec_match.group(8)
-            
-            # Convert to decimal degrees
-            lat = lat_deg + (lat_min / 60) + (lat_sec / 3600)
-            if lat_dir == 'S':
-                lat = -lat
-                
-            lon = lon_deg + (lon_min / 60) + (lon_sec / 3600)
-            if lon_dir == 'W':
-                lon = -lon
-                
-            return lat, lon
-        
-        # Try to extract coordinates in format like "54.32° N, 5.72° W"
-        simple_decimal_pattern = r"(\d+\.\d+)°\s*([NS])[,\s]+(\d+\.\d+)°\s*([EW])"
-        simple_decimal_match = re.search(simple_decimal_pattern, coord_str)
-        
-        if simple_decimal_match:
-            lat = float(simple_decimal_match.group(1))
-            lat_dir = simple_decimal_match.group(2)
-            lon = float(simple_decimal_match.group(3))
-            lon_dir = simple_decimal_match.group(4)
-            
-            if lat_dir == 'S':
-                lat = -lat
-            if lon_dir == 'W':
-                lon = -lon
-                
-            return lat, lon
-        
-    except (ValueError, IndexError):
-        pass
-    
-    return None, None
-
-
 def format_location_with_area(location, area):
     """Format location name with area in brackets."""
     if pd.isna(area) or area == "":
@@ -153,121 +116,263 @@ def extract_location_from_display(display_text):
     return display_text
 
 
-def load_data():
-    """Load and process the treasure data from Excel and JSON files."""
+def load_data(use_snapshot=False, workers=1, executor="thread", workbook_cache_dir=None, compact=False,
+              coordinate_sidecar=None):
+    """Load and process the treasure data from Excel and JSON files.
+
+    With use_snapshot, the processed frame is read from the compiled snapshot
+    when no source file has changed since it was written, and the snapshot is
+    rebuilt otherwise. workers and executor control parallel parsing of the
+    raw/ country files, workbook_cache_dir the converted sheet cache and
+    coordinate_sidecar the compiled coordinates (see INGEST_CONFIG). With
+    compact, the frame is returned in the compact memory schema (see
+    MEMORY_CONFIG).
+    """
     # Get the directory where the current script is located
     current_dir = os.path.dirname(os.path.abspath(__file__))
-    
-    # Initialize an empty DataFrame to store combined data
-    combined_df = pd.DataFrame()
-    
-    try:
-        # Load and process Excel data
-        excel_path = os.path.join(current_dir, "treasure.xlsx")
-        excel_file = pd.ExcelFile(excel_path)
-        sheet_names = excel_file.sheet_names
-        
-        # Process each sheet from Excel
-        for sheet_name in sheet_names:
-            # Read the sheet
-            df = pd.read_excel(excel_path, sheet_name=sheet_name)
-            
-            # Add the sheet name as "Area"
-            df["Area"] = sheet_name
-            
-            # Process coordinates
-            coords = []
-            for coord_str in df["Coordinates (Approximate)"]:
-                lat, lon = parse_coordinates(coord_str)
-                coords.append((lat, lon))
-            
-            df["latitude"], df["longitude"] = zip(*coords)
-            
-            # Calculate radius based on likelihood
-            df["radius"] = df["Likelihood (%)"].apply(
-                lambda x: LIKELIHOOD_RADIUS_CONFIG["high"] if pd.notna(x) and (
-                            (isinstance(x, str) and float(x.strip('%')) >= 80) or 
-                            (isinstance(x, (int, float)) and x >= 0.8)
-                        ) else (
-                        LIKELIHOOD_RADIUS_CONFIG["medium"] if pd.notna(x) and (
-                            (isinstance(x, str) and float(x.strip('%')) >= 60) or
-                            (isinstance(x, (int, float)) and x >= 0.6)
-                        ) else LIKELIHOOD_RADIUS_CONFIG["low"])
-            )
-            
-            # Filter out rows with invalid coordinates
-            df = df.dropna(subset=["latitude", "longitude"])
-            
-            # Append to the combined DataFrame
-            combined_df = pd.concat([combined_df, df], ignore_index=True)
-        
-        # Load and process JSON data from all files in raw directory
-        raw_dir = os.path.join(current_dir, "raw")
-        if os.path.exists(raw_dir):
-            # List all JSON files in raw directory
-            json_files = [f for f in os.listdir(raw_dir) if f.endswith('.json')]
-            
-            for json_file in json_files:
-                json_path = os.path.join(raw_dir, json_file)
-                try:
-                    # Read JSON data
-                    with open(json_path, 'r', encoding='utf-8') as f:
-                        json_data = json.load(f)  # Use json.load instead of pd.read_json
-
-                    # Check the format and extract data accordingly
-                    if isinstance(json_data, dict) and 'tables' in json_data:
-                        # Format 1: Italy.json style with tables.data structure
-                        json_df = pd.DataFrame(json_data['tables'][0]['data'])
-                    else:
-                        # Format 2: Spain.json style with direct array
-                        json_df = pd.read_json(json_path)
 
-                    
-                    # Add Area column based on JSON filename (without .json extension)
-                    area_name = os.path.splitext(json_file)[0]
-                    json_df["Area"] = area_name
-                    
-                    # Process coordinates from JSON
-                    coords = []
-                    for coord_str in json_df["Coordinates (Approximate)"]:
-                        lat, lon = parse_coordinates(coord_str)
-                        coords.append((lat, lon))
-                    
-                    json_df["latitude"], json_df["longitude"] = zip(*coords)
-                    
-                    # Calculate radius based on likelihood for JSON data
-                    json_df["radius"] = json_df["Likelihood (%)"].apply(
-                        lambda x: LIKELIHOOD_RADIUS_CONFIG["high"] if pd.notna(x) and (
-                            (isinstance(x, str) and float(x.strip('%')) >= 80) or 
-                            (isinstance(x, (int, float)) and x >= 80)
-                        ) else (
-                            LIKELIHOOD_RADIUS_CONFIG["medium"] if pd.notna(x) and (
-                                (isinstance(x, str) and float(x.strip('%')) >= 60) or
-                                (isinstance(x, (int, float)) and x >= 60)
-                            ) else LIKELIHOOD_RADIUS_CONFIG["low"]
-                        )
-                    )
-                    
-                    # Filter out rows with invalid coordinates
-                    json_df = json_df.dropna(subset=["latitude", "longitude"])
-                    
-                    # Append JSON data to combined DataFrame
-                    combined_df = pd.concat([combined_df, json_df], ignore_index=True)
-                except Exception as e:
-                    st.warning(f"Error processing {json_file}: {e}")
+    if use_snapshot:
+        snapshot = DatasetSnapshot(current_dir, SNAPSHOT_CONFIG["cache_dir"])
+        source_paths = collect_source_paths(current_dir)
+        settings = {"radius": LIKELIHOOD_RADIUS_CONFIG}
+        df = snapshot.load(source_paths, settings)
+        if df is not None:
+            return compact_frame(df) if compact else df
 
-        
-        return combined_df
+    df, errors, row_ranges = build_dataset(current_dir, workers, executor, workbook_cache_dir, coordinate_sidecar)
+
+    # Per-file errors are collected during ingest and reported once here
+    for error in errors:
+        st.warning(error)
+
+    # Keep reporting broken files on later starts instead of caching around them
+    if use_snapshot and not df.empty and not errors:
+        snapshot.save(df, source_paths, settings, row_ranges)
+    return compact_frame(df) if compact else df
+
+
+def build_dataset(current_dir, workers=1, executor="thread", workbook_cache_dir=None, coordinate_sidecar=None):
+    """Parse every Excel sheet and JSON file under current_dir into one frame.
+
+    Returns the combined frame, a list of per-file error messages and the
+    (start, stop) rows each source file contributed.
+    """
+    errors = []
+
+    def collect_source_error(source_name, error):
+        errors.append(f"Error processing {source_name}: {error}")
+
+    try:
+        # Each source yields normalized record batches; the combined frame is
+        # assembled once at the end instead of growing it per sheet and file.
+        if workbook_cache_dir is not None:
+            workbook_cache_dir = os.path.join(current_dir, workbook_cache_dir)
+        if coordinate_sidecar is not None:
+            # Coordinates compiled ahead of time are looked up, not parsed
+            apply_sidecar(current_dir, coordinate_sidecar)
+        sources = iter_dataset_sources(current_dir, LIKELIHOOD_RADIUS_CONFIG, on_error=collect_source_error,
+                                       workers=workers, executor=executor,
+                                       workbook_cache_dir=workbook_cache_dir)
+        df, row_ranges = assemble_sources(sources)
+        return df, errors, row_ranges
     except Exception as e:
         st.error(f"Error loading data: {e}")
-        return pd.DataFrame()
+        return pd.DataFrame(), errors, {}
+
+
+@st.cache_resource
+def get_dataset_reloader():
+    """Shared hot reloader that every session reads the live dataset from."""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    snapshot = DatasetSnapshot(current_dir, SNAPSHOT_CONFIG["cache_dir"]) if SNAPSHOT_CONFIG["enabled"] else None
+    reloader = HotReloader(
+        current_dir,
+        LIKELIHOOD_RADIUS_CONFIG,
+        workbooks=RELOAD_CONFIG["workbooks"],
+        snapshot=snapshot,
+        settings={"radius": LIKELIHOOD_RADIUS_CONFIG},
+        compact=MEMORY_CONFIG["compact"],
+        **INGEST_CONFIG
+    )
+    reloader.start(RELOAD_CONFIG["poll_interval"])
+    return reloader
+
+
+def map_style_for(frame, id_column):
+    """Map colors and layer data of a frame, trimmed per MAP_TRANSPORT_CONFIG."""
+    transport_columns = [id_column] if MAP_TRANSPORT_CONFIG["trimmed"] else None
+    return MapStyle(frame, id_column, transport_columns=transport_columns)
+
+
+@st.cache_resource(max_entries=4)
+def get_map_style(version_number, _frame, id_column):
+    """Map colors of a published dataset version, built once and shared by every session."""
+    return map_style_for(_frame, id_column)
+
+
+def base_point_layer(map_style, rows=None):
+    """Layer with the treasure points at rows (every point for None) in their base color."""
+    return pdk.Layer(
+        "ScatterplotLayer",
+        data=map_style.data if rows is None else map_style.data.iloc[rows],
+        id="treasures",
+        get_position=map_style.position_accessor,
+        get_color="color",
+        get_radius="radius",
+        pickable=True,
+        auto_highlight=True,
+        highlight_color=[255, 255, 0, 255]
+    )
+
+
+def cluster_index_for(frame):
+    """Clusters of a frame for every zoom level up to CLUSTER_CONFIG["max_zoom"]."""
+    if not CLUSTER_CONFIG["enabled"]:
+        return None
+    return ClusterIndex(frame, max_zoom=CLUSTER_CONFIG["max_zoom"], cell_pixels=CLUSTER_CONFIG["cell_pixels"])
+
+
+@st.cache_resource(max_entries=4)
+def get_cluster_index(version_number, _frame):
+    """Clusters of a published dataset version, built once and shared by every session."""
+    return cluster_index_for(_frame)
+
+
+@st.cache_resource(max_entries=4)
+def get_point_grid(version_number, _frame):
+    """Spatial index of a published dataset version, built once and shared by every session."""
+    return PointGrid(_frame["longitude"], _frame["latitude"])
+
+
+def view_bounds(center, zoom):
+    """The box of the map to send for a view, or None to send all of it."""
+    if not VIEWPORT_CONFIG["enabled"] or zoom < VIEWPORT_CONFIG["min_zoom"]:
+        return None
+    return viewport_bounds(center[0], center[1], zoom, VIEWPORT_CONFIG["width"], VIEWPORT_CONFIG["height"],
+                           VIEWPORT_CONFIG["margin"])
+
+
+def base_layer(map_style, clusters, zoom, grid=None, bounds=None):
+    """Clusters at zoom while the index has a level for it, every point after that.
+
+    A zoom of None always gives the points layer. With bounds, only the
+    clusters and points inside them are included.
+    """
+    data = clusters.layer_data(zoom, map_style.id_column) if clusters is not None and zoom is not None else None
+    if data is None:
+        return base_point_layer(map_style, grid.query(bounds) if bounds is not None else None)
+    if bounds is not None:
+        positions = clusters.level(zoom).positions
+        data = data[in_bounds(positions[:, 0], positions[:, 1], bounds)]
+    return pdk.Layer(
+        "ScatterplotLayer",
+        data=data,
+        id="clusters",
+        get_position="position",
+        get_color="color",
+        get_radius="radius",
+        radius_units="pixels",
+        pickable=True,
+        auto_highlight=True,
+        highlight_color=[255, 255, 0, 255]
+    )
+
+
+@st.cache_resource(max_entries=32)
+def get_base_layer_json(version_number, cluster_zoom, bounds, _map_style, _clusters, _grid):
+    """The base layer of a published dataset version for one cluster level and box, serialized once.
+
+    cluster_zoom is None for the points layer and bounds None for the whole
+    map, so views past the last cluster level, or showing everything,
+    share entries.
+    """
+    return serialize_layer(base_layer(_map_style, _clusters, cluster_zoom, _grid, bounds))
+
+
+def density_index_for(frame):
+    """Hexagon bins of a frame for every zoom level up to DENSITY_CONFIG["max_zoom"]."""
+    return DensityIndex(frame, max_zoom=DENSITY_CONFIG["max_zoom"], cell_pixels=DENSITY_CONFIG["cell_pixels"])
+
+
+@st.cache_resource(max_entries=4)
+def get_density_index(version_number, _frame):
+    """Density bins of a published dataset version, built once and shared by every session."""
+    return density_index_for(_frame)
+
+
+def density_layer(density, view, zoom, label_column, bounds=None):
+    """Hexagon or heatmap layer of the density bins at zoom, only those inside bounds if given."""
+    level = density.level(zoom)
+    mask = in_bounds(level.positions[:, 0], level.positions[:, 1], bounds) if bounds is not None else None
+    if view == "Heatmap":
+        return pdk.Layer(
+            "HeatmapLayer",
+            data=density.layer_data(zoom, label_column, mask, outlines=False),
+            id="density",
+            get_position="position",
+            get_weight="weight",   # Likelihood-weighted
+            radius_pixels=DENSITY_CONFIG["cell_pixels"],
+            aggregation="SUM"
+        )
+    return pdk.Layer(
+        "PolygonLayer",
+        data=density.layer_data(zoom, label_column, mask),
+        id="density",
+        get_polygon="polygon",
+        get_fill_color="color",
+        stroked=False,
+        pickable=True,
+        auto_highlight=True
+    )
+
+
+@st.cache_resource(max_entries=32)
+def get_density_layer_json(version_number, view, level_zoom, bounds, label_column, _density):
+    """The density layer of a published dataset version for one view, level and box, serialized once."""
+    return serialize_layer(density_layer(_density, view, level_zoom, label_column, bounds))
+
+
+def cluster_zoom_for(clusters, zoom):
+    """The cluster level drawn at zoom, or None when the map draws points."""
+    if clusters is None or clusters.level(zoom) is None:
+        return None
+    return int(zoom)
+
+
+def show_parse_stats():
+    """Debug panel with the coordinate parser counters of this process."""
+    with st.expander("Parser Statistics"):
+        stats = PARSE_STATS.to_frame()
+        if stats.empty:
+            st.info("No coordinates have been parsed by this process yet; the data came from the snapshot.")
+            return
+        totals = PARSE_STATS.totals()
+        st.caption(f"{totals['parsed']} of {totals['rows']} rows parsed, "
+                   f"{totals['missing'] + totals['failed']} dropped, "
+                   f"{totals['parse_seconds'] * 1000:.1f} ms parsing")
+        st.dataframe(stats, hide_index=True)
+        st.download_button("Download JSON", PARSE_STATS.to_json(), file_name="parse_stats.json",
+                           mime="application/json")
 
 
 def main():
     st.title("🗺️ Treasure Map Explorer")
+    PARSE_STATS.enable(DEBUG_CONFIG["parse_stats"])
     
     # Load data
-    df = load_data()
+    if RELOAD_CONFIG["enabled"]:
+        # Every session reads the latest published version; edited source
+        # files are spliced in by the reloader's watcher thread
+        reloader = get_dataset_reloader()
+        dataset = reloader.current()
+        for error in dataset.errors:
+            st.warning(error)
+        if reloader.last_error:
+            st.warning(f"Reloading edited sources failed; showing the last loaded data. {reloader.last_error}")
+        df = dataset.frame
+    else:
+        dataset = None
+        df = load_data(use_snapshot=SNAPSHOT_CONFIG["enabled"], compact=MEMORY_CONFIG["compact"], **INGEST_CONFIG)
     
     if df.empty:
         st.warning("No valid coordinate data found. Please check your Excel file.")
@@ -277,7 +382,7 @@ def main():
     if 'selected_treasure' not in st.session_state:
         st.session_state.selected_treasure = None
     if 'map_center' not in st.session_state:
-        st.session_state.map_center = (df["latitude"].mean(), df["longitude"].mean())
+        st.session_state.map_center = (float(df["latitude"].mean()), float(df["longitude"].mean()))
         st.session_state.zoom_level = 2
     if 'map_click_location' not in st.session_state:
         st.session_state.map_click_location = None
@@ -288,6 +393,7 @@ def main():
     with col1:
         # Create map view
         st.subheader("Treasure Locations")
+        map_view = st.radio("Map view", MAP_VIEWS, horizontal=True, key="map_view")
         
         # Get map center (average of all coordinates)
         center_lat = df["latitude"].mean()
@@ -303,8 +409,10 @@ def main():
         
         # Create tooltip for hover information
         id_column = "Location" if "Location" in df.columns else df.columns[0]
+        # Trimmed point data carries no coordinate text; the details panel shows it
+        coordinates_line = "" if MAP_TRANSPORT_CONFIG["trimmed"] else "{Coordinates (Approximate)}<br/>"
         tooltip = {
-            "html": f"<b>{{{id_column}}}</b><br/>{{Coordinates (Approximate)}}<br/>Click to select",
+            "html": f"<b>{{{id_column}}}</b><br/>{coordinates_line}Click to select",
             "style": {
                 "backgroundColor": "steelblue",
                 "color": "white",
@@ -312,32 +420,50 @@ def main():
             }
         }
 
-        # Create a single layer with all points
-        # Add color based on selection
-        def get_color(row):
-            if row[id_column] == st.session_state.selected_treasure:
-                return [30, 144, 255, 230]  # Blue for selected
+        # Points and clusters are colored and serialized once per dataset
+        # version, zoom level and box in view; a selection only rebuilds
+        # the overlay layer drawn over its rows
+        zoom = st.session_state.zoom_level
+        bounds = view_bounds(st.session_state.map_center, zoom)
+        if dataset is not None:
+            map_style = get_map_style(dataset.number, df, id_column)
+        else:
+            map_style = map_style_for(df, id_column)
+
+        if map_view != "Points":
+            # Density views send precomputed bins; their cost does not grow with the dataset
+            if dataset is not None:
+                density = get_density_index(dataset.number, df)
+                level_zoom = min(int(zoom), DENSITY_CONFIG["max_zoom"])
+                base_layer_json = get_density_layer_json(dataset.number, map_view, level_zoom, bounds, id_column,
+                                                         density)
             else:
-                return [255, 165, 0, 200]   # Orange for unselected
-        
-        df_display = df.copy()
-        df_display['color'] = df_display.apply(get_color, axis=1)
+                base_layer_json = serialize_layer(density_layer(density_index_for(df), map_view, zoom, id_column,
+                                                                bounds))
+        elif dataset is not None:
+            clusters = get_cluster_index(dataset.number, df)
+            cluster_zoom = cluster_zoom_for(clusters, zoom)
+            base_layer_json = get_base_layer_json(dataset.number, cluster_zoom, bounds, map_style, clusters,
+                                                  get_point_grid(dataset.number, df))
+        else:
+            clusters = cluster_index_for(df)
+            grid = PointGrid(df["longitude"], df["latitude"]) if bounds is not None else None
+            base_layer_json = serialize_layer(base_layer(map_style, clusters, zoom, grid, bounds))
         
-        # Create the layer
-        scatter_layer = pdk.Layer(
+        selection_layer = pdk.Layer(
             "ScatterplotLayer",
-            data=df_display,
-            get_position=["longitude", "latitude"],
+            data=map_style.selected(st.session_state.selected_treasure),
+            id="selection",
+            get_position=map_style.position_accessor,
             get_color="color",
             get_radius="radius",
-            pickable=True,
-            auto_highlight=True,
-            highlight_color=[255, 255, 0, 255]
+            pickable=False
         )
 
         # Render the map with selection handling
-        map_chart = pdk.Deck(
-            layers=[scatter_layer],
+        map_chart = SplicedDeck(
+            [base_layer_json],
+            layers=[selection_layer],
             initial_view_state=view_state,
             # map_style="mapbox://styles/mapbox/satellite-v9",
             map_style='road',
@@ -418,7 +544,7 @@ def main():
                     st.session_state.selected_treasure = location_name
                     
                     # Update map center and zoom
-                    st.session_state.map_center = (row["latitude"], row["longitude"])
+                    st.session_state.map_center = (float(row["latitude"]), float(row["longitude"]))
                     st.session_state.zoom_level = 8
                     st.rerun()
         
@@ -449,7 +575,7 @@ def main():
                 if actual_location:
                     treasure_data = df[df[id_column] == actual_location].iloc[0]
                     st.session_state.selected_treasure = actual_location
-                    st.session_state.map_center = (treasure_data["latitude"], treasure_data["longitude"])
+                    st.session_state.map_center = (float(treasure_data["latitude"]), float(treasure_data["longitude"]))
                     st.session_state.zoom_level = 8  # Zoom level when focused on a location
         
         # Create the selectbox with the callback and improved formatting
@@ -497,5 +623,8 @@ def main():
     with st.expander("View All Data"):
         st.dataframe(df.drop(columns=["latitude", "longitude", "radius"]))
 
+    if DEBUG_CONFIG["parse_stats"]:
+        show_parse_stats()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
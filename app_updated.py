@@ -6,6 +6,12 @@ import os
 from math import isnan
 import json
 
+from treasure_deck import LayerJsonCache, SplicedDeck, serialize_layer
+from treasure_details import DetailStore
+from treasure_lazy import LazyCountryDataset
+from treasure_shards import ShardStore
+from treasure_style import MapStyle
+
 
 # Configuration for point sizes based on likelihood
 LIKELIHOOD_RADIUS_CONFIG = {
@@ -14,6 +20,34 @@ LIKELIHOOD_RADIUS_CONFIG = {
     "low": 4000       # For likelihood < 60%
 }
 
+# Configuration for lazy per-country loading: startup reads only the country
+# manifest (counts and bounding boxes) and rows are parsed per selected country
+LAZY_LOADING_CONFIG = {
+    "enabled": True,
+    "max_countries": 8,             # Parsed countries kept in memory, least recently used evicted first
+    "default_countries": 3,         # A new session starts with this many countries, those with the most rows
+    "cache_dir": ".treasure_cache", # Where the country manifest is kept, relative to the app
+    "shard_dir": ".treasure_cache/shards" # Shards from `python treasure_shards.py`; None to always parse raw/
+}
+
+# Configuration for the point data sent to the browser: with "lazy", points
+# carry only position, color, radius, a row id and their location name (for
+# the hover tooltip), and a clicked point's other fields are looked up on the
+# server in a DetailStore
+DETAIL_CONFIG = {
+    "lazy": True,
+    "cache_size": 1024  # Records kept per country selection, least recently used evicted first
+}
+
+# Configuration for the serialized point layers shared by every session, keyed
+# by country filter; the selection and the view are added on every rerun
+LAYER_CACHE_CONFIG = {
+    "enabled": True,
+    "max_entries": 16,                # Layers kept, least recently used evicted first
+    "max_bytes": 256 * 1024 * 1024,   # And at most this much JSON in all
+    "show_stats": False               # Show the cache's hit rate in the sidebar
+}
+
 # Set page title and configuration
 st.set_page_config(
     page_title="Treasure Map Explorer",
@@ -240,23 +274,109 @@ def load_data():
         return pd.DataFrame()
 
 
+@st.cache_resource
+def get_country_dataset():
+    """Shared lazily loaded dataset that every session reads countries from."""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    shard_store = None
+    if LAZY_LOADING_CONFIG["shard_dir"]:
+        shard_store = ShardStore(current_dir, LIKELIHOOD_RADIUS_CONFIG, shard_dir=LAZY_LOADING_CONFIG["shard_dir"])
+    return LazyCountryDataset(
+        current_dir,
+        LIKELIHOOD_RADIUS_CONFIG,
+        max_countries=LAZY_LOADING_CONFIG["max_countries"],
+        cache_dir=LAZY_LOADING_CONFIG["cache_dir"],
+        shard_store=shard_store
+    )
+
+
+def load_country_manifest(dataset):
+    """Read the country manifest and report files that failed to parse."""
+    manifest = dataset.manifest()
+    for entry in manifest.values():
+        if entry["error"]:
+            st.sidebar.error(f"❌ {entry['error']}")
+    # Countries without a single parseable location have nothing to show
+    manifest = {country: entry for country, entry in manifest.items() if entry["rows"]}
+    if manifest:
+        total_locations = sum(entry["rows"] for entry in manifest.values())
+        st.sidebar.info(f"🌍 **{total_locations} treasure locations available in {len(manifest)} countries**")
+    return manifest
+
+
+@st.cache_resource
+def get_layer_cache():
+    """Point layer cache shared by every session."""
+    return LayerJsonCache(LAYER_CACHE_CONFIG["max_entries"], LAYER_CACHE_CONFIG["max_bytes"])
+
+
+@st.cache_resource(max_entries=8)
+def get_map_style(countries, version, lazy_details, _frame, id_column):
+    """Map colors of the frame shown for a country selection and country_version(), shared by every session."""
+    return MapStyle(_frame, id_column, transport_columns=[id_column] if lazy_details else None)
+
+
+def country_version(countries, manifest=None):
+    """mtime and size of the raw/ file behind each country, so caches of its rows follow edits."""
+    if manifest is not None:
+        return tuple((country, manifest[country]["mtime_ns"], manifest[country]["size"]) for country in countries)
+    raw_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "raw")
+    version = []
+    for country in countries:
+        try:
+            stat = os.stat(os.path.join(raw_dir, f"{country}.json"))
+        except OSError:
+            continue
+        version.append((country, stat.st_mtime_ns, stat.st_size))
+    return tuple(version)
+
+
+@st.cache_resource(max_entries=8)
+def get_detail_store(countries, version, _frame):
+    """Detail records of the frame shown for a country selection, shared by every session.
+
+    version is the country_version() of the shown countries; an edited
+    file gives a new store rather than records of the old rows.
+    """
+    return DetailStore(_frame, maxsize=DETAIL_CONFIG["cache_size"])
+
+
+def manifest_center(manifest):
+    """Mean position of every location, from the per-country means."""
+    total = sum(entry["rows"] for entry in manifest.values())
+    latitude = sum(entry["center"][0] * entry["rows"] for entry in manifest.values()) / total
+    longitude = sum(entry["center"][1] * entry["rows"] for entry in manifest.values()) / total
+    return latitude, longitude
+
+
 def main():
     st.title("🗺️ Treasure Map Explorer")
     st.markdown("### Discover Worldwide Archaeological Treasures & Hidden Hoards")
     
     # Load data
-    df = load_data()
-    
-    if df.empty:
-        st.warning("No valid treasure location data found. Please check that JSON files exist in the raw/ directory.")
-        st.info("Expected format: raw/[Country].json with treasure location data")
-        return
+    lazy = LAZY_LOADING_CONFIG["enabled"]
+    if lazy:
+        dataset = get_country_dataset()
+        manifest = load_country_manifest(dataset)
+        if not manifest:
+            st.warning("No valid treasure location data found. Please check that JSON files exist in the raw/ directory.")
+            st.info("Expected format: raw/[Country].json with treasure location data")
+            return
+        countries = sorted(manifest)
+    else:
+        df = load_data()
+
+        if df.empty:
+            st.warning("No valid treasure location data found. Please check that JSON files exist in the raw/ directory.")
+            st.info("Expected format: raw/[Country].json with treasure location data")
+            return
+        countries = sorted(df['Area'].unique())
     
     # Initialize session state for tracking selected treasure and map position
     if 'selected_treasure' not in st.session_state:
         st.session_state.selected_treasure = None
     if 'map_center' not in st.session_state:
-        st.session_state.map_center = (df["latitude"].mean(), df["longitude"].mean())
+        st.session_state.map_center = manifest_center(manifest) if lazy else (float(df["latitude"].mean()), float(df["longitude"].mean()))
         st.session_state.zoom_level = 2
     if 'map_click_location' not in st.session_state:
         st.session_state.map_click_location = None
@@ -269,16 +389,35 @@ def main():
         st.subheader("🗺️ Global Treasure Locations")
         
         # Add country filter
-        countries = sorted(df['Area'].unique())
+        if lazy:
+            if "country_filter" not in st.session_state:
+                # Start on a map of the largest countries rather than an empty page
+                by_rows = sorted(countries, key=lambda country: -manifest[country]["rows"])
+                st.session_state.country_filter = by_rows[:LAZY_LOADING_CONFIG["default_countries"]]
+            else:
+                # Countries whose files were removed since the last run
+                st.session_state.country_filter = [c for c in st.session_state.country_filter if c in manifest]
         selected_countries = st.multiselect(
             "Filter by Countries:",
             options=countries,
-            default=countries,
+            default=None if lazy else countries,
+            key="country_filter" if lazy else None,
+            format_func=(lambda country: f"{country} ({manifest[country]['rows']})") if lazy else str,
             help="Select which countries to display on the map"
         )
         
+        if lazy:
+            # Only the selected countries are parsed, each on first selection
+            if not selected_countries:
+                st.info("Select one or more countries to load their treasure locations.")
+                return
+            df = dataset.load(
+                selected_countries,
+                on_error=lambda country, e: st.sidebar.error(f"❌ Error loading {country}: {e}")
+            )
+            filtered_df = df
         # Filter data based on selected countries
-        if selected_countries:
+        elif selected_countries:
             filtered_df = df[df['Area'].isin(selected_countries)]
         else:
             filtered_df = df
@@ -287,18 +426,16 @@ def main():
             st.warning("No locations found for selected countries.")
             return
         
-        # Create the view state
-        view_state = pdk.ViewState(
-            latitude=st.session_state.map_center[0],
-            longitude=st.session_state.map_center[1],
-            zoom=st.session_state.zoom_level,
-            pitch=0
-        )
-        
         # Create tooltip for hover information
         id_column = "Location" if "Location" in filtered_df.columns else filtered_df.columns[0]
+        lazy_details = DETAIL_CONFIG["lazy"]
+        if lazy_details:
+            # Points carry only their name; a click fetches the rest from the detail store
+            tooltip_html = f"<b>{{{id_column}}}</b><br/>Click for details"
+        else:
+            tooltip_html = f"<b>{{{id_column}}}</b><br/>{{Area}}<br/>{{Treasure Value}} Value<br/>{{Likelihood (%)}}% Likelihood<br/>Click to select"
         tooltip = {
-            "html": f"<b>{{{id_column}}}</b><br/>{{Area}}<br/>{{Treasure Value}} Value<br/>{{Likelihood (%)}}% Likelihood<br/>Click to select",
+            "html": tooltip_html,
             "style": {
                 "backgroundColor": "steelblue",
                 "color": "white",
@@ -306,41 +443,59 @@ def main():
             }
         }
 
-        # Create a single layer with all points
-        # Add color based on selection and treasure value
-        def get_color(row):
-            if row[id_column] == st.session_state.selected_treasure:
-                return [30, 144, 255, 230]  # Blue for selected
-            else:
-                # Color by treasure value
-                value = row.get("Treasure Value", "Medium")
-                if value == "Priceless":
-                    return [255, 215, 0, 200]   # Gold
-                elif value == "Exceptional":
-                    return [255, 165, 0, 200]   # Orange
-                elif value == "High":
-                    return [255, 69, 0, 200]    # Red-Orange
-                else:
-                    return [128, 128, 128, 200] # Gray for Medium/Low/Unknown
-        
-        filtered_df_display = filtered_df.copy()
-        filtered_df_display['color'] = filtered_df_display.apply(get_color, axis=1)
-        
-        # Create the layer
-        scatter_layer = pdk.Layer(
+        # Color points by treasure value in one pass over the column; the
+        # selected treasure is drawn over them by a layer of its own rows
+        # Shared caches are keyed by the countries shown and the version of
+        # their files (every country when none is selected), so an edit that
+        # keeps the row count still gets fresh colors, records and specs
+        filter_key = (tuple(sorted(selected_countries)),
+                      country_version(sorted(selected_countries or countries), manifest if lazy else None))
+        map_style = get_map_style(*filter_key, lazy_details, filtered_df, id_column)
+        details = get_detail_store(*filter_key, filtered_df) if lazy_details else None
+
+        def build_points():
+            return pdk.Layer(
+                "ScatterplotLayer",
+                data=map_style.data,
+                id="treasures",
+                get_position=map_style.position_accessor,
+                get_color="color",
+                get_radius="radius",
+                pickable=True,
+                auto_highlight=True,
+                highlight_color=[255, 255, 0, 255]
+            )
+
+        # The point layer is serialized once per country filter and shared by
+        # every session; a selection or a new view only encodes the overlay
+        if LAYER_CACHE_CONFIG["enabled"]:
+            points_json = get_layer_cache().get(filter_key + (lazy_details,), build_points)
+        else:
+            points_json = serialize_layer(build_points())
+        if LAYER_CACHE_CONFIG["show_stats"]:
+            stats = get_layer_cache().stats()
+            st.sidebar.caption(f"Map layer cache: {stats['hits']} hits, {stats['misses']} misses "
+                               f"({stats['hit_rate']:.0%}), {stats['size']}/{stats['maxsize']} layers, "
+                               f"{stats['bytes'] / 2**20:.1f} MB")
+
+        selection_layer = pdk.Layer(
             "ScatterplotLayer",
-            data=filtered_df_display,
-            get_position=["longitude", "latitude"],
+            data=map_style.selected(st.session_state.selected_treasure),
+            id="selection",
+            get_position=map_style.position_accessor,
             get_color="color",
             get_radius="radius",
-            pickable=True,
-            auto_highlight=True,
-            highlight_color=[255, 255, 0, 255]
+            pickable=False
         )
-
-        # Render the map with selection handling
-        map_chart = pdk.Deck(
-            layers=[scatter_layer],
+        view_state = pdk.ViewState(
+            latitude=float(st.session_state.map_center[0]),
+            longitude=float(st.session_state.map_center[1]),
+            zoom=st.session_state.zoom_level,
+            pitch=0
+        )
+        map_chart = SplicedDeck(
+            [points_json],
+            layers=[selection_layer],
             initial_view_state=view_state,
             map_style='road',
             tooltip=tooltip,
@@ -348,7 +503,23 @@ def main():
         )
 
         # Display the map
-        st.pydeck_chart(map_chart, use_container_width=True)
+        if lazy_details:
+            event = st.pydeck_chart(map_chart, use_container_width=True, on_select="rerun",
+                                    selection_mode="single-object", key="treasure_map")
+            clicked = event.selection["objects"].get("treasures", [])
+            click_id = clicked[0]["id"] if clicked else None
+            # The chart keeps its selection across reruns; act on each click once
+            if click_id != st.session_state.map_click_location:
+                st.session_state.map_click_location = click_id
+                record = details.get(click_id) if click_id is not None else None
+                if record is not None:
+                    st.session_state.treasure_selector = format_location_with_area(record[id_column], record["Area"])
+                    st.session_state.selected_treasure = record[id_column]
+                    st.session_state.map_center = (float(record["latitude"]), float(record["longitude"]))
+                    st.session_state.zoom_level = 8
+                    st.rerun()
+        else:
+            st.pydeck_chart(map_chart, use_container_width=True)
         
         # Add legend
         st.markdown("""
@@ -430,7 +601,7 @@ def main():
                     st.session_state.selected_treasure = location_name
                     
                     # Update map center and zoom
-                    st.session_state.map_center = (row["latitude"], row["longitude"])
+                    st.session_state.map_center = (float(row["latitude"]), float(row["longitude"]))
                     st.session_state.zoom_level = 8
                     st.rerun()
 
@@ -455,7 +626,7 @@ def main():
                 if actual_location:
                     treasure_data = df[df[id_column] == actual_location].iloc[0]
                     st.session_state.selected_treasure = actual_location
-                    st.session_state.map_center = (treasure_data["latitude"], treasure_data["longitude"])
+                    st.session_state.map_center = (float(treasure_data["latitude"]), float(treasure_data["longitude"]))
                     st.session_state.zoom_level = 8
         
         # Create the selectbox with the callback
@@ -471,7 +642,13 @@ def main():
         if selected_treasure_display:
             actual_location = extract_location_from_display(selected_treasure_display)
             if actual_location:
-                treasure_data = df[df[id_column] == actual_location].iloc[0]
+                treasure_data = None
+                if details is not None:
+                    # From the detail store, without a scan of the frame
+                    matches = map_style.rows_of(actual_location)
+                    treasure_data = details.get(matches[0]) if len(matches) else None
+                if treasure_data is None:
+                    treasure_data = df[df[id_column] == actual_location].iloc[0]
                 
                 # Display treasure details with enhanced formatting
                 st.markdown(f"### 🏛️ {actual_location}")
@@ -518,7 +695,7 @@ def main():
                 col_a, col_b = st.columns(2)
                 with col_a:
                     if st.button("🌍 Center on Map", use_container_width=True):
-                        st.session_state.map_center = (treasure_data["latitude"], treasure_data["longitude"])
+                        st.session_state.map_center = (float(treasure_data["latitude"]), float(treasure_data["longitude"]))
                         st.session_state.zoom_level = 10
                         st.rerun()
                 with col_b:
@@ -0,0 +1,159 @@
+"""Per-string cost of parse_coordinates for each coordinate format.
+
+Times the single-dispatch parser against the previous implementation,
+which searched every pattern in turn until one matched.
+
+Usage: python benchmarks/bench_coords.py [--repeat 20000]
+"""
+import argparse
+import os
+import re
+import sys
+import timeit
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from treasure_coords import (  # noqa: E402
+    DECIMAL_DIRECTION_PATTERN, DECIMAL_PAIR_PATTERN, DMS_PATTERN, DMS_SECONDS_PATTERN,
+    SIMPLE_DECIMAL_PATTERN, parse_coordinates,
+)
+
+SAMPLES = [
+    ("decimal pair", "55.6761, 12.5683"),
+    ("DMS", "53°21'N, 4°14'W"),
+    ("decimal + hemisphere", "55.2415° N, 6.5167° W"),
+    ("DMS with seconds", "54° 16' 25\" N, 5° 40' 36\" W"),
+    ("simple decimal", "54.32° N, 5.72° W"),
+    ("unparseable", "Somewhere near the old mill"),
+]
+
+
+def legacy_parse_coordinates(coord_str):
+    """parse_coordinates as it was before single dispatch: every pattern in turn."""
+    if pd.isna(coord_str) or coord_str == "":
+        return None, None
+    
+    # Convert to string if not already
+    coord_str = str(coord_str)
+    
+    try:
+        # Try to extract coordinates in format like "12.345, -67.890"
+        match = re.search(DECIMAL_PAIR_PATTERN, coord_str)
+        
+        if match:
+            lat = float(match.group(1))
+            lon = float(match.group(2))
+            # Basic validation for lat/lon ranges
+            if -90 <= lat <= 90 and -180 <= lon <= 180:
+                return lat, lon
+            else:
+                # If values are swapped, try to correct them
+                if -90 <= lon <= 90 and -180 <= lat <= 180:
+                    return lon, lat
+        
+        # Try to extract coordinates in DMS format like "53°21'N, 4°14'W"
+        dms_match = re.search(DMS_PATTERN, coord_str)
+        
+        if dms_match:
+            lat_deg = int(dms_match.group(1))
+            lat_min = int(dms_match.group(2))
+            lat_dir = dms_match.group(3)
+            
+            lon_deg = int(dms_match.group(4))
+            lon_min = int(dms_match.group(5))
+            lon_dir = dms_match.group(6)
+            
+            # Convert to decimal degrees
+            lat = lat_deg + (lat_min / 60)
+            if lat_dir == 'S':
+                lat = -lat
+                
+            lon = lon_deg + (lon_min / 60)
+            if lon_dir == 'W':
+                lon = -lon
+                
+            return lat, lon
+        
+        # Try to extract coordinates in decimal degrees with direction like "55.2415° N, 6.5167° W"
+        decimal_dir_match = re.search(DECIMAL_DIRECTION_PATTERN, coord_str)
+        
+        if decimal_dir_match:
+            lat = float(decimal_dir_match.group(1))
+            lat_dir = decimal_dir_match.group(2)
+            lon = float(decimal_dir_match.group(3))
+            lon_dir = decimal_dir_match.group(4)
+            
+            if lat_dir == 'S':
+                lat = -lat
+            if lon_dir == 'W':
+                lon = -lon
+                
+            return lat, lon
+        
+        # Try to extract coordinates in DMS format with seconds like "54° 16' 25\" N, 5° 40' 36\" W"
+        dms_sec_match = re.search(DMS_SECONDS_PATTERN, coord_str)
+        
+        if dms_sec_match:
+            lat_deg = int(dms_sec_match.group(1))
+            lat_min = int(dms_sec_match.group(2))
+            lat_sec = int(dms_sec_match.group(3))
+            lat_dir = dms_sec_match.group(4)
+            
+            lon_deg = int(dms_sec_match.group(5))
+            lon_min = int(dms_sec_match.group(6))
+            lon_sec = int(dms_sec_match.group(7))
+            lon_dir = dms_sec_match.group(8)
+            
+            # Convert to decimal degrees
+            lat = lat_deg + (lat_min / 60) + (lat_sec / 3600)
+            if lat_dir == 'S':
+                lat = -lat
+                
+            lon = lon_deg + (lon_min / 60) + (lon_sec / 3600)
+            if lon_dir == 'W':
+                lon = -lon
+                
+            return lat, lon
+        
+        # Try to extract coordinates in format like "54.32° N, 5.72° W"
+        simple_decimal_match = re.search(SIMPLE_DECIMAL_PATTERN, coord_str)
+        
+        if simple_decimal_match:
+            lat = float(simple_decimal_match.group(1))
+            lat_dir = simple_decimal_match.group(2)
+            lon = float(simple_decimal_match.group(3))
+            lon_dir = simple_decimal_match.group(4)
+            
+            if lat_dir == 'S':
+                lat = -lat
+            if lon_dir == 'W':
+                lon = -lon
+                
+            return lat, lon
+        
+    except (ValueError, IndexError):
+        pass
+    
+    return None, None
+
+def per_string_us(parse, value, repeat):
+    return min(timeit.repeat(lambda: parse(value), number=repeat, repeat=5)) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20000, help="calls per timing run")
+    args = parser.parse_args()
+
+    print(f"{'format':<22} {'before us':>10} {'after us':>9} {'speedup':>8}")
+    for name, value in SAMPLES:
+        assert parse_coordinates(value) == legacy_parse_coordinates(value), name
+        before = per_string_us(legacy_parse_coordinates, value, args.repeat)
+        after = per_string_us(parse_coordinates, value, args.repeat)
+        print(f"{name:<22} {before:>10.2f} {after:>9.2f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Ingest scaling benchmark for the record-batch loader.
+
+Generates synthetic country files and times two ways of building the
+combined frame from them:
+
+* concat   - grow a DataFrame with pd.concat once per source (the old loader)
+* batches  - iter_json_batches + assemble_frame (the current loader)
+
+Each loader starts from an empty coordinate cache and parser statistics,
+so neither is timed on coordinates the other already parsed.
+
+Usage: python benchmarks/bench_ingest.py [--sizes 50 500 5000] [--rows 7]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from treasure_coords import COORDINATE_CACHE  # noqa: E402
+from treasure_ingest import assemble_frame, iter_json_batches  # noqa: E402
+from treasure_parse_stats import PARSE_STATS  # noqa: E402
+
+RADIUS_CONFIG = {"high": 10000, "medium": 7000, "low": 4000}
+
+
+def write_sources(raw_dir, file_count, rows_per_file):
+    for i in range(file_count):
+        records = [{
+            "Location": f"Site {i}-{j}",
+            "Coordinates (Approximate)": f"{10 + j % 70}°{i % 60:02d}'N, {5 + i % 170}°{j % 60:02d}'E",
+            "Treasure Value": "High",
+            "Likelihood (%)": 50 + (i + j) % 50,
+            "Recommended Reason": "Synthetic benchmark row",
+            "Supporting Evidence": "Generated",
+            "Supporting Evidence URLs": ["https://example.com"],
+        } for j in range(rows_per_file)]
+        with open(os.path.join(raw_dir, f"Country{i:05d}.json"), 'w', encoding='utf-8') as f:
+            json.dump(records, f)
+
+
+def load_with_concat(raw_dir):
+    combined_df = pd.DataFrame()
+    for batch in iter_json_batches(raw_dir, RADIUS_CONFIG):
+        combined_df = pd.concat([combined_df, pd.DataFrame(batch)], ignore_index=True)
+    return combined_df
+
+
+def load_with_batches(raw_dir):
+    return assemble_frame(iter_json_batches(raw_dir, RADIUS_CONFIG))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--rows", type=int, default=7, help="rows per synthetic file")
+    args = parser.parse_args()
+
+    print(f"{'files':>6} {'rows':>7} {'concat s':>9} {'batches s':>10} {'batches ms/file':>16}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as raw_dir:
+            write_sources(raw_dir, size, args.rows)
+            timings = {}
+            for name, loader in (("concat", load_with_concat), ("batches", load_with_batches)):
+                COORDINATE_CACHE.clear()
+                PARSE_STATS.reset()
+                start = time.perf_counter()
+                df = loader(raw_dir)
+                timings[name] = time.perf_counter() - start
+            per_file_ms = timings["batches"] / size * 1000
+            print(f"{size:>6} {len(df):>7} {timings['concat']:>9.3f} {timings['batches']:>10.3f} {per_file_ms:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Size and parse time of the map's base layer JSON, full vs trimmed vs lazy.
+
+Tiles the bundled dataset to each size and serializes the base point
+layer three ways:
+
+* full     - every column of the frame plus the color (the old layer data)
+* trimmed  - position, color, radius, row id and the location name
+* lazy     - position, color, radius and row id; text is looked up on the
+             server by id (see treasure_details)
+
+Parse time is json.loads of the layer, a stand-in for the browser's
+JSON.parse of the same spec.
+
+Usage: python benchmarks/bench_map_payload.py [--sizes 1000 10000 100000]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+import pydeck as pdk
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from treasure_deck import serialize_layer  # noqa: E402
+from treasure_ingest import assemble_sources, iter_dataset_sources  # noqa: E402
+from treasure_schema import compact_frame  # noqa: E402
+from treasure_style import MapStyle  # noqa: E402
+
+RADIUS_CONFIG = {"high": 10000, "medium": 7000, "low": 4000}
+TOOLTIP_COLUMNS = ["Location"]
+
+
+def layer_json(style):
+    return serialize_layer(pdk.Layer("ScatterplotLayer", data=style.data, id="treasures",
+                                     get_position=style.position_accessor, get_color="color",
+                                     get_radius="radius", pickable=True))
+
+
+def measure(frame, transport_columns):
+    start = time.perf_counter()
+    spec = layer_json(MapStyle(frame, "Location", transport_columns=transport_columns))
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    json.loads(spec)
+    return len(spec.encode("utf-8")), build, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    dataset, _ = assemble_sources(iter_dataset_sources(BASE_DIR, RADIUS_CONFIG))
+    dataset = compact_frame(dataset)
+
+    print(f"{'rows':>7} {'full MB':>8} {'trimmed MB':>11} {'lazy MB':>8} {'full parse ms':>14} "
+          f"{'trimmed parse ms':>17} {'lazy parse ms':>14} {'full build s':>13} {'trimmed build s':>16}")
+    for size in args.sizes:
+        frame = pd.concat([dataset] * (size // len(dataset) + 1), ignore_index=True).iloc[:size]
+        full_bytes, full_build, full_parse = measure(frame, None)
+        trimmed_bytes, trimmed_build, trimmed_parse = measure(frame, TOOLTIP_COLUMNS)
+        lazy_bytes, _, lazy_parse = measure(frame, [])
+        print(f"{size:>7} {full_bytes / 1e6:>8.2f} {trimmed_bytes / 1e6:>11.2f} {lazy_bytes / 1e6:>8.2f} "
+              f"{full_parse * 1000:>14.1f} {trimmed_parse * 1000:>17.1f} {lazy_parse * 1000:>14.1f} "
+              f"{full_build:>13.2f} {trimmed_build:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
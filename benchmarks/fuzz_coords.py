@@ -0,0 +1,121 @@
+"""Fuzz and worst-case timing harness for parse_coordinates.
+
+First checks on random short strings that parse_coordinates, the column
+parser and the previous implementation agree. Then times adversarial
+inputs (long digit runs, repeated degree signs, separators) at doubling
+lengths with the length limit lifted, and fails if any family grows
+faster than linearly.
+
+Usage: python benchmarks/fuzz_coords.py [--strings 50000] [--max-length 65536]
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import treasure_coords  # noqa: E402
+from bench_coords import legacy_parse_coordinates  # noqa: E402
+from treasure_coords import parse_coordinate_series, parse_coordinates  # noqa: E402
+
+TOKENS = ["1", "12", "12.5", "-3", "°", "'", "\"", "N", "S", "E", "W", ",", " ", "  ", "95", "200",
+          "-200", "x", "0.", "٣", "\xa0", "\x0b", "\t", "12345678901234567", "-", ".", "° ", "'N", "'S"]
+
+# Each family builds a string of about n characters that makes a naive
+# backtracking search retry at every position
+ADVERSARIAL = {
+    "digits": lambda n: "1" * n,
+    "digits + hemisphere": lambda n: "1" * n + "°N E",
+    "dotted digits": lambda n: "1." * (n // 2),
+    "degree runs": lambda n: "1°" * (n // 2) + "N",
+    "minutes runs": lambda n: "1°1'" * (n // 4),
+    "separators": lambda n: "1" + ", " * (n // 2),
+    "seconds": lambda n: "1° 1' " * (n // 6) + "1\" N,",
+}
+
+# Time may at most this much more than double when the input doubles
+GROWTH_LIMIT = 3.0
+
+
+def same(a, b):
+    return a == b and all(x is None or math.copysign(1, x) == math.copysign(1, y) for x, y in zip(a, b))
+
+
+def fuzz(count, seed):
+    """Number of strings on which the three parsers disagree."""
+    rng = random.Random(seed)
+    values = ["".join(rng.choice(TOKENS) for _ in range(rng.randint(0, 14))) for _ in range(count)]
+    values += ["1" * 300, " " * 300 + "1, 2", "1" * 255 + ",1"]
+    latitudes, longitudes = parse_coordinate_series(pd.Series(values, dtype=object))
+    bad = 0
+    for value, lat, lon in zip(values, latitudes, longitudes):
+        scalar = parse_coordinates(value)
+        column = (None if math.isnan(lat) else lat, None if math.isnan(lon) else lon)
+        legacy = legacy_parse_coordinates(value) \
+            if len(value.strip()) <= treasure_coords.MAX_COORDINATE_LENGTH else (None, None)
+        if not (same(scalar, column) and same(scalar, legacy)):
+            bad += 1
+            if bad <= 5:
+                print(f"  mismatch {value!r}: scalar {scalar} column {column} legacy {legacy}")
+    return bad
+
+
+def seconds(parse, value):
+    return min(timeit_once(parse, value) for _ in range(3))
+
+
+def timeit_once(parse, value):
+    start = time.perf_counter()
+    parse(value)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--strings", type=int, default=50000, help="random strings to compare")
+    parser.add_argument("--seed", type=int, default=17)
+    parser.add_argument("--max-length", type=int, default=65536, help="longest adversarial input")
+    parser.add_argument("--legacy-length", type=int, default=400,
+                        help="longest input timed with the previous implementation")
+    args = parser.parse_args()
+
+    bad = fuzz(args.strings, args.seed)
+    print(f"fuzz: {args.strings} strings, {bad} mismatches")
+
+    limit = treasure_coords.MAX_COORDINATE_LENGTH
+    treasure_coords.MAX_COORDINATE_LENGTH = None
+    superlinear = []
+    try:
+        print(f"\n{'family':<22} {'length':>7} {'ms':>9} {'ns/char':>8}")
+        for name, build in ADVERSARIAL.items():
+            previous = None
+            length = 1024
+            while length <= args.max_length:
+                value = build(length)
+                elapsed = seconds(parse_coordinates, value)
+                print(f"{name:<22} {len(value):>7} {elapsed * 1000:>9.3f} {elapsed / len(value) * 1e9:>8.1f}")
+                # Only compare timings long enough to be above timer noise
+                if previous is not None and previous > 1e-4 and elapsed / previous > GROWTH_LIMIT:
+                    superlinear.append((name, len(value)))
+                previous = elapsed
+                length *= 2
+        legacy_lengths = [n for n in (100, 200, 400, 800) if n <= args.legacy_length]
+        if legacy_lengths:
+            print("\nprevious implementation, digits only:")
+            for n in legacy_lengths:
+                print(f"  {n:>5} chars {seconds(legacy_parse_coordinates, '1' * n) * 1000:>9.2f} ms")
+    finally:
+        treasure_coords.MAX_COORDINATE_LENGTH = limit
+
+    for name, length in superlinear:
+        print(f"superlinear growth: {name} at {length} chars")
+    sys.exit(1 if bad or superlinear else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from treasure_style import VALUE_COLORS
+
+
+def write_raw_country(raw_dir, country, rows=0, lat=40, lon=0, likelihood=85, coordinates=None):
+    """Write raw/<country>.json with one record per coordinate string.
+
+    Without coordinates, rows records get made-up ones starting at lat/lon.
+    """
+    if coordinates is None:
+        coordinates = [f"{lat + i}.5, {lon + i}.25" for i in range(rows)]
+    records = [{
+        "Location": f"{country} site {i}",
+        "Coordinates (Approximate)": value,
+        "Treasure Value": "High",
+        "Likelihood (%)": likelihood,
+        "Supporting Evidence URLs": [f"https://example.com/{country}/{i}"],
+    } for i, value in enumerate(coordinates)]
+    path = os.path.join(raw_dir, f"{country}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(records, f)
+    # Guarantee a visible mtime change even on coarse filesystem clocks
+    later = time.time() + len(coordinates) + likelihood
+    os.utime(path, (later, later))
+    return path
+
+
+def make_random_frame(size, seed=21):
+    """A frame of size treasures spread over the map, with random tiers and likelihoods."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Location": [f"Site {i}" for i in range(size)],
+        "Treasure Value": rng.choice(list(VALUE_COLORS) + ["Medium", "Low"], size),
+        "Likelihood (%)": rng.uniform(1, 100, size),
+        "latitude": rng.uniform(-80, 80, size),
+        "longitude": rng.uniform(-180, 180, size),
+    })
+
+
+@pytest.fixture
+def write_country():
+    """write_raw_country, for tests that create or edit source files."""
+    return write_raw_country
+
+
+@pytest.fixture
+def random_frame():
+    """make_random_frame, for tests of the map indexes."""
+    return make_random_frame
+
+
+@pytest.fixture
+def base_dir():
+    """A temporary app directory with an empty raw/; test classes override it to add countries."""
+    with tempfile.TemporaryDirectory() as base_dir:
+        os.makedirs(os.path.join(base_dir, "raw"))
+        yield base_dir
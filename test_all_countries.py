@@ -11,51 +11,14 @@ import importlib.util
 import sys
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 import app
+from treasure_geo import COUNTRY_BOUNDARIES
 
 
 class TestGenericCountryTreasures:
     """Generic test framework for any country treasure locations."""
     
     # Country-specific coordinate boundaries (including Southern Hemisphere countries)
-    COUNTRY_BOUNDARIES = {
-        # Northern Hemisphere countries
-        'Denmark': {'lat_min': 54.5, 'lat_max': 57.5, 'lon_min': 8.0, 'lon_max': 15.5},
-        'France': {'lat_min': 41.3, 'lat_max': 51.1, 'lon_min': -5.1, 'lon_max': 9.6},
-        'Germany': {'lat_min': 47.3, 'lat_max': 55.1, 'lon_min': 5.9, 'lon_max': 15.0},
-        'England': {'lat_min': 49.9, 'lat_max': 55.8, 'lon_min': -6.4, 'lon_max': 1.8},
-        'Ireland': {'lat_min': 51.4, 'lat_max': 55.4, 'lon_min': -10.5, 'lon_max': -5.4},
-        'Italy': {'lat_min': 35.5, 'lat_max': 47.1, 'lon_min': 6.6, 'lon_max': 18.5},
-        'Portugal': {'lat_min': 36.9, 'lat_max': 42.2, 'lon_min': -9.5, 'lon_max': -6.2},
-        'Spain': {'lat_min': 35.2, 'lat_max': 43.8, 'lon_min': -9.3, 'lon_max': 4.3},
-        'Mexico': {'lat_min': 14.5, 'lat_max': 32.7, 'lon_min': -118.4, 'lon_max': -86.7},
-        'Philippines': {'lat_min': 4.6, 'lat_max': 21.1, 'lon_min': 116.9, 'lon_max': 126.6},
-        'Poland': {'lat_min': 49.0, 'lat_max': 54.8, 'lon_min': 14.1, 'lon_max': 24.1},
-        'Bulgaria': {'lat_min': 41.2, 'lat_max': 44.2, 'lon_min': 22.4, 'lon_max': 28.6},
-        'China': {'lat_min': 18.2, 'lat_max': 53.6, 'lon_min': 73.5, 'lon_max': 135.1},
-        'Greece': {'lat_min': 34.8, 'lat_max': 41.7, 'lon_min': 19.4, 'lon_max': 29.6},
-        'Japan': {'lat_min': 24.0, 'lat_max': 45.6, 'lon_min': 122.9, 'lon_max': 153.0},
-        
-        # Mixed Northern/Southern Hemisphere countries
-        'Peru': {'lat_min': -18.4, 'lat_max': -0.0, 'lon_min': -81.3, 'lon_max': -68.7},
-        'Indonesia': {'lat_min': -11.0, 'lat_max': 6.0, 'lon_min': 95.0, 'lon_max': 141.0},
-        'Brazil': {'lat_min': -33.7, 'lat_max': 5.3, 'lon_min': -73.9, 'lon_max': -28.8},
-        
-        # Southern Hemisphere countries
-        'Australia': {'lat_min': -43.6, 'lat_max': -10.7, 'lon_min': 113.3, 'lon_max': 153.6},
-        'NewZealand': {'lat_min': -47.3, 'lat_max': -34.4, 'lon_min': 166.4, 'lon_max': 178.5},
-        'Madagascar': {'lat_min': -25.6, 'lat_max': -11.9, 'lon_min': 43.2, 'lon_max': 50.5},
-        'Zimbabwe': {'lat_min': -22.4, 'lat_max': -15.6, 'lon_min': 25.2, 'lon_max': 33.1},
-        'Botswana': {'lat_min': -26.9, 'lat_max': -17.8, 'lon_min': 20.0, 'lon_max': 29.4},
-        'Namibia': {'lat_min': -28.9, 'lat_max': -16.9, 'lon_min': 11.7, 'lon_max': 25.3},
-        'Zambia': {'lat_min': -18.1, 'lat_max': -8.2, 'lon_min': 21.9, 'lon_max': 33.7},
-        'SouthAfrica': {'lat_min': -34.8, 'lat_max': -22.1, 'lon_min': 16.5, 'lon_max': 32.9},
-        'Chile': {'lat_min': -55.9, 'lat_max': -17.5, 'lon_min': -109.5, 'lon_max': -66.4},
-        'Argentina': {'lat_min': -55.1, 'lat_max': -21.8, 'lon_min': -73.6, 'lon_max': -53.6},
-        'Uruguay': {'lat_min': -35.0, 'lat_max': -30.1, 'lon_min': -58.4, 'lon_max': -53.1},
-        'Paraguay': {'lat_min': -27.6, 'lat_max': -19.3, 'lon_min': -62.6, 'lon_max': -54.3},
-        'Bolivia': {'lat_min': -22.9, 'lat_max': -9.7, 'lon_min': -69.6, 'lon_max': -57.5},
-        'Antarctica': {'lat_min': -90.0, 'lat_max': -60.0, 'lon_min': -180.0, 'lon_max': 180.0}
-    }
+    COUNTRY_BOUNDARIES = COUNTRY_BOUNDARIES
     
     @classmethod
     def get_all_country_files(cls) -> List[str]:
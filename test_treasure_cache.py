@@ -0,0 +1,172 @@
+import pytest
+import json
+import os
+import tempfile
+import time
+import pandas as pd
+
+from unittest.mock import patch
+
+from treasure_cache import DatasetSnapshot, WorkbookCache, collect_source_paths, file_digest
+from treasure_ingest import read_workbook_sheets
+
+
+class TestDatasetSnapshot:
+    """Test suite for the compiled dataset snapshot used on cold starts."""
+
+    @pytest.fixture
+    def source_tree(self):
+        """Create a temporary app directory with two country files."""
+        with tempfile.TemporaryDirectory() as base_dir:
+            raw_dir = os.path.join(base_dir, "raw")
+            os.makedirs(raw_dir)
+            for country in ["Denmark", "Spain"]:
+                with open(os.path.join(raw_dir, f"{country}.json"), 'w', encoding='utf-8') as f:
+                    json.dump([{"Location": f"{country} site", "Coordinates (Approximate)": "55°43'N, 9°08'E"}], f)
+            yield base_dir
+
+    @staticmethod
+    def make_frame():
+        return pd.DataFrame({
+            "Location": ["Vindelev", "Fyrkat", "Tesoro"],
+            "Likelihood (%)": [95, 0.85, "65%"],
+            "Area": ["Denmark", "Denmark", "Spain"],
+            "latitude": [55.716, 56.6, 40.1],
+            "longitude": [9.133, 9.966, -3.5],
+            "radius": [10000, 10000, 7000],
+            "Supporting Evidence URLs": [["https://example.com"], float('nan'), []],
+        })
+
+    def test_collect_source_paths_sorted(self, source_tree):
+        """Test that only JSON sources are collected, in a stable order."""
+        with open(os.path.join(source_tree, "raw", "notes.txt"), 'w') as f:
+            f.write("ignore me")
+        paths = collect_source_paths(source_tree)
+        assert [os.path.basename(p) for p in paths] == ["Denmark.json", "Spain.json"]
+
+    def test_round_trip_preserves_frame(self, source_tree):
+        """Test that mixed-type and list columns survive the snapshot exactly."""
+        snapshot = DatasetSnapshot(source_tree)
+        sources = collect_source_paths(source_tree)
+        df = self.make_frame()
+
+        assert snapshot.load(sources) is None, "No snapshot should exist yet"
+        assert snapshot.save(df, sources), "Snapshot should be written"
+
+        loaded = snapshot.load(sources)
+        assert loaded is not None, "Fresh snapshot should be served"
+        pd.testing.assert_frame_equal(loaded, df, check_dtype=False)
+        assert isinstance(loaded.loc[0, "Likelihood (%)"], int)
+        assert isinstance(loaded.loc[2, "Likelihood (%)"], str)
+
+    def test_content_change_invalidates(self, source_tree):
+        """Test that editing a source file forces a rebuild."""
+        snapshot = DatasetSnapshot(source_tree)
+        sources = collect_source_paths(source_tree)
+        snapshot.save(self.make_frame(), sources)
+
+        with open(sources[0], 'a', encoding='utf-8') as f:
+            f.write("\n")
+        assert snapshot.load(sources) is None, "Changed source must invalidate the snapshot"
+
+    def test_touch_without_change_keeps_snapshot(self, source_tree):
+        """Test that an mtime bump with identical content still hits."""
+        snapshot = DatasetSnapshot(source_tree)
+        sources = collect_source_paths(source_tree)
+        snapshot.save(self.make_frame(), sources)
+
+        later = time.time() + 10
+        os.utime(sources[0], (later, later))
+        assert snapshot.load(sources) is not None, "Identical content should reuse the snapshot"
+
+        with open(snapshot.manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        recorded = manifest["sources"]["raw/Denmark.json"]
+        assert recorded["mtime_ns"] == os.stat(sources[0]).st_mtime_ns, "Manifest should record the new mtime"
+        assert recorded["sha256"] == file_digest(sources[0])
+
+    def test_source_set_and_settings_change_invalidate(self, source_tree):
+        """Test that added files and different load settings miss."""
+        snapshot = DatasetSnapshot(source_tree)
+        sources = collect_source_paths(source_tree)
+        snapshot.save(self.make_frame(), sources, settings={"radius": {"high": 10000}})
+
+        assert snapshot.load(sources, settings={"radius": {"high": 12000}}) is None
+        assert snapshot.load(sources[:1], settings={"radius": {"high": 10000}}) is None
+        assert snapshot.load(sources, settings={"radius": {"high": 10000}}) is not None
+
+    def test_old_snapshots_removed(self, source_tree):
+        """Test that rebuilding leaves a single snapshot file behind."""
+        snapshot = DatasetSnapshot(source_tree)
+        sources = collect_source_paths(source_tree)
+        snapshot.save(self.make_frame(), sources)
+        with open(sources[1], 'a', encoding='utf-8') as f:
+            f.write("\n")
+        snapshot.save(self.make_frame(), sources)
+
+        arrow_files = [f for f in os.listdir(snapshot.cache_dir) if f.endswith('.arrow')]
+        assert len(arrow_files) == 1, "Stale snapshots should be cleaned up"
+
+
+class TestWorkbookCache:
+    """Test suite for the converted Excel sheet cache."""
+
+    @staticmethod
+    def write_workbook(path, likelihood=0.85):
+        with pd.ExcelWriter(path) as writer:
+            pd.DataFrame({
+                "Location": ["Sutton Hoo", "Mildenhall"],
+                "Coordinates (Approximate)": ["52.09, 1.34", "52.34, 0.51"],
+                "Likelihood (%)": [likelihood, 0.4],
+            }).to_excel(writer, sheet_name="England", index=False)
+            pd.DataFrame({
+                "Location": ["Cueva"],
+                "Coordinates (Approximate)": [None],
+                "Likelihood (%)": ["65%"],
+            }).to_excel(writer, sheet_name="Spain", index=False)
+
+    def test_sheets_served_from_cache(self):
+        """Test that an unchanged workbook is not parsed again and reads back identically."""
+        with tempfile.TemporaryDirectory() as base_dir:
+            excel_path = os.path.join(base_dir, "treasure.xlsx")
+            cache_dir = os.path.join(base_dir, "cache")
+            self.write_workbook(excel_path)
+
+            parsed = read_workbook_sheets(excel_path, cache_dir)
+            with patch('pandas.ExcelFile', side_effect=AssertionError("workbook parsed again")):
+                cached = read_workbook_sheets(excel_path, cache_dir)
+
+            assert [name for name, _ in cached] == ["England", "Spain"]
+            for (_, expected), (_, actual) in zip(parsed, cached):
+                pd.testing.assert_frame_equal(actual, expected)
+
+    def test_changed_workbook_replaces_entry(self):
+        """Test that a new workbook hash is parsed fresh and the old entry removed."""
+        with tempfile.TemporaryDirectory() as base_dir:
+            excel_path = os.path.join(base_dir, "treasure.xlsx")
+            cache_dir = os.path.join(base_dir, "cache")
+            self.write_workbook(excel_path)
+            read_workbook_sheets(excel_path, cache_dir)
+            old_entries = set(os.listdir(cache_dir))
+
+            # A second workbook whose name shares the prefix must be left alone
+            self.write_workbook(os.path.join(base_dir, "treasure-dev.xlsx"))
+            read_workbook_sheets(os.path.join(base_dir, "treasure-dev.xlsx"), cache_dir)
+
+            self.write_workbook(excel_path, likelihood=0.65)
+            sheets = dict(read_workbook_sheets(excel_path, cache_dir))
+            assert sheets["England"]["Likelihood (%)"].tolist() == [0.65, 0.4]
+
+            entries = set(os.listdir(cache_dir))
+            assert not old_entries & entries, "Entries for the old workbook should be removed"
+            assert sum(name.endswith('.json') for name in entries) == 2
+
+    def test_damaged_entry_ignored(self):
+        """Test that a corrupt sheet file is treated as a cache miss."""
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = WorkbookCache(cache_dir)
+            sheets = [("Wales", pd.DataFrame({"Location": ["Llyn Cerrig Bach"]}))]
+            assert cache.save("treasure.xlsx", "ab" * 32, sheets)
+            with open(os.path.join(cache_dir, f"treasure-{'ab' * 8}-0.arrow"), 'wb') as f:
+                f.write(b"not arrow")
+            assert cache.load("treasure.xlsx", "ab" * 32) is None
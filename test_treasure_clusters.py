@@ -0,0 +1,79 @@
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from treasure_clusters import ClusterIndex, mercator_cells
+from treasure_style import DEFAULT_COLOR, VALUE_COLORS
+
+TIERS = list(VALUE_COLORS)
+
+
+def brute_force_clusters(frame, zoom, cell_pixels=64):
+    """Cluster by grid cell with a plain groupby on the cell's x and y."""
+    side = 512 * 2 ** zoom // cell_pixels
+    lat = np.radians(frame["latitude"].to_numpy())
+    x = np.floor((frame["longitude"].to_numpy() + 180) / 360 * side)
+    y = np.floor((1 - np.log(np.tan(lat) + 1 / np.cos(lat)) / np.pi) / 2 * side)
+    rank = frame["Treasure Value"].map({tier: rank for rank, tier in enumerate(TIERS)}).fillna(len(TIERS))
+    grouped = frame.assign(x=x, y=y, rank=rank).groupby(["x", "y"])
+    return sorted(zip(grouped.size(), grouped["longitude"].mean().round(9), grouped["latitude"].mean().round(9),
+                      grouped["rank"].min()))
+
+
+class TestClusterIndex:
+    """Test suite for the zoom-level point clusters."""
+
+    def test_levels_match_brute_force(self, random_frame):
+        """Test counts, mean positions and top tiers of every level against a per-level groupby."""
+        frame = random_frame(5000)
+        index = ClusterIndex(frame, max_zoom=5)
+        for zoom in range(6):
+            level = index.level(zoom)
+            assert sorted(zip(level.counts, level.positions[:, 0].round(9), level.positions[:, 1].round(9),
+                              level.top_ranks)) == brute_force_clusters(frame, zoom)
+
+    def test_levels_nest(self, random_frame):
+        """Test that every cluster lies wholly inside one cluster of the level above."""
+        frame = random_frame(3000)
+        codes = mercator_cells(frame["longitude"].to_numpy(), frame["latitude"].to_numpy(), 10)
+        assert np.array_equal(codes >> np.uint64(2), mercator_cells(frame["longitude"].to_numpy(),
+                                                                    frame["latitude"].to_numpy(), 9))
+        index = ClusterIndex(frame, max_zoom=6)
+        counts = [index.level(zoom).counts for zoom in range(7)]
+        assert all(c.sum() == len(frame) for c in counts)
+        assert [len(c) for c in counts] == sorted(len(c) for c in counts)
+
+    def test_payload_bounded_by_zoom(self, random_frame):
+        """Test that a zoomed-out level has at most one cluster per cell however many points there are."""
+        for size in (1000, 200_000):
+            level = ClusterIndex(random_frame(size), max_zoom=4).level(2)
+            assert level.counts.sum() == size
+            assert len(level.counts) <= 32 * 32
+
+    def test_layer_data(self):
+        """Test labels, tier colors and the switch to points past max_zoom."""
+        frame = pd.DataFrame({
+            "Location": ["Hoard", "Chalice", "Wreck", "Lost"],
+            "Treasure Value": ["Low", "Priceless", "Medium", "High"],
+            "latitude": [55.0, 55.001, -33.0, np.nan],
+            "longitude": [9.0, 9.001, 151.0, 0.0],
+        })
+        index = ClusterIndex(frame, max_zoom=3)
+        data = index.layer_data(2, "Location").sort_values("count").reset_index(drop=True)
+        assert data["Location"].tolist() == ["Wreck", "2 treasures"]
+        assert data["count"].tolist() == [1, 2]
+        assert data["color"].tolist() == [DEFAULT_COLOR, VALUE_COLORS["Priceless"]]
+        assert data["position"][1] == [9.0005, 55.0005]
+        assert frame["Location"][data["id"][0]] == "Wreck"
+        assert index.layer_data(3.7, "Location") is not None
+        assert index.level(4) is None and index.layer_data(4, "Location") is None
+
+    def test_empty_and_invalid(self, random_frame):
+        """Test an empty frame and cell sizes that are not powers of two."""
+        index = ClusterIndex(random_frame(0))
+        assert len(index.layer_data(0, "Location")) == 0
+        with pytest.raises(ValueError):
+            ClusterIndex(random_frame(10), cell_pixels=48)
+        with pytest.raises(ValueError):
+            ClusterIndex(random_frame(10), max_zoom=30)
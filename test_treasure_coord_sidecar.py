@@ -0,0 +1,94 @@
+import pytest
+import json
+import os
+from unittest.mock import patch
+
+import pandas as pd
+
+import treasure_coords
+from treasure_cache import collect_source_paths
+from treasure_coord_sidecar import (DEFAULT_SIDECAR_PATH, apply_sidecar, compile_sidecar, is_fresh,
+                                    main, read_sidecar)
+from treasure_coords import COORDINATE_CACHE, parse_coordinates
+from treasure_ingest import assemble_sources, iter_sources
+
+
+RADIUS_CONFIG = {"high": 10000, "medium": 7000, "low": 4000}
+
+
+class TestCoordinateSidecar:
+    """Test suite for compiled coordinate sidecars."""
+
+    @pytest.fixture
+    def base_dir(self, base_dir, write_country):
+        raw_dir = os.path.join(base_dir, "raw")
+        write_country(raw_dir, "Denmark", coordinates=["55°43'N, 9°08'E", " 55°43'N, 9°08'E", "unknown"])
+        write_country(raw_dir, "Chile", coordinates=["-33.45, -70.66", "54° 16' 25\" N, 5° 40' 36\" W", None])
+        pd.DataFrame({
+            "Location": ["Workbook site"],
+            "Coordinates (Approximate)": ["55.2415° N, 6.5167° W"],
+            "Treasure Value": ["Medium"],
+            "Likelihood (%)": [0.7],
+        }).to_excel(os.path.join(base_dir, "treasure.xlsx"), sheet_name="Ireland", index=False)
+        yield base_dir
+        COORDINATE_CACHE.use_compiled({})
+        COORDINATE_CACHE.clear()
+
+    def test_compile(self, base_dir):
+        """Test that every distinct string from workbooks and raw/ is stored as parse_coordinates gives it."""
+        sidecar = compile_sidecar(base_dir)
+        assert sorted(sidecar["sources"]) == ["raw/Chile.json", "raw/Denmark.json", "treasure.xlsx"]
+        assert all(len(entry["sha256"]) == 64 for entry in sidecar["sources"].values())
+        assert sidecar["coordinates"] == {
+            "55°43'N, 9°08'E": list(parse_coordinates("55°43'N, 9°08'E")),
+            "unknown": None,
+            "-33.45, -70.66": [-33.45, -70.66],
+            "54° 16' 25\" N, 5° 40' 36\" W": list(parse_coordinates("54° 16' 25\" N, 5° 40' 36\" W")),
+            "55.2415° N, 6.5167° W": [55.2415, -6.5167],
+        }
+        assert read_sidecar(os.path.join(base_dir, DEFAULT_SIDECAR_PATH)) == sidecar
+
+    def test_fresh_sidecar_skips_parsing(self, base_dir):
+        """Test that loading with a fresh sidecar gives the same frame without running a parser."""
+        paths = collect_source_paths(base_dir)
+        expected, _ = assemble_sources(iter_sources(paths, RADIUS_CONFIG))
+        compile_sidecar(base_dir)
+        COORDINATE_CACHE.clear()
+
+        assert apply_sidecar(base_dir)
+        with patch.object(treasure_coords, 'parse_coordinates', side_effect=AssertionError("parsed")), \
+                patch.object(treasure_coords, 'parse_coordinate_series', side_effect=AssertionError("parsed")):
+            df, _ = assemble_sources(iter_sources(paths, RADIUS_CONFIG))
+        pd.testing.assert_frame_equal(df, expected)
+        assert COORDINATE_CACHE.stats()["misses"] == 0
+
+    def test_stale_after_edit(self, base_dir, write_country):
+        """Test that an edited source makes the sidecar stale and only its new strings get parsed."""
+        compile_sidecar(base_dir)
+        write_country(os.path.join(base_dir, "raw"), "Chile", coordinates=["-33.45, -70.66", "-20.5, -70.1", "x", "y"])
+        COORDINATE_CACHE.clear()
+
+        assert not apply_sidecar(base_dir)
+        assert not is_fresh(read_sidecar(os.path.join(base_dir, DEFAULT_SIDECAR_PATH)), base_dir)
+        list(iter_sources(collect_source_paths(base_dir), RADIUS_CONFIG))
+        assert COORDINATE_CACHE.stats()["misses"] == 3
+
+    def test_command(self, base_dir, capsys):
+        """Test that the command compiles once and then reports the sidecar as up to date."""
+        assert main(["--base-dir", base_dir]) == 0
+        assert "Compiled 5 coordinate strings from 3 files" in capsys.readouterr().out
+        assert main(["--base-dir", base_dir]) == 0
+        assert "up to date" in capsys.readouterr().out
+
+    def test_outdated_version_ignored(self, base_dir):
+        """Test that a sidecar from another parser version is not used."""
+        compile_sidecar(base_dir)
+        path = os.path.join(base_dir, DEFAULT_SIDECAR_PATH)
+        with open(path, 'r', encoding='utf-8') as f:
+            sidecar = json.load(f)
+        sidecar["version"] = -1
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(sidecar, f)
+        assert read_sidecar(path) is None
+        assert not apply_sidecar(base_dir)
+        assert COORDINATE_CACHE.stats()["compiled"] == 0
@@ -0,0 +1,226 @@
+import pytest
+import json
+import os
+import random
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+import treasure_coords
+import treasure_ingest
+from treasure_coords import (
+    MAX_COORDINATE_LENGTH, CoordinateCache, classify_coordinates, parse_coordinate_series, parse_coordinates,
+)
+from treasure_formats import list_raw_sources, read_records
+from treasure_ingest import normalize_batch, records_to_columns
+
+
+RADIUS_CONFIG = {"high": 10000, "medium": 7000, "low": 4000}
+
+TRICKY_VALUES = [
+    "55°43'N, 9°08'E",
+    "12°34'S, 56°07'W",
+    "55.2415° N, 6.5167° W",
+    "54° 16' 25\" N, 5° 40' 36\" W",
+    "54.32° N, 5.72° W",
+    "-33.45, -70.66",
+    "100, 50",            # swapped
+    "200, 200",           # out of range both ways, falls through
+    "12., 3",
+    "Near 55°43'N,9°08'E (approx)",
+    "55.2°\xa0N, 6.5° W",  # non-breaking space
+    "٣٤.5, 2",             # Arabic-Indic digits
+    "1\x0b2",
+    "12345678901234567°1'N, 1°1'E",
+    "0°0'S, 0°0'W",
+    "unknown",
+    "",
+    None,
+    float('nan'),
+    12.5,
+]
+
+
+def repo_coordinates():
+    """Every coordinate string in the bundled raw/ files."""
+    raw_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "raw")
+    values = []
+    for path in list_raw_sources(raw_dir):
+        _, records = read_records(path)
+        values.extend(record.get("Coordinates (Approximate)") for record in records)
+    return values
+
+
+def assert_same_as_scalar(values):
+    latitudes, longitudes = parse_coordinate_series(pd.Series(values, dtype=object))
+    for value, lat, lon in zip(values, latitudes, longitudes):
+        expected_lat, expected_lon = parse_coordinates(value)
+        if expected_lat is None:
+            assert np.isnan(lat) and np.isnan(lon), f"{value!r} should not parse"
+        else:
+            assert (lat, lon) == (expected_lat, expected_lon), f"{value!r} parsed differently"
+            assert np.signbit(lat) == np.signbit(expected_lat) and np.signbit(lon) == np.signbit(expected_lon)
+
+
+class TestCoordinateSeriesParser:
+    """Test suite for column-at-a-time coordinate parsing."""
+
+    def test_identical_on_repo_data(self):
+        """Test that every bundled coordinate parses exactly as the scalar parser does."""
+        values = repo_coordinates()
+        assert len(values) > 300
+        assert_same_as_scalar(values)
+
+    def test_identical_on_tricky_values(self):
+        """Test format precedence, swaps, fall-through and the scalar-only rows."""
+        assert_same_as_scalar(TRICKY_VALUES)
+
+    def test_keeps_index_order(self):
+        """Test that results follow position, not the series index."""
+        series = pd.Series(["1.5, 2.5", "bad", "3.5, 4.5"], index=[10, 5, 7], dtype=object)
+        latitudes, _ = parse_coordinate_series(series)
+        assert latitudes[0] == 1.5 and np.isnan(latitudes[1]) and latitudes[2] == 3.5
+
+    def test_empty(self):
+        """Test that an empty column gives empty arrays."""
+        latitudes, longitudes = parse_coordinate_series(pd.Series([], dtype=object))
+        assert len(latitudes) == 0 and len(longitudes) == 0
+
+    def test_large_batches_parse_by_column(self, monkeypatch):
+        """Test that normalize_batch gives the same batch on both parsing paths."""
+        records = [{"Coordinates (Approximate)": value, "Likelihood (%)": 70} for value in TRICKY_VALUES]
+        expected = normalize_batch(records_to_columns(records), "Test", RADIUS_CONFIG)
+
+        monkeypatch.setattr(treasure_ingest, "COLUMN_PARSE_MIN_ROWS", 1)
+        batch = normalize_batch(records_to_columns(records), "Test", RADIUS_CONFIG)
+        assert json.dumps(batch, default=str) == json.dumps(expected, default=str)
+
+
+class TestSingleDispatchParser:
+    """Test suite for the sniffing scalar parser."""
+
+    @pytest.mark.parametrize("value, expected", [
+        ("55.6761, 12.5683", (55.6761, 12.5683)),
+        ("53°21'N, 4°14'W", (53 + 21 / 60, -(4 + 14 / 60))),
+        ("55.2415° N, 6.5167° W", (55.2415, -6.5167)),
+        ("54° 16' 25\" N, 5° 40' 36\" W", (54 + 16 / 60 + 25 / 3600, -(5 + 40 / 60 + 36 / 3600))),
+        ("54.32° S, 5.72° E", (-54.32, 5.72)),
+        ("12., 3", (12.0, 3.0)),
+        ("Somewhere near the old mill", (None, None)),
+    ])
+    def test_each_format(self, value, expected):
+        """Test that every format parses through its own grammar."""
+        assert parse_coordinates(value) == expected
+
+    def test_precedence_kept(self):
+        """Test that a decimal pair anywhere still wins over an earlier degree format."""
+        assert parse_coordinates("40°N 3°W, ref 12, 13") == (12.0, 13.0)
+        # Out of range both ways, so the degree format decides
+        assert parse_coordinates("40.5°N, 3.5°W 200, 200") == (40.5, -3.5)
+
+    def test_fuzz_matches_column_parser(self):
+        """Test that sniffing never skips a grammar the column parser, which tries them all, would match."""
+        rng = random.Random(12)
+        tokens = ["1", "12", "12.5", "-3", "°", "° ", "'", "'N", "\"", "N", "S", "E", "W",
+                  ",", " ", "\t", "\xa0", "95", "200", "0.", ".", "x"]
+        values = ["".join(rng.choice(tokens) for _ in range(rng.randint(0, 14))) for _ in range(5000)]
+        assert_same_as_scalar(values)
+
+
+class TestBoundedParsing:
+    """Test suite for the length limit and worst-case parse time."""
+
+    def test_long_values_rejected(self):
+        """Test that values over the limit fail in both parsers, measured without surrounding whitespace."""
+        padded = " " * (MAX_COORDINATE_LENGTH + 10) + "1, 2"
+        too_long = "x" * MAX_COORDINATE_LENGTH + " 1, 2"
+        assert parse_coordinates(padded) == (1.0, 2.0)
+        assert parse_coordinates(too_long) == (None, None)
+        assert classify_coordinates(too_long) == (None, False)
+        assert_same_as_scalar([padded, too_long, "x" * (MAX_COORDINATE_LENGTH - 5) + " 1, 2", None])
+
+    def test_limit_can_be_lifted(self, monkeypatch):
+        """Test that a limit of None parses values of any length."""
+        monkeypatch.setattr(treasure_coords, "MAX_COORDINATE_LENGTH", None)
+        value = "x" * 10 * MAX_COORDINATE_LENGTH + " 1, 2"
+        assert parse_coordinates(value) == (1.0, 2.0)
+        assert_same_as_scalar([value])
+
+    @pytest.mark.parametrize("value", [
+        "1" * 100_000,
+        "1" * 100_000 + "°N E",
+        "1." * 50_000,
+        "1°1'" * 25_000,
+        "1° 1' " * 16_000 + "1\" N,",
+    ])
+    def test_pathological_input_is_linear(self, value, monkeypatch):
+        """Test that inputs that used to take cubic time parse quickly even with no limit."""
+        monkeypatch.setattr(treasure_coords, "MAX_COORDINATE_LENGTH", None)
+        start = time.perf_counter()
+        assert parse_coordinates(value) == (None, None)
+        # About 20ms here; a 400-digit run alone used to take half a second
+        assert time.perf_counter() - start < 1.0
+
+
+class TestCoordinateCache:
+    """Test suite for the bounded coordinate memo."""
+
+    def test_hits_misses_and_normalized_keys(self):
+        """Test that repeats, including whitespace variants, are served from the cache."""
+        cache = CoordinateCache(maxsize=10)
+        assert cache.parse("55°43'N, 9°08'E") == parse_coordinates("55°43'N, 9°08'E")
+        assert cache.parse("  55°43'N, 9°08'E ") == parse_coordinates("55°43'N, 9°08'E")
+        assert cache.parse("unknown") == (None, None)
+        assert cache.parse("unknown") == (None, None)
+        assert cache.parse(None) == (None, None)
+        assert cache.parse(float('nan')) == (None, None)
+        assert cache.stats() == {"hits": 2, "misses": 2, "evictions": 0, "size": 2, "maxsize": 10, "compiled": 0}
+
+    def test_bounded_lru(self):
+        """Test that the least recently used entry is evicted at the bound."""
+        cache = CoordinateCache(maxsize=2)
+        cache.parse("1, 1")
+        cache.parse("2, 2")
+        cache.parse("1, 1")
+        cache.parse("3, 3")
+        assert cache.stats()["evictions"] == 1
+        cache.parse("1, 1")
+        assert cache.stats()["hits"] == 2, "The recently used entry should survive"
+        cache.parse("2, 2")
+        assert cache.stats()["misses"] == 4
+        cache.clear()
+        assert cache.stats() == {"hits": 0, "misses": 0, "evictions": 0, "size": 0, "maxsize": 2, "compiled": 0}
+
+    def test_parse_many_matches_column_parser(self):
+        """Test that a cached column parse is identical to parse_coordinate_series, cold and warm."""
+        values = TRICKY_VALUES * 3 + ["  " + value for value in TRICKY_VALUES if isinstance(value, str)]
+        expected = parse_coordinate_series(pd.Series(values, dtype=object))
+        cache = CoordinateCache()
+        for _ in range(2):
+            latitudes, longitudes = cache.parse_many(values)
+            np.testing.assert_array_equal(latitudes, expected[0])
+            np.testing.assert_array_equal(longitudes, expected[1])
+        stats = cache.stats()
+        assert stats["misses"] == stats["size"] == len({v.strip() for v in TRICKY_VALUES if isinstance(v, str)} | {"12.5"})
+
+    def test_shared_between_threads(self):
+        """Test that concurrent callers get correct results and every call is counted once."""
+        cache = CoordinateCache(maxsize=50)
+        values = [f"{i % 80}.5, {i % 70}.25" for i in range(400)]
+        errors = []
+
+        def worker():
+            for value in values:
+                if cache.parse(value) != parse_coordinates(value):
+                    errors.append(value)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = cache.stats()
+        assert not errors
+        assert stats["hits"] + stats["misses"] == 8 * len(values)
+        assert stats["size"] <= 50
@@ -0,0 +1,134 @@
+import pytest
+import json
+import threading
+
+import pandas as pd
+import pydeck as pdk
+
+from treasure_deck import LayerJsonCache, SplicedDeck, serialize_layer
+from treasure_style import MapStyle
+
+
+@pytest.fixture
+def style():
+    frame = pd.DataFrame({
+        "Location": ["Hoard", "Wreck", "Chalice"],
+        "Treasure Value": ["High", "Priceless", None],
+        "latitude": [55.0, 56.0, 53.0],
+        "longitude": [9.0, 10.0, -7.0],
+        "radius": [10000, 7000, 4000],
+    })
+    return MapStyle(frame, "Location")
+
+
+def point_layer(data, layer_id, **kwargs):
+    return pdk.Layer("ScatterplotLayer", data=data, id=layer_id, get_position=["longitude", "latitude"],
+                     get_color="color", get_radius="radius", **kwargs)
+
+
+class TestSplicedDeck:
+    """Test suite for decks built around a pre-serialized base layer."""
+
+    def test_same_spec_as_deck(self, style):
+        """Test that splicing gives the spec pydeck would write for the same layers."""
+        base = point_layer(style.data, "treasures", pickable=True)
+        overlay = point_layer(style.selected("Wreck"), "selection")
+        settings = dict(initial_view_state=pdk.ViewState(latitude=55, longitude=9, zoom=4),
+                        map_style="road", tooltip={"html": "<b>{Location}</b>"}, height=600)
+
+        expected = json.loads(pdk.Deck(layers=[base, overlay], **settings).to_json())
+        spliced = SplicedDeck([serialize_layer(base)], layers=[overlay], **settings)
+        assert json.loads(spliced.to_json()) == expected
+        # Serializing again gives the same spec, with the cached layer still attached
+        assert json.loads(spliced.to_json()) == expected
+        assert spliced.static_layers == [serialize_layer(base)]
+        assert [layer["id"] for layer in expected["layers"]] == ["treasures", "selection"]
+
+    def test_static_layers_only(self, style):
+        """Test a deck with no per-rerun layers."""
+        base_json = serialize_layer(point_layer(style.data, "treasures"))
+        spec = json.loads(SplicedDeck([base_json], map_style="road").to_json())
+        assert len(spec["layers"]) == 1 and len(spec["layers"][0]["data"]) == 3
+        assert spec["layers"][0]["data"][1]["color"] == [255, 215, 0, 200]
+
+    def test_static_json_not_reencoded(self, style):
+        """Test that the cached layer JSON is copied into the spec byte for byte."""
+        base_json = serialize_layer(point_layer(style.data, "treasures"))
+        assert base_json in SplicedDeck([base_json], layers=[point_layer(style.selected(None), "selection")]).to_json()
+
+
+class TestLayerJsonCache:
+    """Test suite for the shared cache of serialized layers."""
+
+    def build_counter(self, style, builds, name=None):
+        def build():
+            builds.append(name)
+            return point_layer(style.data if name is None else style.selected(name), "treasures", pickable=True)
+        return build
+
+    def test_hit_returns_built_json(self, style):
+        """Test that a hit hands out the JSON of the first build without building again."""
+        cache = LayerJsonCache(maxsize=4)
+        builds = []
+        first = cache.get(("Denmark",), self.build_counter(style, builds))
+        second = cache.get(("Denmark",), self.build_counter(style, builds))
+        assert builds == [None] and second is first
+        assert first == serialize_layer(self.build_counter(style, [])())
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["hit_rate"], stats["size"]) == (1, 1, 0.5, 1)
+        assert stats["bytes"] == len(first.encode())
+
+    def test_spliced_with_overlay(self, style):
+        """Test that a cached layer spliced with a selection overlay gives pydeck's own spec."""
+        cache = LayerJsonCache()
+        overlay = point_layer(style.selected("Wreck"), "selection")
+        settings = dict(initial_view_state=pdk.ViewState(latitude=55, longitude=9, zoom=4), map_style="road")
+        deck = SplicedDeck([cache.get("all", self.build_counter(style, []))], layers=[overlay], **settings)
+        expected = pdk.Deck(layers=[self.build_counter(style, [])(), overlay], **settings)
+        assert json.loads(deck.to_json()) == json.loads(expected.to_json())
+
+    def test_count_and_byte_limits(self, style):
+        """Test eviction of the least recently used layer by count, by bytes, and oversized layers."""
+        cache = LayerJsonCache(maxsize=2)
+        builds = []
+        for name in ("Hoard", "Wreck", "Hoard", "Chalice", "Wreck"):
+            layer = json.loads(cache.get(name, self.build_counter(style, builds, name)))
+            assert layer["data"][0]["Location"] == name
+        assert builds == ["Hoard", "Wreck", "Chalice", "Wreck"]
+        assert cache.stats()["evictions"] == 2 and cache.stats()["size"] == 2
+
+        size = len(cache.get("Hoard", self.build_counter(style, [], "Hoard")))
+        cache = LayerJsonCache(maxsize=10, max_bytes=2 * size + 10)
+        for name in ("Hoard", "Wreck", "Chalice"):
+            cache.get(name, self.build_counter(style, [], name))
+        stats = cache.stats()
+        assert stats["size"] == 2 and stats["evictions"] == 1 and stats["bytes"] <= stats["max_bytes"]
+
+        cache = LayerJsonCache(max_bytes=10)
+        builds = []
+        cache.get("all", self.build_counter(style, builds))
+        cache.get("all", self.build_counter(style, builds))
+        assert builds == [None, None] and cache.stats()["size"] == 0
+        cache.clear()
+        assert cache.stats()["bytes"] == 0 and cache.stats()["hit_rate"] == 0.0
+
+    def test_shared_between_threads(self, style):
+        """Test concurrent lookups of a few keys stay within the bound and agree with their builds."""
+        cache = LayerJsonCache(maxsize=3)
+        names = ("Hoard", "Wreck", "Chalice")
+        expected = {name: serialize_layer(self.build_counter(style, [], name)()) for name in names}
+        errors = []
+
+        def look_up():
+            for name in list(expected) * 20:
+                if cache.get(name, self.build_counter(style, [], name)) != expected[name]:
+                    errors.append(name)
+
+        threads = [threading.Thread(target=look_up) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = cache.stats()
+        assert not errors and stats["size"] == 3 and stats["hits"] + stats["misses"] == 240
+        assert stats["bytes"] == sum(len(layer) for layer in expected.values())
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+from treasure_density import DENSITY_COLORS, DensityIndex, likelihood_weights
+
+
+def mercator_pixels(longitudes, latitudes, zoom):
+    world = 512 * 2 ** zoom
+    lat = np.radians(latitudes)
+    return np.column_stack([(np.asarray(longitudes) + 180) / 360 * world,
+                            (1 - np.log(np.tan(lat) + 1 / np.cos(lat)) / np.pi) / 2 * world])
+
+
+class TestDensityIndex:
+    """Test suite for the precomputed hexagon density bins."""
+
+    def test_points_land_in_nearest_hexagon(self, random_frame):
+        """Test that each bin holds exactly the points whose nearest hexagon center it is."""
+        frame = random_frame(400)
+        index = DensityIndex(frame, max_zoom=3)
+        for zoom in range(4):
+            level = index.level(zoom)
+            points = mercator_pixels(frame["longitude"], frame["latitude"], zoom)
+            centers = mercator_pixels(level.positions[:, 0], level.positions[:, 1], zoom)
+            nearest = np.argmin(((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2), axis=1)
+            assert np.array_equal(np.bincount(nearest, minlength=len(centers)), level.counts)
+            weights = np.bincount(nearest, weights=frame["Likelihood (%)"] / 100, minlength=len(centers))
+            assert np.allclose(weights, level.weights)
+
+    def test_likelihood_scales(self):
+        """Test that percentages and percent strings weigh the same, down to a likelihood of 1%."""
+        assert likelihood_weights(pd.Series([85.0, 1.0, 0.5, np.nan])).tolist() == [0.85, 0.01, 0.005, 0.0]
+        assert likelihood_weights(pd.Series(["85%", 85, "1%", "n/a", None], dtype=object)).tolist() == \
+            [0.85, 0.85, 0.01, 0.0, 0.0]
+        assert likelihood_weights(pd.Series([85, None, 1], dtype="Int8")).tolist() == [0.85, 0.0, 0.01]
+
+    def test_bins_bounded_by_screen(self, random_frame):
+        """Test that a zoomed-out level has as many bins for 200k points as the screen has hexagons."""
+        world = 512 * 2 ** 2
+        hexagon_area = 3 * np.sqrt(3) / 2 * (32 / np.sqrt(3)) ** 2
+        for size in (1000, 200_000):
+            level = DensityIndex(random_frame(size), max_zoom=2).level(2)
+            assert level.counts.sum() == size
+            assert len(level.counts) < world * world / hexagon_area * 1.1
+
+    def test_layer_data(self, random_frame):
+        """Test the bin columns, outlines, masking and the reuse of the last level."""
+        frame = random_frame(300)
+        index = DensityIndex(frame, max_zoom=2)
+        data = index.layer_data(1, "Location")
+        assert list(data.columns) == ["position", "count", "weight", "color", "Location", "polygon"]
+        assert data["count"].sum() == 300
+        assert data["Location"][0] == f"{data['count'][0]} treasures"
+        assert all(len(ring) == 7 and ring[0] == ring[-1] for ring in data["polygon"])
+        assert tuple(data.loc[data["count"].idxmax(), "color"]) == tuple(DENSITY_COLORS[-1])
+
+        mask = data["count"].to_numpy() > 1
+        masked = index.layer_data(1, "Location", mask, outlines=False)
+        assert "polygon" not in masked.columns and len(masked) == mask.sum()
+        assert index.level(9) is index.level(2)
+
+    def test_empty(self, random_frame):
+        """Test a frame with no points and one without likelihoods."""
+        assert len(DensityIndex(random_frame(0)).layer_data(3, "Location")) == 0
+        level = DensityIndex(random_frame(10).drop(columns="Likelihood (%)"), max_zoom=1).level(0)
+        assert level.counts.sum() == 10 and level.weights.sum() == 0
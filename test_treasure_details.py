@@ -0,0 +1,70 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from treasure_details import DetailStore
+from treasure_style import MapStyle
+
+
+def treasure_frame(size=6):
+    return pd.DataFrame({
+        "Location": [f"Site {i}" for i in range(size)],
+        "Area": ["Denmark", "Chile"] * (size // 2),
+        "Treasure Value": ["High", "Low"] * (size // 2),
+        "Likelihood (%)": np.linspace(10, 90, size),
+        "latitude": np.linspace(-40, 56, size),
+        "longitude": np.linspace(-70, 12, size),
+        "radius": [4000] * size,
+    })
+
+
+class TestDetailStore:
+    """Test suite for the server-side detail records behind map point ids."""
+
+    def test_resolves_transported_ids(self):
+        """Test that every id a lazy map point carries resolves to its own row."""
+        frame = treasure_frame().iloc[::-1]
+        style = MapStyle(frame, "Location", transport_columns=[])
+        assert list(style.data.columns) == ["position", "color", "radius", "id"]
+        store = DetailStore(frame)
+        for row_id, expected in zip(style.data["id"], frame.to_dict("records")):
+            assert store.get(row_id) == expected
+        assert store.get(np.int64(0))["Location"] == "Site 5"
+
+    def test_unknown_ids(self):
+        """Test that ids outside the frame, and ids that are not numbers, give None."""
+        store = DetailStore(treasure_frame())
+        assert [store.get(row_id) for row_id in (-1, 6, None, "Site 1")] == [None] * 4
+        assert store.stats()["misses"] == 0
+
+    def test_columns_and_lru(self):
+        """Test column selection, cache hits and eviction of the least recently used record."""
+        store = DetailStore(treasure_frame(), columns=["Location", "Area", "Missing"], maxsize=2)
+        assert store.get(1) == {"Location": "Site 1", "Area": "Chile"}
+        store.get(2)
+        assert store.get(1) is store.get(1)
+        store.get(3)  # evicts 2
+        store.get(2)
+        assert store.stats() == {"hits": 2, "misses": 4, "evictions": 2, "size": 2, "maxsize": 2}
+        store.clear()
+        assert store.stats()["size"] == 0 and store.stats()["hits"] == 0
+
+    def test_shared_between_threads(self):
+        """Test concurrent lookups stay within the bound and agree with the frame."""
+        frame = treasure_frame(200)
+        store = DetailStore(frame, maxsize=50)
+        errors = []
+
+        def look_up(offset):
+            for row in range(offset, 200, 3):
+                if store.get(row)["Location"] != f"Site {row}":
+                    errors.append(row)
+
+        threads = [threading.Thread(target=look_up, args=(offset,)) for offset in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors
+        assert store.stats()["size"] <= 50
@@ -0,0 +1,191 @@
+import pytest
+import csv
+import io
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+import treasure_formats
+from treasure_formats import (
+    FORMAT_REGISTRY,
+    FormatAdapter,
+    iter_json_records,
+    list_raw_sources,
+    parse_records,
+    read_records,
+    register_format,
+)
+from treasure_ingest import load_record_file
+
+
+RADIUS_CONFIG = {"high": 10000, "medium": 7000, "low": 4000}
+
+RECORD = {
+    "Location": "Vindelev, Central Jutland",
+    "Coordinates (Approximate)": "55°43'N, 9°08'E",
+    "Treasure Value": "Exceptional",
+    "Likelihood (%)": 95,
+}
+
+
+class CsvFormat(FormatAdapter):
+    """Minimal CSV adapter used to prove new formats plug in."""
+
+    name = "csv"
+    extensions = ('.csv',)
+
+    @staticmethod
+    def decode(raw):
+        text = raw.decode('utf-8') if isinstance(raw, bytes) else raw
+        return list(csv.DictReader(io.StringIO(text)))
+
+    def sniff(self, document):
+        return True
+
+    def records(self, document):
+        return document
+
+
+class TestFormatRegistry:
+    """Test suite for single-read format detection of raw/ country files."""
+
+    @pytest.fixture
+    def restore_registry(self):
+        saved = list(FORMAT_REGISTRY)
+        yield
+        FORMAT_REGISTRY[:] = saved
+
+    def test_array_format(self):
+        """Test that a direct array (Spain.json style) is recognised."""
+        name, records = parse_records(json.dumps([RECORD]).encode('utf-8'), '.json')
+        assert name == "json-array"
+        assert records == [RECORD]
+
+    def test_tables_format(self):
+        """Test that the tables[0].data wrapper (Italy.json style) is recognised."""
+        document = {"extraction_time": "2024", "tables": [{"table_index": 0, "data": [RECORD]}]}
+        name, records = parse_records(json.dumps(document).encode('utf-8'), '.json')
+        assert name == "json-tables"
+        assert records == [RECORD]
+
+    @pytest.mark.parametrize("content", ['{"not_tables": 1}', '"just a string"', '[1, 2]'])
+    def test_unrecognised_documents_rejected(self, content):
+        """Test that documents no adapter accepts raise instead of loading garbage."""
+        with pytest.raises(ValueError):
+            parse_records(content.encode('utf-8'), '.json')
+
+    def test_file_read_and_decoded_once(self):
+        """Test that sniffing several adapters decodes the bytes only once."""
+        calls = []
+        real_decode = treasure_formats.decode_json
+
+        def counting_decode(raw):
+            calls.append(raw)
+            return real_decode(raw)
+
+        with tempfile.TemporaryDirectory() as raw_dir:
+            path = os.path.join(raw_dir, "Spain.json")
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump([RECORD], f)
+
+            with patch.object(treasure_formats.TablesJsonFormat, 'decode', staticmethod(counting_decode)), \
+                    patch.object(treasure_formats.ArrayJsonFormat, 'decode', staticmethod(counting_decode)):
+                name, _ = read_records(path)
+
+        assert name == "json-array"
+        assert len(calls) == 1, "Both JSON adapters should share one decode"
+
+    def test_registered_format_loads_without_loader_changes(self, restore_registry):
+        """Test that a registered CSV adapter is listed and loaded like JSON files."""
+        register_format(CsvFormat())
+        with tempfile.TemporaryDirectory() as raw_dir:
+            with open(os.path.join(raw_dir, "Denmark.csv"), 'w', encoding='utf-8', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=list(RECORD))
+                writer.writeheader()
+                writer.writerow(RECORD)
+            with open(os.path.join(raw_dir, "Spain.json"), 'w', encoding='utf-8') as f:
+                json.dump([RECORD], f)
+            with open(os.path.join(raw_dir, "notes.txt"), 'w', encoding='utf-8') as f:
+                f.write("ignored")
+
+            paths = list_raw_sources(raw_dir)
+            assert [os.path.basename(p) for p in paths] == ["Denmark.csv", "Spain.json"]
+
+            batch = load_record_file(paths[0], RADIUS_CONFIG)
+            assert batch["Area"] == ["Denmark"]
+            assert batch["radius"] == [10000], "CSV likelihood strings read as percentages"
+
+
+    def test_incomplete_adapters_rejected(self, restore_registry):
+        """Test that adapters missing a step, or not adapters at all, fail before any file is read."""
+        class NoRecords(FormatAdapter):
+            name = "no-records"
+            extensions = ('.txt',)
+            decode = staticmethod(treasure_formats.decode_json)
+
+            def sniff(self, document):
+                return True
+
+        class NoExtensions(CsvFormat):
+            extensions = ()
+
+        with pytest.raises(TypeError, match="records"):
+            NoRecords()
+        with pytest.raises(TypeError):
+            register_format(object())
+        with pytest.raises(ValueError):
+            register_format(NoExtensions())
+        assert FORMAT_REGISTRY[-1].name == "json-array"
+
+
+class TestStreamingJsonReader:
+    """Test suite for the incremental JSON record reader."""
+
+    def write(self, directory, content):
+        path = os.path.join(directory, "Country.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 64 * 1024])
+    @pytest.mark.parametrize("wrapped", [False, True])
+    def test_matches_whole_file_read(self, chunk_size, wrapped):
+        """Test that streaming yields exactly what the whole-file read returns."""
+        records = [dict(RECORD, Location=f"Site {i}", **{"Likelihood (%)": 12345 + i,
+                                                          "Supporting Evidence URLs": [f"https://e/{i}"]})
+                   for i in range(20)]
+        document = {"meta": {"tables": 0}, "tables": [{"data": records}, {"data": [RECORD]}]} if wrapped else records
+        with tempfile.TemporaryDirectory() as directory:
+            path = self.write(directory, json.dumps(document, indent=1, ensure_ascii=False))
+            assert list(iter_json_records(path, chunk_size=chunk_size)) == read_records(path)[1]
+
+    @pytest.mark.parametrize("content", ['', '"text"', '{"other": []}', '[1, 2]', '[{"a": 1} {"b": 2}]', '[{"a": 1},'])
+    def test_malformed_files_rejected(self, content):
+        """Test that files no treasure format accepts raise ValueError."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = self.write(directory, content)
+            with pytest.raises(ValueError):
+                list(iter_json_records(path, chunk_size=4))
+
+    @pytest.mark.parametrize("content", ['[{"a": "' + 'x' * 5000, '[{"a": 1, "b": [' + '1, ' * 2000 + '}]'])
+    def test_unterminated_value_fails_within_cap(self, content):
+        """Test that a value still open past max_value_size raises without reading the whole file."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = self.write(directory, content + ' ' * 200_000)
+            with pytest.raises(ValueError, match="malformed or truncated"):
+                list(iter_json_records(path, chunk_size=64, max_value_size=1024))
+            # Under the default cap the same files still fail, as a decode error
+            with pytest.raises(ValueError):
+                list(iter_json_records(path, chunk_size=64))
+
+    def test_records_yielded_lazily(self):
+        """Test that the first record arrives before the file is read through."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = self.write(directory, json.dumps([RECORD] * 5000))
+            stream = iter_json_records(path, chunk_size=1024)
+            assert next(stream) == RECORD
+            with open(path, 'rb') as f:
+                size = len(f.read())
+            assert size > 100 * 1024
+            stream.close()
@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from treasure_formats import list_raw_sources
+from treasure_geo import COUNTRY_BOUNDARIES, country_bbox, out_of_bounds, out_of_bounds_rows
+from treasure_security import TreasureDataValidator
+
+
+def scalar_out_of_bounds(area, lat, lon, boundaries):
+    bounds = boundaries.get(area) if isinstance(area, str) else None
+    if np.isnan(lat) or np.isnan(lon):
+        return True
+    if bounds is None:
+        return False
+    if bounds['lon_min'] <= bounds['lon_max']:
+        inside_lon = bounds['lon_min'] <= lon <= bounds['lon_max']
+    else:
+        inside_lon = lon >= bounds['lon_min'] or lon <= bounds['lon_max']
+    return not (bounds['lat_min'] <= lat <= bounds['lat_max'] and inside_lon)
+
+
+class TestCountryBounds:
+    """Test suite for the country bounding-box registry and the batch bounds check."""
+
+    def test_every_country_file_has_a_box(self):
+        """Test that the registry covers every bundled raw/ country."""
+        raw_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "raw")
+        countries = [os.path.splitext(os.path.basename(path))[0] for path in list_raw_sources(raw_dir)]
+        assert countries
+        assert [c for c in countries if c not in COUNTRY_BOUNDARIES] == []
+        for bounds in COUNTRY_BOUNDARIES.values():
+            assert -90 <= bounds['lat_min'] < bounds['lat_max'] <= 90
+
+    def test_flags_rows_outside_their_area(self):
+        """Test in-box, out-of-box, unknown-area, missing-area and missing-coordinate rows."""
+        mask = out_of_bounds(
+            ["Denmark", "Denmark", "Atlantis", None, "Chile", "Denmark"],
+            [55.7, 40.0, 10.0, 10.0, -33.4, np.nan],
+            [12.6, 12.6, 10.0, 10.0, -70.6, 12.6],
+        )
+        assert mask.tolist() == [False, True, False, False, False, True]
+
+    def test_antimeridian_box(self):
+        """Test that a box with lon_min > lon_max wraps across 180 degrees."""
+        boundaries = {"Fiji": {'lat_min': -21.0, 'lat_max': -12.0, 'lon_min': 176.0, 'lon_max': -178.0}}
+        mask = out_of_bounds(["Fiji"] * 4, [-17.0] * 4, [178.0, -179.5, 0.0, 170.0], boundaries)
+        assert mask.tolist() == [False, False, True, True]
+        assert country_bbox("Fiji", boundaries) == [-21.0, 176.0, -12.0, -178.0]
+        assert country_bbox("Atlantis") is None
+
+    def test_large_frame_matches_scalar_check(self):
+        """Test a 100k-row frame, object and categorical Area, against a per-row check."""
+        rng = np.random.default_rng(16)
+        areas = rng.choice(list(COUNTRY_BOUNDARIES) + ["Atlantis"], 100_000)
+        df = pd.DataFrame({"Area": areas, "latitude": rng.uniform(-90, 90, len(areas)),
+                           "longitude": rng.uniform(-180, 180, len(areas))})
+        expected = [scalar_out_of_bounds(a, lat, lon, COUNTRY_BOUNDARIES)
+                    for a, lat, lon in zip(df["Area"], df["latitude"], df["longitude"])]
+        mask = out_of_bounds(df["Area"], df["latitude"], df["longitude"])
+        assert mask.tolist() == expected
+        categorical = out_of_bounds(df["Area"].astype("category"), df["latitude"].astype("float32"),
+                                    df["longitude"].astype("float32"))
+        # float32 rounding can only move points lying right on an edge
+        assert (categorical != mask).sum() < 10
+        assert len(out_of_bounds_rows(df)) == sum(expected)
+
+    def test_validator_uses_registry(self):
+        """Test that single-point validation checks the requested country's box."""
+        assert TreasureDataValidator.validate_coordinates("55.6761, 12.5683")[0]
+        is_valid, _, _, message = TreasureDataValidator.validate_coordinates("-33.45, -70.66")
+        assert not is_valid and message == "Latitude -33.45 outside Denmark bounds"
+        assert TreasureDataValidator.validate_coordinates("-33.45, -70.66", country="Chile")[0]
+        is_valid, _, _, message = TreasureDataValidator.validate_coordinates("-33.45, 70.66", country="Chile")
+        assert not is_valid and message == "Longitude 70.66 outside Chile bounds"
+
+        df = pd.DataFrame({"Area": ["Denmark", "Chile"], "latitude": [55.7, 40.0], "longitude": [12.6, -70.6]})
+        assert TreasureDataValidator.find_out_of_bounds(df).index.tolist() == [1]
@@ -0,0 +1,179 @@
+import pytest
+import json
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+import treasure_ingest
+from treasure_ingest import (
+    assemble_frame,
+    iter_json_batches,
+    iter_streamed_batches,
+    load_record_file,
+    load_source,
+    likelihood_radius,
+    merge_streamed_batches,
+    normalize_batch,
+    records_to_columns,
+)
+
+
+RADIUS_CONFIG = {"high": 10000, "medium": 7000, "low": 4000}
+
+
+def make_record(location, coords, likelihood, **extra):
+    record = {
+        "Location": location,
+        "Coordinates (Approximate)": coords,
+        "Treasure Value": "High",
+        "Likelihood (%)": likelihood,
+    }
+    record.update(extra)
+    return record
+
+
+class TestRecordBatchPipeline:
+    """Test suite for the collect-then-assemble ingest pipeline."""
+
+    def test_likelihood_radius_scales(self):
+        """Test percentage, fraction and string likelihood values."""
+        assert likelihood_radius(85, RADIUS_CONFIG) == 10000
+        assert likelihood_radius(65, RADIUS_CONFIG) == 7000
+        assert likelihood_radius(0.85, RADIUS_CONFIG) == 4000, "JSON numbers are percentages"
+        assert likelihood_radius(0.8, RADIUS_CONFIG, fraction_scale=True) == 10000
+        assert likelihood_radius(0.6, RADIUS_CONFIG, fraction_scale=True) == 7000
+        assert likelihood_radius("65%", RADIUS_CONFIG, fraction_scale=True) == 7000
+        assert likelihood_radius(float('nan'), RADIUS_CONFIG) == 4000
+
+    def test_records_to_columns_fills_gaps(self):
+        """Test that keys missing from some records become NaN."""
+        columns = records_to_columns([{"a": 1}, {"a": 2, "b": "x"}, {"b": "y"}])
+        assert list(columns) == ["a", "b"]
+        assert columns["a"][:2] == [1, 2] and np.isnan(columns["a"][2])
+        assert np.isnan(columns["b"][0]) and columns["b"][1:] == ["x", "y"]
+
+    def test_normalize_batch_drops_unparseable_rows(self):
+        """Test that rows without coordinates are dropped and derived columns added."""
+        columns = records_to_columns([
+            make_record("Vindelev", "55°43'N, 9°08'E", 95),
+            make_record("Nowhere", "unknown", 90),
+        ])
+        batch = normalize_batch(columns, "Denmark", RADIUS_CONFIG)
+        assert batch["Location"] == ["Vindelev"]
+        assert batch["Area"] == ["Denmark"]
+        assert batch["radius"] == [10000]
+        assert batch["latitude"][0] == pytest.approx(55.7167, abs=1e-3)
+
+    def test_workbook_likelihood_as_percent(self):
+        """Test that workbook fractions are stored as percentages and JSON percentages are kept."""
+        columns = records_to_columns([
+            make_record("A", "55°43'N, 9°08'E", 0.85),
+            make_record("B", "56°36'N, 9°58'E", "65%"),
+            make_record("C", "56°36'N, 9°58'E", 0.01),
+        ])
+        batch = normalize_batch(columns, "Wales", RADIUS_CONFIG, fraction_scale=True)
+        assert batch["Likelihood (%)"] == [85.0, "65%", 1.0]
+        assert batch["radius"] == [10000, 7000, 4000]
+        columns = records_to_columns([make_record("D", "55°43'N, 9°08'E", 1)])
+        assert normalize_batch(columns, "Denmark", RADIUS_CONFIG)["Likelihood (%)"] == [1]
+
+    def test_assemble_matches_concat(self):
+        """Test that single-pass assembly gives the same frame as repeated concat."""
+        batches = [
+            normalize_batch(records_to_columns([
+                make_record("A", "55°43'N, 9°08'E", 0.85),
+                make_record("B", "56°36'N, 9°58'E", 0.4),
+            ]), "Wales", RADIUS_CONFIG, fraction_scale=True),
+            normalize_batch(records_to_columns([
+                make_record("C", "40.4, -3.7", "65%", **{"Supporting Evidence URLs": ["https://a", "https://b"]}),
+                make_record("D", "41.4, 2.1", 90, **{"Supporting Evidence URLs": []}),
+            ]), "Spain", RADIUS_CONFIG),
+        ]
+
+        expected = pd.DataFrame()
+        for batch in batches:
+            expected = pd.concat([expected, pd.DataFrame(batch)], ignore_index=True)
+
+        pd.testing.assert_frame_equal(assemble_frame(batches), expected)
+
+    def test_assemble_empty(self):
+        """Test that no batches gives an empty frame."""
+        assert assemble_frame([]).empty
+
+    def test_iter_json_batches_reports_errors(self):
+        """Test that a broken file is reported and the others still load."""
+        with tempfile.TemporaryDirectory() as raw_dir:
+            with open(os.path.join(raw_dir, "Denmark.json"), 'w', encoding='utf-8') as f:
+                json.dump([make_record("Vindelev", "55°43'N, 9°08'E", 95)], f)
+            with open(os.path.join(raw_dir, "Broken.json"), 'w', encoding='utf-8') as f:
+                f.write('[{"Location": "Test",}]')
+
+            errors = []
+            batches = list(iter_json_batches(raw_dir, RADIUS_CONFIG, on_error=lambda name, e: errors.append(name)))
+
+            assert [b["Area"][0] for b in batches] == ["Denmark"]
+            assert errors == ["Broken.json"]
+
+            with pytest.raises(ValueError):
+                list(iter_json_batches(raw_dir, RADIUS_CONFIG))
+
+    @pytest.mark.parametrize("executor", ["thread", "process"])
+    def test_parallel_ingest_matches_serial(self, executor):
+        """Test that pooled ingest yields the same batches in file name order."""
+        with tempfile.TemporaryDirectory() as raw_dir:
+            for i, country in enumerate(["Spain", "Denmark", "Chile", "Broken", "Italy"]):
+                with open(os.path.join(raw_dir, f"{country}.json"), 'w', encoding='utf-8') as f:
+                    if country == "Broken":
+                        f.write("not json")
+                    else:
+                        json.dump([make_record(f"{country} {j}", f"{40 + i}.5, {j}.25", 60 + j) for j in range(3)], f)
+
+            serial_errors, parallel_errors = [], []
+            serial = assemble_frame(iter_json_batches(
+                raw_dir, RADIUS_CONFIG, on_error=lambda name, e: serial_errors.append(name)))
+            parallel = assemble_frame(iter_json_batches(
+                raw_dir, RADIUS_CONFIG, on_error=lambda name, e: parallel_errors.append(name),
+                workers=3, executor=executor))
+
+            pd.testing.assert_frame_equal(parallel, serial)
+            assert list(serial["Area"].unique()) == ["Chile", "Denmark", "Italy", "Spain"]
+            assert serial_errors == parallel_errors == ["Broken.json"]
+
+    def test_streamed_batches_match_whole_file(self):
+        """Test that chunked streaming of a large file gives the same frame."""
+        records = [make_record(f"Site {i}", f"{40 + i % 10}.5, {i % 7}.25", 50 + i % 50) for i in range(25)]
+        records[3]["Coordinates (Approximate)"] = "unknown"
+        records[11]["Notes"] = "only on one record"
+        with tempfile.TemporaryDirectory() as raw_dir:
+            path = os.path.join(raw_dir, "Chile.json")
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(records, f)
+
+            streamed = list(iter_streamed_batches(path, RADIUS_CONFIG, batch_records=4))
+            assert len(streamed) == 7
+            # A column first seen in a later chunk lands after the derived ones
+            pd.testing.assert_frame_equal(assemble_frame(streamed),
+                                          assemble_frame([load_record_file(path, RADIUS_CONFIG)]),
+                                          check_like=True)
+
+            # Folded into one batch as they stream, with packed derived columns
+            merged = merge_streamed_batches(iter(streamed))
+            assert len(merged) == 1
+            assert isinstance(merged[0]["latitude"], np.ndarray) and merged[0]["radius"].dtype == np.int64
+            pd.testing.assert_frame_equal(assemble_frame(merged), assemble_frame(streamed))
+            assert merge_streamed_batches(iter([])) == []
+
+    def test_large_file_loaded_as_one_merged_batch(self, monkeypatch):
+        """Test that load_source streams a file over the threshold into a single batch."""
+        records = [make_record(f"Site {i}", f"{40 + i % 10}.5, {i % 7}.25", 50 + i % 50) for i in range(30)]
+        with tempfile.TemporaryDirectory() as raw_dir:
+            path = os.path.join(raw_dir, "Chile.json")
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(records, f)
+            monkeypatch.setattr(treasure_ingest, "STREAMING_THRESHOLD_BYTES", 100)
+            monkeypatch.setattr(treasure_ingest, "STREAM_BATCH_RECORDS", 8)
+            batches = load_source(path, RADIUS_CONFIG)
+            assert len(batches) == 1
+            pd.testing.assert_frame_equal(assemble_frame(batches),
+                                          assemble_frame([load_record_file(path, RADIUS_CONFIG)]))
@@ -0,0 +1,133 @@
+import pytest
+import os
+from unittest.mock import patch
+
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+
+import treasure_lazy
+from treasure_lazy import LazyCountryDataset
+
+
+RADIUS_CONFIG = {"high": 10000, "medium": 7000, "low": 4000}
+
+
+class TestLazyCountryDataset:
+    """Test suite for manifest-first, per-country loading."""
+
+    @pytest.fixture
+    def base_dir(self, base_dir, write_country):
+        for country, rows in [("Chile", 2), ("Denmark", 3), ("Spain", 1)]:
+            write_country(os.path.join(base_dir, "raw"), country, rows)
+        return base_dir
+
+    def test_manifest_summaries(self, base_dir):
+        """Test that the manifest holds counts, bounding boxes and centers but no rows."""
+        dataset = LazyCountryDataset(base_dir, RADIUS_CONFIG)
+        manifest = dataset.manifest()
+
+        assert sorted(manifest) == ["Chile", "Denmark", "Spain"]
+        assert manifest["Denmark"]["rows"] == 3
+        assert manifest["Denmark"]["bbox"] == [40.5, 0.25, 42.5, 2.25]
+        assert manifest["Denmark"]["center"] == pytest.approx([41.5, 1.25])
+
+    def test_manifest_rows_reused(self, base_dir):
+        """Test that rows parsed to summarize a file are served without parsing it again, within the LRU bound."""
+        dataset = LazyCountryDataset(base_dir, RADIUS_CONFIG, max_countries=2)
+        dataset.manifest()
+        assert dataset.cached_countries() == ["Denmark", "Spain"]
+
+        with patch.object(treasure_lazy, 'iter_sources', side_effect=AssertionError("parsed")):
+            assert len(dataset.get("Denmark")) == 3
+
+    def test_persisted_manifest_skips_parsing(self, base_dir):
+        """Test that a fresh process reads the stored manifest without parsing files."""
+        LazyCountryDataset(base_dir, RADIUS_CONFIG).manifest()
+
+        with patch.object(treasure_lazy, 'iter_sources', side_effect=AssertionError("parsed")):
+            manifest = LazyCountryDataset(base_dir, RADIUS_CONFIG).manifest()
+        assert manifest["Chile"]["rows"] == 2
+
+    def test_country_parsed_once_on_selection(self, base_dir):
+        """Test that only requested countries are parsed, then served from cache."""
+        LazyCountryDataset(base_dir, RADIUS_CONFIG).manifest()
+        dataset = LazyCountryDataset(base_dir, RADIUS_CONFIG)
+        dataset.manifest()
+        assert dataset.cached_countries() == []
+
+        df = dataset.load(["Chile", "Spain"])
+        assert list(df["Area"]) == ["Chile", "Chile", "Spain"]
+        assert dataset.cached_countries() == ["Chile", "Spain"]
+
+        with patch.object(treasure_lazy, 'iter_sources', side_effect=AssertionError("parsed")):
+            pd.testing.assert_frame_equal(dataset.load(["Chile", "Spain"]), df)
+
+    def test_lru_eviction(self, base_dir):
+        """Test that the least recently used country is dropped past max_countries."""
+        LazyCountryDataset(base_dir, RADIUS_CONFIG).manifest()
+        dataset = LazyCountryDataset(base_dir, RADIUS_CONFIG, max_countries=2)
+        dataset.manifest()
+
+        dataset.get("Chile")
+        dataset.get("Denmark")
+        dataset.get("Chile")
+        dataset.get("Spain")
+        assert dataset.cached_countries() == ["Chile", "Spain"]
+
+    def test_edited_country_reparsed(self, base_dir, write_country):
+        """Test that a cached country is re-parsed and re-summarized after its file changes."""
+        dataset = LazyCountryDataset(base_dir, RADIUS_CONFIG)
+        dataset.manifest()
+        dataset.get("Denmark")
+
+        write_country(os.path.join(base_dir, "raw"), "Denmark", 5, likelihood=65)
+        df = dataset.get("Denmark")
+        assert len(df) == 5
+        assert (df["radius"] == 7000).all()
+        assert dataset.manifest()["Denmark"]["rows"] == 5
+
+    def test_edit_seen_by_manifest_first(self, base_dir, write_country):
+        """Test that a cached country is not served stale after manifest() picks up its edit."""
+        dataset = LazyCountryDataset(base_dir, RADIUS_CONFIG)
+        dataset.manifest()
+        assert dataset.get("Denmark")["Location"][0] == "Denmark site 0"
+
+        raw_dir = os.path.join(base_dir, "raw")
+        write_country(raw_dir, "Denmark", 4, likelihood=65)
+        assert dataset.manifest()["Denmark"]["rows"] == 4
+        with patch.object(treasure_lazy, 'iter_sources', side_effect=AssertionError("parsed")):
+            df = dataset.get("Denmark")
+        assert len(df) == 4 and (df["radius"] == 7000).all()
+
+    def test_broken_country_reported(self, base_dir):
+        """Test that a broken file is flagged in the manifest and skipped when loading."""
+        with open(os.path.join(base_dir, "raw", "Broken.json"), 'w', encoding='utf-8') as f:
+            f.write("[{")
+        dataset = LazyCountryDataset(base_dir, RADIUS_CONFIG)
+        manifest = dataset.manifest()
+        assert "Broken.json" in manifest["Broken"]["error"]
+
+        errors = []
+        df = dataset.load(["Broken", "Spain"], on_error=lambda country, e: errors.append(country))
+        assert errors == ["Broken"]
+        assert list(df["Area"]) == ["Spain"]
+        with pytest.raises(KeyError):
+            dataset.get("Atlantis")
+
+
+class TestLazyApp:
+    """Test suite for the lazily loaded app's first page."""
+
+    def test_fresh_session_shows_largest_countries(self):
+        """Test that a new session preselects the countries with the most rows and renders the whole page."""
+        at = AppTest.from_file(os.path.join(os.path.dirname(os.path.abspath(__file__)), "app_updated.py"),
+                               default_timeout=120)
+        at.run()
+        assert not at.exception
+        manifest = LazyCountryDataset(os.path.dirname(os.path.abspath(__file__)), RADIUS_CONFIG).manifest()
+        rows = sorted((entry["rows"] for entry in manifest.values()), reverse=True)
+        selected = at.multiselect[0].value
+        assert len(selected) == 3
+        assert sorted((manifest[country]["rows"] for country in selected), reverse=True) == rows[:3]
+        assert len(at.get("deck_gl_json_chart")) == 1
+        assert at.metric[0].label == "Total Locations" and at.metric[0].value == str(sum(rows[:3]))
@@ -0,0 +1,119 @@
+import pytest
+import json
+import os
+import tempfile
+
+import pandas as pd
+
+from treasure_ingest import COLUMN_PARSE_MIN_ROWS, iter_sources
+from treasure_parse_stats import PARSE_STATS, ParseStats
+
+
+RADIUS_CONFIG = {"high": 10000, "medium": 7000, "low": 4000}
+
+COORDINATES = [
+    "55.6761, 12.5683",
+    "100, 50",                       # swapped back
+    "53°21'N, 4°14'W",
+    "55.2415° N, 6.5167° W",
+    "54° 16' 25\" N, 5° 40' 36\" W",
+    "unknown",
+    "",
+    None,
+]
+
+
+class TestParseStats:
+    """Test suite for the opt-in coordinate parser counters."""
+
+    @pytest.fixture
+    def stats(self):
+        PARSE_STATS.reset()
+        PARSE_STATS.enable()
+        yield PARSE_STATS
+        PARSE_STATS.enable(False)
+        PARSE_STATS.reset()
+
+    @pytest.fixture
+    def sources(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            json_path = os.path.join(base_dir, "Denmark.json")
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump([{"Location": f"Site {i}", "Coordinates (Approximate)": value, "Likelihood (%)": 70}
+                           for i, value in enumerate(COORDINATES)], f)
+            excel_path = os.path.join(base_dir, "treasure.xlsx")
+            pd.DataFrame({
+                "Location": ["A", "B"],
+                "Coordinates (Approximate)": ["55°43'N, 9°08'E", "nowhere"],
+                "Likelihood (%)": [0.9, 0.5],
+            }).to_excel(excel_path, sheet_name="Ireland", index=False)
+            yield [excel_path, json_path]
+
+    def test_counts_per_source(self, stats, sources):
+        """Test format, failure, swap and timing counters for a raw/ file and a workbook sheet."""
+        list(iter_sources(sources, RADIUS_CONFIG))
+        recorded = stats.sources()
+        assert sorted(recorded) == ["Denmark.json", "treasure.xlsx:Ireland"]
+
+        denmark = recorded["Denmark.json"]
+        assert denmark["rows"] == 8 and denmark["parsed"] == 5
+        assert denmark["formats"] == {"decimal_pair": 2, "dms": 1, "decimal_direction": 1, "dms_seconds": 1}
+        assert denmark["missing"] == 2 and denmark["failed"] == 1 and denmark["swapped"] == 1
+        assert denmark["parse_seconds"] > 0
+
+        ireland = recorded["treasure.xlsx:Ireland"]
+        assert (ireland["parsed"], ireland["failed"], ireland["formats"]["dms"]) == (1, 1, 1)
+        assert stats.totals()["rows"] == 10
+
+    def test_column_path_counted(self, stats, sources, monkeypatch):
+        """Test that batches parsed a column at a time are counted the same way."""
+        list(iter_sources(sources[1:], RADIUS_CONFIG))
+        expected = stats.sources()
+        stats.reset()
+        monkeypatch.setattr("treasure_ingest.COLUMN_PARSE_MIN_ROWS", 1)
+        list(iter_sources(sources[1:], RADIUS_CONFIG))
+        recorded = stats.sources()
+        for entry in (expected, recorded):
+            entry["Denmark.json"].pop("parse_seconds")
+        assert recorded == expected
+        assert COLUMN_PARSE_MIN_ROWS > len(COORDINATES)
+
+    def test_reparse_replaces_counts(self, stats, sources):
+        """Test that parsing a source again replaces its counts and adds only to its parse time."""
+        list(iter_sources(sources, RADIUS_CONFIG))
+        first = stats.sources()
+        list(iter_sources(sources, RADIUS_CONFIG))
+        second = stats.sources()
+        for source in first:
+            assert second[source]["parse_seconds"] > first[source]["parse_seconds"]
+            first[source].pop("parse_seconds"), second[source].pop("parse_seconds")
+        assert second == first
+        assert stats.totals()["rows"] == 10
+
+    def test_streamed_chunks_add_up(self, stats, sources, monkeypatch):
+        """Test that the chunks of one streamed parse add up to the whole file."""
+        list(iter_sources(sources[1:], RADIUS_CONFIG))
+        expected = stats.sources()["Denmark.json"]
+        monkeypatch.setattr("treasure_ingest.STREAMING_THRESHOLD_BYTES", 10)
+        monkeypatch.setattr("treasure_ingest.STREAM_BATCH_RECORDS", 3)
+        list(iter_sources(sources[1:], RADIUS_CONFIG))
+        recorded = stats.sources()["Denmark.json"]
+        expected.pop("parse_seconds"), recorded.pop("parse_seconds")
+        assert recorded == expected
+
+    def test_export(self, stats, sources):
+        """Test the JSON export and the display table."""
+        list(iter_sources(sources, RADIUS_CONFIG))
+        exported = json.loads(stats.to_json())
+        assert exported["sources"] == stats.sources()
+        assert exported["totals"]["parsed"] == 6
+        frame = stats.to_frame()
+        assert list(frame["Source"]) == ["Denmark.json", "treasure.xlsx:Ireland"]
+        assert list(frame["Failed"]) == [1, 1]
+
+    def test_disabled_by_default(self, sources):
+        """Test that nothing is recorded until the counters are enabled."""
+        assert not ParseStats().enabled
+        PARSE_STATS.reset()
+        list(iter_sources(sources, RADIUS_CONFIG))
+        assert PARSE_STATS.sources() == {}
@@ -0,0 +1,146 @@
+import pytest
+import os
+import time
+from unittest.mock import patch
+
+import pandas as pd
+
+from treasure_cache import DatasetSnapshot
+from treasure_formats import list_raw_sources
+from treasure_ingest import assemble_sources, iter_sources
+from treasure_reload import HotReloader
+
+
+RADIUS_CONFIG = {"high": 10000, "medium": 7000, "low": 4000}
+
+
+def fresh_build(base_dir):
+    """What a full rebuild of the tree would produce."""
+    paths = list_raw_sources(os.path.join(base_dir, "raw"))
+    df, _ = assemble_sources(iter_sources(paths, RADIUS_CONFIG, on_error=lambda name, e: None))
+    return df
+
+
+class TestHotReloader:
+    """Test suite for incremental reloads of edited source files."""
+
+    @pytest.fixture
+    def base_dir(self, base_dir, write_country):
+        for country, rows in [("Chile", 2), ("Denmark", 3), ("Spain", 2)]:
+            write_country(os.path.join(base_dir, "raw"), country, rows)
+        return base_dir
+
+    def test_initial_load(self, base_dir):
+        """Test that the first version parses every source."""
+        version = HotReloader(base_dir, RADIUS_CONFIG).current()
+        assert version.number == 1
+        assert version.reparsed == ["Chile.json", "Denmark.json", "Spain.json"]
+        pd.testing.assert_frame_equal(version.frame, fresh_build(base_dir))
+
+    def test_only_changed_file_is_reparsed(self, base_dir, write_country):
+        """Test that editing one file re-parses only that file and splices its rows."""
+        reloader = HotReloader(base_dir, RADIUS_CONFIG)
+        first = reloader.current()
+
+        write_country(os.path.join(base_dir, "raw"), "Denmark", 5, likelihood=65)
+        second = reloader.refresh()
+
+        assert second.number == 2
+        assert second.reparsed == ["Denmark.json"]
+        pd.testing.assert_frame_equal(second.frame, fresh_build(base_dir), check_dtype=False)
+        assert (second.frame[second.frame["Area"] == "Denmark"]["radius"] == 7000).all()
+        assert len(first.frame) == 7, "Published versions must never be mutated"
+
+    def test_unchanged_tree_keeps_version(self, base_dir):
+        """Test that touching a file without changing it publishes nothing new."""
+        reloader = HotReloader(base_dir, RADIUS_CONFIG)
+        first = reloader.current()
+
+        path = os.path.join(base_dir, "raw", "Chile.json")
+        later = time.time() + 1000
+        os.utime(path, (later, later))
+        assert reloader.refresh() is first
+
+    def test_added_and_removed_files(self, base_dir, write_country):
+        """Test that new files are spliced in and deleted files dropped."""
+        raw_dir = os.path.join(base_dir, "raw")
+        reloader = HotReloader(base_dir, RADIUS_CONFIG)
+        reloader.current()
+
+        write_country(raw_dir, "Brazil", 1)
+        os.remove(os.path.join(raw_dir, "Spain.json"))
+        version = reloader.refresh()
+
+        assert version.reparsed == ["Brazil.json"]
+        assert list(version.frame["Area"].unique()) == ["Brazil", "Chile", "Denmark"]
+        pd.testing.assert_frame_equal(version.frame, fresh_build(base_dir), check_dtype=False)
+
+    def test_broken_file_reported_until_fixed(self, base_dir, write_country):
+        """Test that a broken edit drops that file's rows and reports it."""
+        raw_dir = os.path.join(base_dir, "raw")
+        reloader = HotReloader(base_dir, RADIUS_CONFIG)
+        reloader.current()
+
+        with open(os.path.join(raw_dir, "Chile.json"), 'w', encoding='utf-8') as f:
+            f.write("[{")
+        broken = reloader.refresh()
+        assert len(broken.errors) == 1 and "Chile.json" in broken.errors[0]
+        assert "Chile" not in set(broken.frame["Area"])
+
+        write_country(raw_dir, "Chile", 2)
+        fixed = reloader.refresh()
+        assert fixed.errors == []
+        assert fixed.reparsed == ["Chile.json"]
+
+    def test_seed_from_snapshot(self, base_dir, write_country):
+        """Test that a fresh snapshot is served without parsing, then spliced."""
+        settings = {"radius": RADIUS_CONFIG}
+        HotReloader(base_dir, RADIUS_CONFIG, snapshot=DatasetSnapshot(base_dir), settings=settings).current()
+
+        reloader = HotReloader(base_dir, RADIUS_CONFIG, snapshot=DatasetSnapshot(base_dir), settings=settings)
+        seeded = reloader.current()
+        assert seeded.reparsed == [], "Snapshot should be served without parsing"
+
+        write_country(os.path.join(base_dir, "raw"), "Spain", 4)
+        version = reloader.refresh()
+        assert version.reparsed == ["Spain.json"]
+        pd.testing.assert_frame_equal(version.frame, fresh_build(base_dir), check_dtype=False)
+
+    def test_compact_versions(self, base_dir, write_country):
+        """Test that compact versions are spliced from the full-schema frame."""
+        reloader = HotReloader(base_dir, RADIUS_CONFIG, compact=True)
+        assert isinstance(reloader.current().frame["Area"].dtype, pd.CategoricalDtype)
+
+        write_country(os.path.join(base_dir, "raw"), "Denmark", 5, likelihood=65)
+        version = reloader.refresh()
+        assert isinstance(version.frame["Area"].dtype, pd.CategoricalDtype)
+        assert list(version.frame["Area"]) == list(fresh_build(base_dir)["Area"])
+
+    def test_watcher_failure_recorded(self, base_dir, caplog, write_country):
+        """Test that a failing background refresh is logged and kept in last_error until one succeeds."""
+        reloader = HotReloader(base_dir, RADIUS_CONFIG)
+        version = reloader.current()
+
+        def wait_for(condition):
+            deadline = time.time() + 5
+            while not condition() and time.time() < deadline:
+                time.sleep(0.01)
+            return condition()
+
+        with patch.object(reloader, "_splice", side_effect=RuntimeError("splice bug")):
+            write_country(os.path.join(base_dir, "raw"), "Chile", 4)
+            reloader.start(0.01)
+            try:
+                assert wait_for(lambda: reloader.last_error is not None)
+            finally:
+                reloader.stop()
+        assert reloader.last_error == "RuntimeError: splice bug"
+        assert "Background refresh" in caplog.text and "splice bug" in caplog.text
+        assert reloader.current() is version
+
+        reloader.start(0.01)
+        try:
+            assert wait_for(lambda: reloader.last_error is None)
+        finally:
+            reloader.stop()
+        assert len(reloader.current().frame) == 9
@@ -0,0 +1,117 @@
+import pytest
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+
+from treasure_schema import compact_frame, flat_url_lists, frame_memory, likelihood_number
+
+
+def make_frame(rows=4):
+    return pd.DataFrame({
+        "Location": [f"Site {i}" for i in range(rows)],
+        "Treasure Value": ["High", "Priceless", "High", "Medium"][:rows],
+        "Likelihood (%)": pd.Series([85, 0.9, "65%", float('nan')][:rows], dtype=object),
+        "Area": ["Denmark", "Denmark", "Spain", "Wales"][:rows],
+        "latitude": [55.716, 56.6, 40.1, 53.35][:rows],
+        "longitude": [9.133, 9.966, -3.5, -4.23][:rows],
+        "radius": [10000, 10000, 7000, 4000][:rows],
+        "Supporting Evidence URLs": [["https://a", "https://b"], float('nan'), [], ["https://c"]][:rows],
+    })
+
+
+class TestCompactSchema:
+    """Test suite for the compact in-memory layout of the combined frame."""
+
+    def test_dtypes(self):
+        """Test that each column gets its compact type."""
+        df = compact_frame(make_frame())
+        assert isinstance(df["Area"].dtype, pd.CategoricalDtype)
+        assert isinstance(df["Treasure Value"].dtype, pd.CategoricalDtype)
+        assert df["latitude"].dtype == np.float32 and df["longitude"].dtype == np.float32
+        assert df["radius"].dtype == np.int16
+        assert df["Likelihood (%)"].dtype == np.float64
+
+    def test_values_preserved(self):
+        """Test that the compact frame holds the same values."""
+        df = make_frame()
+        compact = compact_frame(df)
+        assert list(compact["Area"]) == list(df["Area"])
+        assert list(compact["radius"]) == list(df["radius"])
+        np.testing.assert_allclose(compact["latitude"], df["latitude"], atol=1e-5)
+        assert compact["Likelihood (%)"].tolist()[:3] == [85.0, 0.9, 65.0]
+        assert np.isnan(compact["Likelihood (%)"].iloc[3])
+
+        urls = compact["Supporting Evidence URLs"]
+        assert urls.iloc[0] == ["https://a", "https://b"]
+        assert pd.isna(urls.iloc[1])
+        assert list(compact[compact["Area"] == "Wales"]["Supporting Evidence URLs"].iloc[0]) == ["https://c"]
+
+    def test_whole_likelihoods_stay_integral(self):
+        """Test that whole likelihoods keep an integer type and print without a decimal point."""
+        df = make_frame()
+        df["Likelihood (%)"] = pd.Series([95, "65%", 80.0, None], dtype=object)
+        likelihood = compact_frame(df)["Likelihood (%)"]
+        assert likelihood.dtype == pd.Int8Dtype()
+        assert [str(value) for value in likelihood.iloc[:3]] == ["95", "65", "80"]
+        assert pd.isna(likelihood.iloc[3])
+
+    def test_flat_url_lists(self):
+        """Test that URL lists flatten to one string array plus offsets, also for slices."""
+        compact = compact_frame(make_frame())
+        urls, offsets = flat_url_lists(compact["Supporting Evidence URLs"])
+        assert list(urls) == ["https://a", "https://b", "https://c"]
+        assert list(offsets) == [0, 2, 2, 2, 3]
+
+        urls, offsets = flat_url_lists(compact["Supporting Evidence URLs"].iloc[2:])
+        assert list(urls) == ["https://c"] and list(offsets) == [0, 0, 1]
+
+    @pytest.mark.parametrize("value,expected", [(85, 85.0), ("65%", 65.0), (" 90 ", 90.0), (0.8, 0.8)])
+    def test_likelihood_number(self, value, expected):
+        """Test that likelihoods keep the scale they were written in."""
+        assert likelihood_number(value) == expected
+
+    @pytest.mark.parametrize("value", [None, float('nan'), "unknown", [1]])
+    def test_likelihood_number_missing(self, value):
+        """Test that unusable likelihoods become NaN."""
+        assert np.isnan(likelihood_number(value))
+
+    def test_smaller_footprint(self):
+        """Test that the compact frame uses less memory than the object layout."""
+        df = pd.concat([make_frame()] * 250, ignore_index=True)
+        assert frame_memory(compact_frame(df)) < frame_memory(df) * 0.7
+
+    def test_empty_frame(self):
+        """Test that an empty frame passes through."""
+        assert compact_frame(pd.DataFrame()).empty
+
+
+class TestCompactMapView:
+    """Test suite for the map view of the app running on a compact frame."""
+
+    @staticmethod
+    def view_state(at):
+        def walk(node):
+            proto = getattr(node, "proto", None)
+            if proto is not None and "initialViewState" in getattr(proto, "json", ""):
+                yield json.loads(proto.json)["initialViewState"]
+            for child in getattr(node, "children", {}).values():
+                yield from walk(child)
+        return next(walk(at._tree[0]))
+
+    def test_view_state_numeric(self):
+        """Test that float32 coordinates reach the map spec as numbers, not strings."""
+        at = AppTest.from_file(os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py"),
+                               default_timeout=120)
+        at.run()
+        assert not at.exception
+        view = self.view_state(at)
+        assert all(isinstance(view[name], (int, float)) for name in ("latitude", "longitude", "zoom"))
+
+        at.selectbox(key="treasure_selector").select_index(1).run()
+        assert not at.exception
+        view = self.view_state(at)
+        assert view["zoom"] == 8
+        assert all(isinstance(view[name], (int, float)) for name in ("latitude", "longitude"))
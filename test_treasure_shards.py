@@ -0,0 +1,129 @@
+import pytest
+import os
+from unittest.mock import patch
+
+import pandas as pd
+
+import treasure_lazy
+import treasure_shards
+from treasure_formats import list_raw_sources
+from treasure_ingest import assemble_sources, iter_sources
+from treasure_lazy import LazyCountryDataset
+from treasure_shards import SHARD_ALIGNMENT, ShardStore, bbox_intersects, main
+
+
+RADIUS_CONFIG = {"high": 10000, "medium": 7000, "low": 4000}
+
+
+class TestShardStore:
+    """Test suite for the packed per-country shard format."""
+
+    @pytest.fixture
+    def base_dir(self, base_dir, write_country):
+        raw_dir = os.path.join(base_dir, "raw")
+        write_country(raw_dir, "Chile", 2, lat=-33, lon=-71)
+        write_country(raw_dir, "Denmark", 3, lat=55, lon=9)
+        write_country(raw_dir, "Spain", 1, lat=40, lon=-4)
+        return base_dir
+
+    def test_build_manifest(self, base_dir):
+        """Test that every country gets an aligned, checksummed shard entry."""
+        countries = ShardStore(base_dir, RADIUS_CONFIG).build()
+        assert sorted(countries) == ["Chile", "Denmark", "Spain"]
+        denmark = countries["Denmark"]
+        assert denmark["rows"] == 3
+        assert denmark["bbox"] == [55.5, 9.25, 57.5, 11.25]
+        assert denmark["source"]["file"] == "Denmark.json"
+        assert all(entry["offset"] % SHARD_ALIGNMENT == 0 for entry in countries.values())
+
+    def test_query_matches_parsing(self, base_dir):
+        """Test that reading every shard gives the frame a full parse gives."""
+        store = ShardStore(base_dir, RADIUS_CONFIG)
+        store.build()
+        expected, _ = assemble_sources(iter_sources(list_raw_sources(os.path.join(base_dir, "raw")), RADIUS_CONFIG))
+        pd.testing.assert_frame_equal(store.query(verify=True), expected)
+        assert store.load("Denmark").iloc[0]["Supporting Evidence URLs"] == ["https://example.com/Denmark/0"]
+
+    def test_bbox_skips_shards(self, base_dir):
+        """Test that shards whose bounding box misses the query are never read."""
+        store = ShardStore(base_dir, RADIUS_CONFIG)
+        store.build()
+        loaded = []
+        real_load = store.load
+        with patch.object(store, 'load', side_effect=lambda c, v=False: loaded.append(c) or real_load(c, v)):
+            df = store.query(bbox=[50, 0, 60, 15])
+        assert loaded == ["Denmark"]
+        assert set(df["Area"]) == {"Denmark"}
+        assert store.select(countries=["Spain", "Chile"], bbox=[-40, -80, 45, 0]) == ["Spain", "Chile"]
+
+    def test_rebuild_reuses_unchanged_shards(self, base_dir, write_country):
+        """Test that only edited sources are parsed again on rebuild."""
+        store = ShardStore(base_dir, RADIUS_CONFIG)
+        store.build()
+        write_country(os.path.join(base_dir, "raw"), "Spain", 4, lat=40, lon=-4, likelihood=65)
+
+        parsed = []
+        real_iter_sources = treasure_shards.iter_sources
+
+        def tracking_iter_sources(paths, *args, **kwargs):
+            parsed.extend(os.path.basename(p) for p in paths)
+            return real_iter_sources(paths, *args, **kwargs)
+
+        with patch.object(treasure_shards, 'iter_sources', tracking_iter_sources):
+            countries = store.build()
+        assert parsed == ["Spain.json"]
+        assert countries["Spain"]["rows"] == 4
+        assert (store.load("Spain")["radius"] == 7000).all()
+        assert len(store.load("Chile")) == 2
+        packs = [name for name in os.listdir(store.shard_dir) if name.endswith('.bin')]
+        assert len(packs) == 1, "The previous pack should be removed"
+
+    def test_checksum_and_settings(self, base_dir):
+        """Test that a corrupted shard fails verification and other radius settings ignore the build."""
+        store = ShardStore(base_dir, RADIUS_CONFIG)
+        countries = store.build()
+        pack = os.path.join(store.shard_dir, store._current()["pack"])
+        with open(pack, 'r+b') as f:
+            f.seek(countries["Chile"]["offset"] + 100)
+            f.write(b'\xff\xff\xff\xff')
+        with pytest.raises(ValueError):
+            ShardStore(base_dir, RADIUS_CONFIG).load("Chile", verify=True)
+
+        assert ShardStore(base_dir, {"high": 1, "medium": 1, "low": 1}).manifest() == {}
+
+    def test_broken_source_reported(self, base_dir):
+        """Test that a broken file is reported and left out of the pack."""
+        with open(os.path.join(base_dir, "raw", "Broken.json"), 'w', encoding='utf-8') as f:
+            f.write("[{")
+        assert main(["--base-dir", base_dir]) == 1
+        store = ShardStore(base_dir)
+        assert "Broken.json" in store.errors()
+        assert "Broken" not in store.manifest()
+
+    def test_lazy_dataset_reads_fresh_shards(self, base_dir, write_country):
+        """Test that the lazy dataset serves current shards without parsing, and parses stale ones."""
+        store = ShardStore(base_dir, RADIUS_CONFIG)
+        store.build()
+        write_country(os.path.join(base_dir, "raw"), "Chile", 5, lat=-33, lon=-71)
+
+        parsed = []
+        real_iter_sources = treasure_lazy.iter_sources
+
+        def tracking_iter_sources(paths, *args, **kwargs):
+            parsed.extend(os.path.basename(p) for p in paths)
+            return real_iter_sources(paths, *args, **kwargs)
+
+        with patch.object(treasure_lazy, 'iter_sources', tracking_iter_sources):
+            dataset = LazyCountryDataset(base_dir, RADIUS_CONFIG, shard_store=store)
+            manifest = dataset.manifest()
+            assert manifest["Denmark"]["rows"] == 3
+            assert len(dataset.get("Denmark")) == 3
+            assert len(dataset.get("Chile")) == 5
+        assert parsed == ["Chile.json"], "Only the edited country should be parsed, and only once"
+
+    def test_bbox_intersects(self):
+        """Test box overlap, including touching edges."""
+        assert bbox_intersects([0, 0, 10, 10], [5, 5, 15, 15])
+        assert bbox_intersects([0, 0, 10, 10], [10, 10, 20, 20])
+        assert not bbox_intersects([0, 0, 10, 10], [11, 0, 20, 10])
+        assert not bbox_intersects([0, 0, 10, 10], [0, 11, 10, 20])
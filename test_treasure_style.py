@@ -0,0 +1,94 @@
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from treasure_style import DEFAULT_COLOR, SELECTED_COLOR, VALUE_COLORS, MapStyle, tier_colors
+
+
+def row_color(value):
+    """The per-row color rule the map used before tier_colors."""
+    if value == "Priceless":
+        return [255, 215, 0, 200]
+    elif value == "Exceptional":
+        return [255, 165, 0, 200]
+    elif value == "High":
+        return [255, 69, 0, 200]
+    return [128, 128, 128, 200]
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        "Location": ["Hoard", "Wreck", "Hoard", "Chalice", "Coins"],
+        "Treasure Value": ["High", "Priceless", "Exceptional", None, "Moderate (single silver item)"],
+        "latitude": [55.0, 56.0, 57.0, 53.0, 54.0],
+        "longitude": [9.0, 10.0, 11.0, -7.0, -6.0],
+        "radius": [10000, 7000, 4000, 7000, 4000],
+    }, index=[4, 3, 2, 1, 0])
+
+
+class TestMapStyle:
+    """Test suite for precomputed map colors and the selection overlay."""
+
+    def test_tier_colors_match_row_rule(self, frame):
+        """Test the vectorized colors against the per-row rule, object and categorical."""
+        expected = [row_color(value) for value in frame["Treasure Value"]]
+        assert tier_colors(frame["Treasure Value"]).tolist() == expected
+        assert tier_colors(frame["Treasure Value"].astype("category")).tolist() == expected
+        assert tier_colors(frame["Treasure Value"]).dtype == np.uint8
+        assert tier_colors([]).shape == (0, 4)
+        assert set(map(tuple, VALUE_COLORS.values())).isdisjoint({tuple(DEFAULT_COLOR), tuple(SELECTED_COLOR)})
+
+    def test_base_data(self, frame):
+        """Test that the layer data is the frame plus one color list per row."""
+        style = MapStyle(frame, "Location")
+        assert list(style.data.index) == list(frame.index)
+        assert style.data["color"].tolist() == [row_color(value) for value in frame["Treasure Value"]]
+        assert "color" not in frame.columns
+        assert MapStyle(frame.drop(columns="Treasure Value"), "Location").data["color"].tolist() == [DEFAULT_COLOR] * 5
+
+    def test_selection_overlay(self, frame):
+        """Test that a selection returns only its rows, recolored, and leaves the base colors alone."""
+        style = MapStyle(frame, "Location")
+        base = style.data["color"].tolist()
+
+        overlay = style.selected("Hoard")
+        assert overlay["latitude"].tolist() == [55.0, 57.0]
+        assert overlay["color"].tolist() == [SELECTED_COLOR, SELECTED_COLOR]
+        assert style.selected("Atlantis").empty
+        assert style.selected(None).empty
+        assert list(style.selected(None).columns) == list(style.data.columns)
+        assert style.data["color"].tolist() == base
+
+    def test_selection_cost_independent_of_size(self):
+        """Test that the overlay for one treasure has one row however large the frame."""
+        size = 200_000
+        frame = pd.DataFrame({"Location": [f"Site {i}" for i in range(size)],
+                              "Treasure Value": np.resize(["High", "Low", "Priceless"], size),
+                              "latitude": 0.0, "longitude": 0.0, "radius": 4000})
+        style = MapStyle(frame, "Location")
+        style.rows_of("Site 0")
+        for i in (5, 199_999):
+            overlay = style.selected(f"Site {i}")
+            assert len(overlay) == 1 and overlay.index[0] == i
+
+    def test_trimmed_transport(self, frame):
+        """Test that trimmed layer data carries only the map attributes, and ids resolve to full rows."""
+        frame = frame.assign(**{"Supporting Evidence": ["long text"] * 5,
+                                "latitude": frame["latitude"].astype("float32") + np.float32(0.123456789)})
+        style = MapStyle(frame, "Location", transport_columns=["Location"])
+        assert list(style.data.columns) == ["position", "color", "radius", "id", "Location"]
+        assert style.position_accessor == "position"
+        assert MapStyle(frame, "Location").position_accessor == ["longitude", "latitude"]
+
+        records = style.data.to_dict(orient="records")
+        assert records[0] == {"position": [9.0, 55.12346], "color": row_color("High"), "radius": 10000,
+                              "id": 0, "Location": "Hoard"}
+        assert all(type(value) is float for value in records[0]["position"])
+        assert style.details(records[3]["id"])["Location"] == "Chalice"
+
+        overlay = style.selected("Hoard")
+        assert list(overlay.columns) == list(style.data.columns)
+        assert overlay["id"].tolist() == [0, 2]
+        assert overlay["color"].tolist() == [SELECTED_COLOR, SELECTED_COLOR]
@@ -0,0 +1,78 @@
+import json
+import os
+
+import pytest
+
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+from treasure_viewport import Bounds, PointGrid, in_bounds, viewport_bounds
+
+
+@pytest.fixture(scope="module")
+def points():
+    rng = np.random.default_rng(22)
+    longitudes = rng.uniform(-180, 180, 200_000)
+    latitudes = rng.uniform(-90, 90, 200_000)
+    longitudes[:3] = [180.0, -180.0, np.nan]
+    return longitudes, latitudes
+
+
+class TestViewport:
+    """Test suite for viewport bounds and the spatial point index."""
+
+    def test_query_matches_scan(self, points):
+        """Test grid queries, wrapped and not, against a full scan of every point."""
+        longitudes, latitudes = points
+        grid = PointGrid(longitudes, latitudes)
+        boxes = [Bounds(-10, 40, 30, 60), Bounds(170, -20, -170, 10), Bounds(-180, -90, 180, 90),
+                 Bounds(179.9, 89.0, -179.9, 90.0), Bounds(5, 5, 5.001, 5.001), None]
+        for bounds in boxes:
+            expected = np.flatnonzero(in_bounds(longitudes, latitudes, bounds))
+            assert np.array_equal(grid.query(bounds), expected), bounds
+        assert len(PointGrid([], []).query(Bounds(0, 0, 1, 1))) == 0
+
+    def test_zoomed_out_sends_everything(self):
+        """Test that a view of the whole world needs no culling."""
+        assert viewport_bounds(20, 10, 1, 1200, 600) is None
+        assert viewport_bounds(20, 10, 3, 1200, 600) is not None
+
+    def test_bounds_wrap_antimeridian(self):
+        """Test a view centered near 180 degrees longitude."""
+        bounds = viewport_bounds(-17.0, 179.0, 6, 1200, 600)
+        assert bounds.west > bounds.east
+        assert bounds.west < 179.0 and bounds.east > -180.0
+        assert bounds.south < -17.0 < bounds.north
+        mask = in_bounds(np.array([178.5, -179.5, 0.0]), np.array([-17.0, -17.0, -17.0]), bounds)
+        assert mask.tolist() == [True, True, False]
+
+    def test_bounds_snap_and_margin(self):
+        """Test that nearby centers share a box and the margin grows it."""
+        near = [viewport_bounds(55.0 + d, 12.0 + d, 7, 1200, 600) for d in (0.0, 0.01, 0.02)]
+        assert len(set(near)) == 1
+        tight = viewport_bounds(55.0, 12.0, 7, 1200, 600, margin=0)
+        assert tight.west > near[0].west and tight.east < near[0].east
+        assert tight.west <= 12.0 - 1200 / 2 / (512 * 2 ** 7) * 360
+
+    def test_payload_shrinks_with_zoom(self, points):
+        """Test that each zoom level in sends about a quarter of the points of the last."""
+        grid = PointGrid(*points)
+        counts = [len(grid.query(viewport_bounds(0, 0, zoom, 1200, 600))) for zoom in (4, 5, 6, 7)]
+        for outer, inner in zip(counts, counts[1:]):
+            assert 0.15 < inner / outer < 0.4
+
+
+class TestAppViewport:
+    """Test suite for the part of the dataset the app's map is sent."""
+
+    def test_default_view_sends_every_row(self):
+        """Test that the first view of the app sends every row of the frame, polar sites included."""
+        at = AppTest.from_file(os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py"),
+                               default_timeout=120)
+        at.run()
+        assert not at.exception
+        spec = json.loads(at.get("deck_gl_json_chart")[0].proto.json)
+        base = next(layer for layer in spec["layers"] if layer["id"] != "selection")
+        ids = sorted(point["id"] for point in base["data"])
+        assert ids == list(range(len(ids)))
+        assert min(point["position"][1] for point in base["data"]) < -74
@@ -0,0 +1,338 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from treasure_formats import list_raw_sources
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:  # pragma: no cover - pyarrow ships with streamlit
+    pa = None
+
+
+# Bump whenever the processed frame layout or the parsing rules change so
+# that snapshots written by older code are never reused.
+SNAPSHOT_FORMAT_VERSION = 5
+
+# Directory (relative to the app) holding compiled dataset artifacts
+DEFAULT_CACHE_DIR = ".treasure_cache"
+
+# Bump whenever the converted sheet layout changes
+WORKBOOK_CACHE_VERSION = 1
+
+
+def file_digest(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def collect_source_paths(base_dir: str, workbooks: Sequence[str] = ("treasure.xlsx",)) -> List[str]:
+    """List the source files that feed load_data, in a stable order."""
+    paths = []
+    for workbook in workbooks:
+        excel_path = os.path.join(base_dir, workbook)
+        if os.path.exists(excel_path):
+            paths.append(excel_path)
+
+    raw_dir = os.path.join(base_dir, "raw")
+    if os.path.isdir(raw_dir):
+        paths.extend(list_raw_sources(raw_dir))
+    return paths
+
+
+def _json_default(value: Any) -> Any:
+    """Serialize numpy scalars and other stragglers found in object columns."""
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+def _is_string_column(series: pd.Series) -> bool:
+    """True if every non-null value in the column is a Python string."""
+    values = series.dropna()
+    return all(isinstance(v, str) for v in values)
+
+
+def encode_frame(df: pd.DataFrame) -> Tuple[bytes, List[str]]:
+    """Serialize a frame to Arrow IPC file bytes plus its JSON-encoded columns.
+
+    Object columns holding anything but strings (mixed 85 / 0.9 / "85%"
+    values, URL lists) are stored cell by cell as JSON so that exact Python
+    values come back. Raises pa.ArrowException, TypeError or ValueError if
+    the frame cannot be encoded.
+    """
+    columns = {}
+    json_columns = []
+    for column in df.columns:
+        series = df[column]
+        if series.dtype == object and not _is_string_column(series):
+            columns[column] = [json.dumps(v, default=_json_default) for v in series]
+            json_columns.append(column)
+        else:
+            columns[column] = series
+
+    table = pa.Table.from_pandas(pd.DataFrame(columns), preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes(), json_columns
+
+
+def decode_frame(path: str, json_columns: Sequence[str] = ()) -> pd.DataFrame:
+    """Memory-map an Arrow IPC file written by encode_frame back into a frame.
+
+    Raises OSError or pa.ArrowException if the file is missing or damaged.
+    """
+    with pa.memory_map(path, 'r') as source:
+        table = pa.ipc.open_file(source).read_all()
+    return _table_to_frame(table, json_columns)
+
+
+def decode_buffer(buffer: Any, json_columns: Sequence[str] = ()) -> pd.DataFrame:
+    """Decode encode_frame bytes held in an Arrow buffer (e.g. a slice of a mapped file)."""
+    table = pa.ipc.open_file(pa.BufferReader(buffer)).read_all()
+    return _table_to_frame(table, json_columns)
+
+
+def _table_to_frame(table: Any, json_columns: Sequence[str]) -> pd.DataFrame:
+    df = table.to_pandas()
+    for column in json_columns:
+        df[column] = pd.Series([json.loads(v) for v in df[column]], index=df.index, dtype=object)
+    return df
+
+
+def write_atomic(directory: str, path: str, data: bytes) -> None:
+    """Write data to path via a temporary file in directory and a rename."""
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class DatasetSnapshot:
+    """Columnar (Arrow IPC) snapshot of the fully processed treasure frame.
+
+    The snapshot is keyed on a fingerprint of the source paths and their
+    content hashes. Each source's mtime and size are recorded too, so an
+    unchanged tree is validated with a single ``stat`` per file and content
+    is only re-hashed for files whose mtime moved.
+    """
+
+    def __init__(self, base_dir: str, cache_dir: str = DEFAULT_CACHE_DIR,
+                 name: str = "dataset"):
+        self.base_dir = base_dir
+        self.cache_dir = os.path.join(base_dir, cache_dir)
+        self.name = name
+        self.manifest_path = os.path.join(self.cache_dir, f"{name}.manifest.json")
+        # Manifest of the last snapshot successfully loaded or saved
+        self.manifest: Optional[Dict[str, Any]] = None
+
+    def _relpath(self, path: str) -> str:
+        return os.path.relpath(path, self.base_dir).replace(os.sep, '/')
+
+    def _read_manifest(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get("version") != SNAPSHOT_FORMAT_VERSION:
+            return None
+        return manifest
+
+    def _write_atomic(self, path: str, data: bytes) -> None:
+        write_atomic(self.cache_dir, path, data)
+
+    def _write_manifest(self, manifest: Dict[str, Any]) -> None:
+        payload = json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8')
+        self._write_atomic(self.manifest_path, payload)
+
+    @staticmethod
+    def fingerprint(sources: Dict[str, Dict[str, Any]], settings: Optional[Dict[str, Any]] = None) -> str:
+        """Combine source paths, content hashes and load settings into one key."""
+        digest = hashlib.sha256(f"v{SNAPSHOT_FORMAT_VERSION}".encode())
+        for rel_path in sorted(sources):
+            digest.update(rel_path.encode('utf-8'))
+            digest.update(sources[rel_path]["sha256"].encode('ascii'))
+        digest.update(json.dumps(settings or {}, sort_keys=True, default=str).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _snapshot_path(self, fingerprint: str) -> str:
+        return os.path.join(self.cache_dir, f"{self.name}-{fingerprint[:16]}.arrow")
+
+    def describe_sources(self, source_paths: List[str],
+                         known: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Dict[str, Any]]:
+        """Stat every source, re-hashing only files whose mtime or size moved."""
+        known = known or {}
+        sources = {}
+        for path in source_paths:
+            rel_path = self._relpath(path)
+            stat = os.stat(path)
+            previous = known.get(rel_path)
+            if previous and previous["mtime_ns"] == stat.st_mtime_ns and previous["size"] == stat.st_size:
+                sha256 = previous["sha256"]
+            else:
+                sha256 = file_digest(path)
+            sources[rel_path] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": sha256}
+        return sources
+
+    def load(self, source_paths: List[str], settings: Optional[Dict[str, Any]] = None) -> Optional[pd.DataFrame]:
+        """Return the snapshot frame if it is still fresh, otherwise None."""
+        if pa is None:
+            return None
+        manifest = self._read_manifest()
+        if manifest is None:
+            return None
+
+        known = manifest.get("sources", {})
+        if sorted(known) != sorted(self._relpath(p) for p in source_paths):
+            return None
+
+        try:
+            sources = self.describe_sources(source_paths, known)
+        except OSError:
+            return None
+        fingerprint = self.fingerprint(sources, settings)
+        if fingerprint != manifest.get("fingerprint"):
+            return None
+
+        try:
+            df = decode_frame(self._snapshot_path(fingerprint), manifest.get("json_columns", []))
+        except (OSError, pa.ArrowException):
+            return None
+
+        # Content matched but mtimes moved (e.g. fresh checkout): record the
+        # new mtimes so the next start can skip hashing again.
+        if sources != known:
+            manifest["sources"] = sources
+            try:
+                self._write_manifest(manifest)
+            except OSError:
+                pass
+        self.manifest = manifest
+        return df
+
+    def save(self, df: pd.DataFrame, source_paths: List[str], settings: Optional[Dict[str, Any]] = None,
+             row_ranges: Optional[Dict[str, Tuple[int, int]]] = None) -> bool:
+        """Persist the processed frame; returns False if it cannot be encoded.
+
+        row_ranges optionally maps each source path to the (start, stop) rows
+        it contributed, so a reloader can later replace one source's rows.
+        """
+        if pa is None:
+            return False
+        try:
+            sources = self.describe_sources(source_paths)
+        except OSError:
+            return False
+
+        try:
+            payload, json_columns = encode_frame(df)
+        except (pa.ArrowException, TypeError, ValueError):
+            return False
+
+        fingerprint = self.fingerprint(sources, settings)
+        snapshot_path = self._snapshot_path(fingerprint)
+        try:
+            self._write_atomic(snapshot_path, payload)
+            manifest = {
+                "version": SNAPSHOT_FORMAT_VERSION,
+                "fingerprint": fingerprint,
+                "sources": sources,
+                "json_columns": json_columns,
+                "rows": len(df),
+                "row_ranges": {self._relpath(path): list(rows) for path, rows in (row_ranges or {}).items()},
+            }
+            self._write_manifest(manifest)
+        except OSError:
+            return False
+        self.manifest = manifest
+
+        # Drop snapshots compiled from older versions of the sources
+        for entry in os.listdir(self.cache_dir):
+            entry_path = os.path.join(self.cache_dir, entry)
+            if entry.startswith(f"{self.name}-") and entry.endswith('.arrow') and entry_path != snapshot_path:
+                try:
+                    os.remove(entry_path)
+                except OSError:
+                    pass
+        return True
+
+
+class WorkbookCache:
+    """Arrow IPC copies of a workbook's sheets, keyed by its content hash.
+
+    Each sheet is stored as ``<workbook>-<hash>-<n>.arrow`` and the sheet
+    list as ``<workbook>-<hash>.json``, written last so a half-written entry
+    is never read. Parsing the XLSX is the slowest step of a cold start, so
+    an unchanged workbook is only hashed and memory-mapped back.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+
+    def _prefix(self, excel_path: str, sha256: str) -> str:
+        stem = os.path.splitext(os.path.basename(excel_path))[0]
+        return os.path.join(self.cache_dir, f"{stem}-{sha256[:16]}")
+
+    def load(self, excel_path: str, sha256: str) -> Optional[List[Tuple[str, pd.DataFrame]]]:
+        """Return [(sheet name, frame)] cached for this workbook content, or None."""
+        if pa is None:
+            return None
+        prefix = self._prefix(excel_path, sha256)
+        try:
+            with open(f"{prefix}.json", 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            if entry.get("version") != WORKBOOK_CACHE_VERSION or entry.get("sha256") != sha256:
+                return None
+            return [(sheet["name"], decode_frame(f"{prefix}-{i}.arrow", sheet["json_columns"]))
+                    for i, sheet in enumerate(entry["sheets"])]
+        except (OSError, ValueError, KeyError, pa.ArrowException):
+            return None
+
+    def save(self, excel_path: str, sha256: str, sheets: List[Tuple[str, pd.DataFrame]]) -> bool:
+        """Store the parsed sheets; returns False if they cannot be encoded."""
+        if pa is None:
+            return False
+        prefix = self._prefix(excel_path, sha256)
+        entry = {"version": WORKBOOK_CACHE_VERSION, "sha256": sha256, "sheets": []}
+        try:
+            for i, (name, df) in enumerate(sheets):
+                if not all(isinstance(column, str) for column in df.columns):
+                    # Arrow would turn them into strings and the read-back
+                    # frame would no longer match a fresh parse
+                    return False
+                payload, json_columns = encode_frame(df)
+                write_atomic(self.cache_dir, f"{prefix}-{i}.arrow", payload)
+                entry["sheets"].append({"name": name, "json_columns": json_columns})
+            write_atomic(self.cache_dir, f"{prefix}.json", json.dumps(entry, indent=2).encode('utf-8'))
+        except (OSError, pa.ArrowException, TypeError, ValueError):
+            return False
+
+        # Drop entries converted from older versions of the same workbook
+        stem = os.path.splitext(os.path.basename(excel_path))[0]
+        entry_pattern = re.compile(re.escape(stem) + r"-([0-9a-f]{16})(-\d+\.arrow|\.json)")
+        for name in os.listdir(self.cache_dir):
+            match = entry_pattern.fullmatch(name)
+            if match and match.group(1) != sha256[:16]:
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+        return True
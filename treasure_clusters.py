@@ -0,0 +1,131 @@
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from treasure_style import DEFAULT_COLOR, POSITION_DECIMALS, VALUE_COLORS, VALUE_COLUMN
+
+
+# Web Mercator stops at this latitude; points beyond it are clustered at the edge
+MAX_MERCATOR_LATITUDE = 85.05112878
+
+# Width of the whole map in pixels at zoom 0, as deck.gl counts them
+WORLD_PIXELS = 512
+
+
+class ClusterLevel(NamedTuple):
+    """The clusters of one zoom level, one entry per cluster."""
+    positions: np.ndarray    # (k, 2) mean [longitude, latitude] of the members
+    counts: np.ndarray       # members per cluster
+    top_ranks: np.ndarray    # rank of the highest value tier among the members, 0 = first tier
+    first_rows: np.ndarray   # frame position of one member, for labels and details
+
+
+def _spread_bits(values: np.ndarray) -> np.ndarray:
+    """Put the low 32 bits of each value on the even bits of a uint64."""
+    v = values.astype(np.uint64) & np.uint64(0xFFFFFFFF)
+    for shift, mask in ((16, 0x0000FFFF0000FFFF), (8, 0x00FF00FF00FF00FF), (4, 0x0F0F0F0F0F0F0F0F),
+                        (2, 0x3333333333333333), (1, 0x5555555555555555)):
+        v = (v | (v << np.uint64(shift))) & np.uint64(mask)
+    return v
+
+
+def mercator_cells(longitudes: np.ndarray, latitudes: np.ndarray, bits: int) -> np.ndarray:
+    """Z-order code of the Web Mercator grid cell of each point, 2**bits cells a side.
+
+    The cell at bits - 1 that contains a cell is its code >> 2, so sorting by
+    the finest code makes the members of every coarser cell contiguous.
+    """
+    lat = np.radians(np.clip(latitudes, -MAX_MERCATOR_LATITUDE, MAX_MERCATOR_LATITUDE))
+    x = (np.asarray(longitudes, dtype=np.float64) + 180.0) / 360.0
+    y = (1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / np.pi) / 2.0
+    side = 2 ** bits
+    cx = np.clip(np.floor(x * side), 0, side - 1).astype(np.uint64)
+    cy = np.clip(np.floor(y * side), 0, side - 1).astype(np.uint64)
+    return _spread_bits(cx) | (_spread_bits(cy) << np.uint64(1))
+
+
+class ClusterIndex:
+    """Hierarchical grid clusters of a treasure frame for every zoom level.
+
+    At zoom z the world is WORLD_PIXELS * 2**z pixels wide and is cut into square
+    cells of cell_pixels; the points in a cell form one cluster with their
+    count, mean position and highest Treasure Value tier. Cells nest, so
+    each level merges the clusters of the level below it. Every level from
+    0 to max_zoom is built at once, from one sort of the points, when the
+    index is created; above max_zoom the map draws individual points.
+    Instances are never mutated and can be shared between sessions.
+    """
+
+    def __init__(self, frame: pd.DataFrame, max_zoom: int = 8, cell_pixels: int = 64,
+                 tiers: Sequence[str] = tuple(VALUE_COLORS)):
+        if not 1 <= cell_pixels <= WORLD_PIXELS or cell_pixels & (cell_pixels - 1):
+            raise ValueError(f"cell_pixels must be a power of two up to {WORLD_PIXELS}, not {cell_pixels}")
+        # Cells across the world at zoom 0, as a power of two
+        cell_bits = WORLD_PIXELS.bit_length() - cell_pixels.bit_length()
+        if max_zoom + cell_bits > 31:
+            raise ValueError(f"max_zoom {max_zoom} is too deep for {cell_pixels}-pixel cells")
+        self.frame = frame
+        self.max_zoom = max_zoom
+        self.cell_pixels = cell_pixels
+        self.tiers = list(tiers)
+
+        longitudes = frame["longitude"].to_numpy(dtype=np.float64)
+        latitudes = frame["latitude"].to_numpy(dtype=np.float64)
+        rows = np.flatnonzero(~(np.isnan(longitudes) | np.isnan(latitudes)))
+        codes = mercator_cells(longitudes[rows], latitudes[rows], max_zoom + cell_bits)
+        order = np.argsort(codes, kind="stable")
+        rows, codes = rows[order], codes[order]
+        longitudes, latitudes = longitudes[rows], latitudes[rows]
+        ranks = self._tier_ranks(frame)[rows]
+
+        self.levels: Dict[int, ClusterLevel] = {}
+        for zoom in range(max_zoom + 1):
+            keys = codes >> np.uint64(2 * (max_zoom - zoom))
+            # Sorted by the finest code, each cluster is a run of equal keys
+            starts = np.flatnonzero(np.concatenate([keys[:1] == keys[:1], keys[1:] != keys[:-1]]))
+            counts = np.diff(np.append(starts, len(keys)))
+            positions = np.column_stack([np.add.reduceat(longitudes, starts) / counts,
+                                         np.add.reduceat(latitudes, starts) / counts])
+            self.levels[zoom] = ClusterLevel(positions, counts, np.minimum.reduceat(ranks, starts), rows[starts])
+
+    def _tier_ranks(self, frame: pd.DataFrame) -> np.ndarray:
+        """Rank of each row's tier; values outside the tiers rank last."""
+        if VALUE_COLUMN not in frame.columns:
+            return np.full(len(frame), len(self.tiers), dtype=np.int16)
+        codes, uniques = pd.factorize(frame[VALUE_COLUMN])
+        lookup = {tier: rank for rank, tier in enumerate(self.tiers)}
+        ranks = np.array([lookup.get(value, len(self.tiers)) for value in uniques] + [len(self.tiers)],
+                         dtype=np.int16)
+        return ranks[codes]
+
+    def level(self, zoom: float) -> Optional[ClusterLevel]:
+        """Clusters to draw at zoom, or None once the map should draw points."""
+        zoom = max(int(np.floor(zoom)), 0)
+        return self.levels.get(zoom) if zoom <= self.max_zoom else None
+
+    def layer_data(self, zoom: float, id_column: str, colors: Dict[str, List[int]] = VALUE_COLORS,
+                   default: List[int] = DEFAULT_COLOR) -> Optional[pd.DataFrame]:
+        """Map layer data of the clusters at zoom, or None once the map should draw points.
+
+        Columns: "position", "color" (of the cluster's highest tier),
+        "radius" (pixels, growing with the log of the count), "count", "id"
+        (frame position of one member) and id_column, the member's name for
+        a single point and "<count> treasures" otherwise, so one tooltip
+        template serves points and clusters.
+        """
+        level = self.level(zoom)
+        if level is None:
+            return None
+        palette = np.array([colors.get(tier, default) for tier in self.tiers] + [default], dtype=np.uint8)
+        names = self.frame[id_column].to_numpy(dtype=object)[level.first_rows]
+        labels = np.where(level.counts == 1, names, [f"{count} treasures" for count in level.counts])
+        radius = np.minimum(4 + 3 * np.log2(level.counts), self.cell_pixels / 2)
+        return pd.DataFrame({
+            "position": np.round(level.positions, POSITION_DECIMALS).tolist(),
+            "color": palette[level.top_ranks].tolist(),
+            "radius": np.round(radius, 1).tolist(),
+            "count": level.counts.tolist(),
+            "id": level.first_rows.tolist(),
+            id_column: labels.tolist(),
+        })
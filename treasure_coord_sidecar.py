@@ -0,0 +1,144 @@
+"""Compile every coordinate string in the data files into decimal lat/lon.
+
+Usage: python treasure_coord_sidecar.py [--base-dir DIR] [--sidecar PATH] [--force]
+"""
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from treasure_cache import DEFAULT_CACHE_DIR, collect_source_paths, file_digest, write_atomic
+from treasure_coords import COORDINATE_CACHE, CoordinateCache, coordinate_key, parse_coordinates
+from treasure_formats import iter_json_records, read_records
+from treasure_ingest import COORDINATE_COLUMN, EXCEL_EXTENSIONS, STREAMING_THRESHOLD_BYTES, read_workbook_sheets
+
+
+# Bump whenever parse_coordinates changes what a string parses to
+SIDECAR_VERSION = 2
+
+# Sidecar path, relative to the app directory
+DEFAULT_SIDECAR_PATH = os.path.join(DEFAULT_CACHE_DIR, "coordinates.json")
+
+
+def iter_coordinate_values(path: str) -> Iterator[Any]:
+    """Every value of the coordinate column in one workbook or raw/ file."""
+    if os.path.splitext(path)[1].lower() in EXCEL_EXTENSIONS:
+        for _, df in read_workbook_sheets(path):
+            if COORDINATE_COLUMN in df.columns:
+                yield from df[COORDINATE_COLUMN]
+    elif path.lower().endswith('.json') and os.path.getsize(path) > STREAMING_THRESHOLD_BYTES:
+        for record in iter_json_records(path):
+            yield record.get(COORDINATE_COLUMN)
+    else:
+        _, records = read_records(path)
+        for record in records:
+            yield record.get(COORDINATE_COLUMN)
+
+
+def _source_entry(path: str) -> Dict[str, Any]:
+    stat = os.stat(path)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def read_sidecar(path: str) -> Optional[Dict[str, Any]]:
+    """The sidecar at path, or None when it is missing, unreadable or outdated."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            sidecar = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(sidecar, dict) or sidecar.get("version") != SIDECAR_VERSION:
+        return None
+    return sidecar
+
+
+def is_fresh(sidecar: Dict[str, Any], base_dir: str, workbooks: Sequence[str] = ("treasure.xlsx",)) -> bool:
+    """True if the sidecar was compiled from exactly the current source files."""
+    current = {}
+    for path in collect_source_paths(base_dir, workbooks):
+        try:
+            current[os.path.relpath(path, base_dir)] = _source_entry(path)
+        except OSError:
+            return False
+    recorded = {name: {"mtime_ns": entry["mtime_ns"], "size": entry["size"]}
+                for name, entry in sidecar.get("sources", {}).items()}
+    return current == recorded
+
+
+def compile_sidecar(base_dir: str, sidecar_path: str = DEFAULT_SIDECAR_PATH,
+                    workbooks: Sequence[str] = ("treasure.xlsx",)) -> Dict[str, Any]:
+    """Parse every distinct coordinate string once and write the sidecar.
+
+    The sidecar maps each string (see coordinate_key) to [lat, lon], or
+    null when it does not parse, and records the size, mtime and SHA-256 of
+    every source it was compiled from. Files that fail to read are listed
+    under "errors" and left out. Returns the sidecar.
+    """
+    sidecar_path = os.path.join(base_dir, sidecar_path)
+    sources = {}
+    errors = {}
+    coordinates: Dict[str, Optional[List[float]]] = {}
+    for path in collect_source_paths(base_dir, workbooks):
+        name = os.path.relpath(path, base_dir)
+        try:
+            entry = dict(_source_entry(path), sha256=file_digest(path))
+            keys = {coordinate_key(value) for value in iter_coordinate_values(path)}
+        except Exception as e:
+            errors[name] = f"Error processing {os.path.basename(path)}: {e}"
+            continue
+        sources[name] = entry
+        for key in keys - coordinates.keys() - {None}:
+            lat, lon = parse_coordinates(key)
+            coordinates[key] = None if lat is None else [lat, lon]
+
+    sidecar = {"version": SIDECAR_VERSION, "sources": sources, "errors": errors, "coordinates": coordinates}
+    write_atomic(os.path.dirname(sidecar_path), sidecar_path,
+                 json.dumps(sidecar, ensure_ascii=False, sort_keys=True).encode('utf-8'))
+    return sidecar
+
+
+def apply_sidecar(base_dir: str, sidecar_path: str = DEFAULT_SIDECAR_PATH,
+                  cache: CoordinateCache = COORDINATE_CACHE,
+                  workbooks: Sequence[str] = ("treasure.xlsx",)) -> bool:
+    """Serve the sidecar's results from cache ahead of any parsing.
+
+    Returns True when the sidecar is fresh, in which case no coordinate in
+    the current files needs parsing. A stale sidecar is still applied, since
+    a string always parses the same way; only strings added since it was
+    compiled get parsed. Process pool workers have their own cache and do
+    not see it.
+    """
+    sidecar = read_sidecar(os.path.join(base_dir, sidecar_path))
+    if sidecar is None:
+        cache.use_compiled({})
+        return False
+    cache.use_compiled({key: (None, None) if value is None else tuple(value)
+                        for key, value in sidecar["coordinates"].items()})
+    return is_fresh(sidecar, base_dir, workbooks) and not sidecar.get("errors")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-dir", default=os.path.dirname(os.path.abspath(__file__)),
+                        help="App directory containing treasure.xlsx and raw/ (default: this directory)")
+    parser.add_argument("--sidecar", default=DEFAULT_SIDECAR_PATH, help="Output file, relative to --base-dir")
+    parser.add_argument("--force", action="store_true", help="Recompile even if the sidecar is fresh")
+    args = parser.parse_args(argv)
+
+    sidecar_path = os.path.join(args.base_dir, args.sidecar)
+    sidecar = read_sidecar(sidecar_path)
+    if not args.force and sidecar is not None and not sidecar.get("errors") and is_fresh(sidecar, args.base_dir):
+        print(f"{sidecar_path} is up to date")
+        return 0
+
+    sidecar = compile_sidecar(args.base_dir, args.sidecar)
+    for error in sidecar["errors"].values():
+        print(error, file=sys.stderr)
+    print(f"Compiled {len(sidecar['coordinates'])} coordinate strings from "
+          f"{len(sidecar['sources'])} files into {sidecar_path}")
+    return 1 if sidecar["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
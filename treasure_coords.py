@@ -0,0 +1,421 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - pyarrow ships with streamlit
+    pa = None
+
+
+# Coordinate formats, in order of precedence for both parsers below
+# "12.345, -67.890"
+DECIMAL_PAIR_PATTERN = r"(-?\d+\.?\d*)[,\s]+(-?\d+\.?\d*)"
+# "53°21'N, 4°14'W"
+DMS_PATTERN = r"(\d+)°(\d+)'([NS])[,\s]+(\d+)°(\d+)'([EW])"
+# "55.2415° N, 6.5167° W"
+DECIMAL_DIRECTION_PATTERN = r"(\d+\.?\d*)°\s*([NS])[,\s]+(\d+\.?\d*)°\s*([EW])"
+# "54° 16' 25\" N, 5° 40' 36\" W"
+DMS_SECONDS_PATTERN = r"(\d+)°\s*(\d+)'\s*(\d+)\"?\s*([NS])[,\s]+(\d+)°\s*(\d+)'\s*(\d+)\"?\s*([EW])"
+# "54.32° N, 5.72° W" - anything this matches, DECIMAL_DIRECTION_PATTERN
+# matches first, so it never decides a result on its own
+SIMPLE_DECIMAL_PATTERN = r"(\d+\.\d+)°\s*([NS])[,\s]+(\d+\.\d+)°\s*([EW])"
+
+# Values longer than this (after stripping whitespace) are rejected by both
+# parsers without being scanned; real coordinates are under 30 characters.
+# None lifts the limit.
+MAX_COORDINATE_LENGTH = 256
+
+# The scalar parser's grammars match exactly what the patterns above match,
+# rewritten so a backtracking search is linear in the input. "\d+\.?\d*" is
+# "\d+(?:\.\d*)?" without the ambiguity between its two digit runs, and a
+# match never starts inside a run of digits: one starting mid-run implies
+# an earlier one from the start of that run, so (?<!\d) only skips work.
+_DECIMAL_PAIR = re.compile(r"(-?(?<!\d)\d+(?:\.\d*)?)[,\s]+(-?\d+(?:\.\d*)?)")
+_DMS = re.compile(r"(?<!\d)(\d+)°(\d+)'([NS])[,\s]+(\d+)°(\d+)'([EW])")
+_DECIMAL_DIRECTION = re.compile(r"(?<!\d)(\d+(?:\.\d*)?)°\s*([NS])[,\s]+(\d+(?:\.\d*)?)°\s*([EW])")
+_DMS_SECONDS = re.compile(
+    r"(?<!\d)(\d+)°\s*(\d+)'\s*(\d+)\"?\s*([NS])[,\s]+(\d+)°\s*(\d+)'\s*(\d+)\"?\s*([EW])")
+
+
+def _from_decimal_pair(match):
+    lat = float(match.group(1))
+    lon = float(match.group(2))
+    # Basic validation for lat/lon ranges
+    if -90 <= lat <= 90 and -180 <= lon <= 180:
+        return lat, lon
+    # If values are swapped, try to correct them
+    if -90 <= lon <= 90 and -180 <= lat <= 180:
+        return lon, lat
+    # Neither way round fits; let the other formats have a go
+    return None
+
+
+def _from_dms(match):
+    lat_deg, lat_min, lat_dir, lon_deg, lon_min, lon_dir = match.groups()
+    lat = int(lat_deg) + (int(lat_min) / 60)
+    if lat_dir == 'S':
+        lat = -lat
+    lon = int(lon_deg) + (int(lon_min) / 60)
+    if lon_dir == 'W':
+        lon = -lon
+    return lat, lon
+
+
+def _from_decimal_direction(match):
+    lat, lat_dir, lon, lon_dir = match.groups()
+    lat = float(lat)
+    if lat_dir == 'S':
+        lat = -lat
+    lon = float(lon)
+    if lon_dir == 'W':
+        lon = -lon
+    return lat, lon
+
+
+def _from_dms_seconds(match):
+    lat_deg, lat_min, lat_sec, lat_dir, lon_deg, lon_min, lon_sec, lon_dir = match.groups()
+    lat = int(lat_deg) + (int(lat_min) / 60) + (int(lat_sec) / 3600)
+    if lat_dir == 'S':
+        lat = -lat
+    lon = int(lon_deg) + (int(lon_min) / 60) + (int(lon_sec) / 3600)
+    if lon_dir == 'W':
+        lon = -lon
+    return lat, lon
+
+
+# Every match of a grammar contains its probe, so a string the probe misses
+# can skip that grammar's search without changing the result
+# Text before the separator in a decimal pair ends in a digit, or a digit and "."
+_PAIR_PROBE = re.compile(r"\d\.?[,\s]")
+_DIRECTION_PROBE = re.compile(r"°\s*[NS]")
+
+_PAIR_ONLY = ((_DECIMAL_PAIR, _from_decimal_pair),)
+
+# (pair probe, DMS probe, direction probe, DMS-with-seconds probe) -> the
+# grammars worth searching, in precedence order
+_GRAMMARS = {
+    (pair, dms, direction, seconds): (_PAIR_ONLY if pair else ())
+    + (((_DMS, _from_dms),) if dms else ())
+    + (((_DECIMAL_DIRECTION, _from_decimal_direction),) if direction else ())
+    + (((_DMS_SECONDS, _from_dms_seconds),) if seconds else ())
+    for pair in (False, True) for dms in (False, True)
+    for direction in (False, True) for seconds in (False, True)
+}
+
+
+def _too_long(text):
+    return MAX_COORDINATE_LENGTH is not None and len(text) > MAX_COORDINATE_LENGTH and \
+        len(text.strip()) > MAX_COORDINATE_LENGTH
+
+
+def _grammars_for(text):
+    """Sniff text and pick the grammars worth searching."""
+    # Every format but the decimal pair needs a degree sign and both hemispheres
+    if '°' not in text or not ('N' in text or 'S' in text) or not ('E' in text or 'W' in text):
+        return _PAIR_ONLY
+    return _GRAMMARS[_PAIR_PROBE.search(text) is not None, "'N" in text or "'S" in text,
+                     _DIRECTION_PROBE.search(text) is not None, "'" in text]
+
+
+def parse_coordinates(coord_str):
+    """Parse coordinates from various string formats to latitude and longitude.
+
+    The string is sniffed first, so only the precompiled grammars it could
+    match are searched; a decimal pair like "12.3, 45.6" costs one search.
+    Parse time is linear in the length of the value, which is capped at
+    MAX_COORDINATE_LENGTH.
+    """
+    if isinstance(coord_str, str):
+        if coord_str == "":
+            return None, None
+    elif pd.isna(coord_str):
+        return None, None
+    else:
+        # Convert to string if not already
+        coord_str = str(coord_str)
+    if _too_long(coord_str):
+        return None, None
+
+    try:
+        for grammar, convert in _grammars_for(coord_str):
+            match = grammar.search(coord_str)
+            if match:
+                coordinates = convert(match)
+                if coordinates is not None:
+                    return coordinates
+    except (ValueError, IndexError):
+        pass
+
+    return None, None
+
+
+_GRAMMAR_NAMES = {
+    _DECIMAL_PAIR: "decimal_pair",
+    _DMS: "dms",
+    _DECIMAL_DIRECTION: "decimal_direction",
+    _DMS_SECONDS: "dms_seconds",
+}
+
+# Format names classify_coordinates can report, in precedence order
+COORDINATE_FORMATS = tuple(_GRAMMAR_NAMES.values())
+
+
+def classify_coordinates(coord_str: str) -> Tuple[Optional[str], bool]:
+    """Which format parse_coordinates(coord_str) resolves through, and whether
+    it swapped latitude and longitude; (None, False) if it does not parse."""
+    if _too_long(coord_str):
+        return None, False
+    try:
+        for grammar, convert in _grammars_for(coord_str):
+            match = grammar.search(coord_str)
+            if match:
+                coordinates = convert(match)
+                if coordinates is not None:
+                    swapped = grammar is _DECIMAL_PAIR and coordinates[0] != float(match.group(1))
+                    return _GRAMMAR_NAMES[grammar], swapped
+    except (ValueError, IndexError):
+        pass
+    return None, False
+
+
+def _named_groups(pattern):
+    """RE2 (pyarrow) extraction needs every capturing group to be named."""
+    count = iter(range(100))
+    return re.sub(r"\((?!\?)", lambda _: f"(?P<g{next(count)}>", pattern)
+
+
+# Rows where RE2 and Python's re could disagree: non-ASCII digits or
+# whitespace (anything non-ASCII but the degree sign), \v and the ASCII
+# separators Python counts as whitespace, and digit runs too long to
+# convert exactly. These rows go through parse_coordinates instead.
+_SCALAR_ONLY_PATTERN = r"[^\x00-\x7f°]|[\x0b\x1c-\x1f]|\d{16,}"
+
+
+def parse_coordinate_series(coords: pd.Series):
+    """Parse a whole column of coordinate strings at once.
+
+    Returns (latitudes, longitudes) float arrays with NaN where the value
+    cannot be parsed. Each format's regex runs once, as an Arrow compute
+    kernel, over the rows still unresolved, in the same order and with the
+    same rules as parse_coordinates, so the results are identical row for
+    row.
+    """
+    values = pd.Series(coords, dtype=object).reset_index(drop=True)
+    latitudes = np.full(len(values), np.nan)
+    longitudes = np.full(len(values), np.nan)
+    if pa is None:
+        for row, value in enumerate(values):
+            lat, lon = parse_coordinates(value)
+            if lat is not None:
+                latitudes[row], longitudes[row] = lat, lon
+        return latitudes, longitudes
+
+    missing = (values.isna() | (values == "")).to_numpy().copy()
+    texts = values.where(~missing, None)
+    not_str = texts.map(lambda v: v is not None and not isinstance(v, str)).to_numpy(dtype=bool)
+    if not_str.any():
+        texts[not_str] = texts[not_str].map(str)
+    strings = pa.array(texts, type=pa.string(), from_pandas=True)
+
+    if MAX_COORDINATE_LENGTH is not None:
+        # Cheap length check in Arrow; only rows over the limit are stripped in Python
+        over = pc.greater(pc.utf8_length(strings), MAX_COORDINATE_LENGTH).fill_null(False)
+        long_rows = np.flatnonzero(over.to_numpy(zero_copy_only=False))
+        missing[long_rows[[_too_long(texts[row]) for row in long_rows]]] = True
+
+    pending = np.flatnonzero(~missing)
+    scalar_only = pc.match_substring_regex(strings.take(pending), _SCALAR_ONLY_PATTERN).to_numpy(zero_copy_only=False)
+    for row in pending[scalar_only]:
+        lat, lon = parse_coordinates(values[row])
+        if lat is not None:
+            latitudes[row], longitudes[row] = lat, lon
+    pending = pending[~scalar_only]
+
+    def extract(pattern, rows):
+        """(positions in rows that matched, {group number: string array})."""
+        match = pc.extract_regex(strings.take(rows), _named_groups(pattern))
+        matched = match.is_valid().to_numpy(zero_copy_only=False)
+        match = match.filter(matched)
+        groups = {int(field.name[1:]): match.field(i) for i, field in enumerate(match.type)}
+        return np.flatnonzero(matched), groups
+
+    def number(groups, *indices):
+        return [pc.cast(groups[i], pa.float64()).to_numpy() for i in indices]
+
+    def signed(value, direction, negative):
+        return np.where(pc.equal(direction, negative).to_numpy(zero_copy_only=False), -value, value)
+
+    def resolve(rows, at, lat, lon):
+        latitudes[rows[at]] = lat
+        longitudes[rows[at]] = lon
+        unresolved = np.ones(len(rows), dtype=bool)
+        unresolved[at] = False
+        return rows[unresolved]
+
+    if len(pending):
+        at, groups = extract(DECIMAL_PAIR_PATTERN, pending)
+        lat, lon = number(groups, 0, 1)
+        in_range = (lat >= -90) & (lat <= 90) & (lon >= -180) & (lon <= 180)
+        # If values are swapped, correct them; rows that fit neither way fall through
+        swapped = ~in_range & (lon >= -90) & (lon <= 90) & (lat >= -180) & (lat <= 180)
+        rows = np.concatenate([at[in_range], at[swapped]])
+        pending = resolve(pending, rows, np.concatenate([lat[in_range], lon[swapped]]),
+                          np.concatenate([lon[in_range], lat[swapped]]))
+
+    if len(pending):
+        at, groups = extract(DMS_PATTERN, pending)
+        lat_deg, lat_min, lon_deg, lon_min = number(groups, 0, 1, 3, 4)
+        pending = resolve(pending, at, signed(lat_deg + lat_min / 60, groups[2], 'S'),
+                          signed(lon_deg + lon_min / 60, groups[5], 'W'))
+
+    if len(pending):
+        at, groups = extract(DECIMAL_DIRECTION_PATTERN, pending)
+        lat, lon = number(groups, 0, 2)
+        pending = resolve(pending, at, signed(lat, groups[1], 'S'), signed(lon, groups[3], 'W'))
+
+    if len(pending):
+        at, groups = extract(DMS_SECONDS_PATTERN, pending)
+        lat_deg, lat_min, lat_sec, lon_deg, lon_min, lon_sec = number(groups, 0, 1, 2, 4, 5, 6)
+        resolve(pending, at, signed(lat_deg + lat_min / 60 + lat_sec / 3600, groups[3], 'S'),
+                signed(lon_deg + lon_min / 60 + lon_sec / 3600, groups[7], 'W'))
+
+    return latitudes, longitudes
+
+
+
+# Distinct coordinate strings remembered by the shared cache below
+COORDINATE_CACHE_SIZE = 20000
+
+Coordinates = Tuple[Optional[float], Optional[float]]
+
+
+def coordinate_key(coord_str) -> Optional[str]:
+    """Cache key for a coordinate value: its text with surrounding whitespace
+    stripped, which never changes what parses; None for missing values."""
+    if not isinstance(coord_str, str):
+        if pd.isna(coord_str):
+            return None
+        coord_str = str(coord_str)
+    return coord_str.strip()
+
+
+class CoordinateCache:
+    """Bounded LRU memo in front of parse_coordinates.
+
+    Keys come from coordinate_key(). Missing values are answered without
+    touching the cache. A table of compiled results (see use_compiled) is
+    consulted first and never evicted. Safe to share between threads, and
+    so between Streamlit sessions; parsing itself happens outside the lock.
+    """
+
+    def __init__(self, maxsize: int = COORDINATE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Coordinates]" = OrderedDict()
+        self._compiled: Dict[str, Coordinates] = {}
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def parse(self, coord_str) -> Coordinates:
+        """parse_coordinates(coord_str), from the cache when it was seen before."""
+        key = coordinate_key(coord_str)
+        if key is None:
+            return None, None
+
+        with self._lock:
+            coordinates = self._lookup(key)
+            if coordinates is not None:
+                self._hits += 1
+                return coordinates
+            self._misses += 1
+
+        coordinates = parse_coordinates(key)
+        with self._lock:
+            self._entries[key] = coordinates
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+        return coordinates
+
+    def parse_many(self, coords) -> Tuple[np.ndarray, np.ndarray]:
+        """parse_coordinate_series over a column, parsing only strings not cached yet."""
+        latitudes = np.full(len(coords), np.nan)
+        longitudes = np.full(len(coords), np.nan)
+        missing: Dict[str, list] = {}
+        with self._lock:
+            for row, coord_str in enumerate(coords):
+                key = coordinate_key(coord_str)
+                if key is None:
+                    continue
+                coordinates = self._lookup(key)
+                if coordinates is None:
+                    missing.setdefault(key, []).append(row)
+                    continue
+                self._hits += 1
+                if coordinates[0] is not None:
+                    latitudes[row], longitudes[row] = coordinates
+            # Repeats of a missing string within the column count as hits
+            self._misses += len(missing)
+            self._hits += sum(len(rows) - 1 for rows in missing.values())
+        if not missing:
+            return latitudes, longitudes
+
+        keys = list(missing)
+        parsed_lat, parsed_lon = parse_coordinate_series(pd.Series(keys, dtype=object))
+        with self._lock:
+            for key, lat, lon in zip(keys, parsed_lat.tolist(), parsed_lon.tolist()):
+                rows = missing[key]
+                if np.isnan(lat):
+                    self._entries[key] = (None, None)
+                else:
+                    self._entries[key] = (lat, lon)
+                    latitudes[rows] = lat
+                    longitudes[rows] = lon
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+        return latitudes, longitudes
+
+    def _lookup(self, key: str) -> Optional[Coordinates]:
+        # Callers hold the lock
+        coordinates = self._compiled.get(key)
+        if coordinates is None:
+            coordinates = self._entries.get(key)
+            if coordinates is not None:
+                self._entries.move_to_end(key)
+        return coordinates
+
+    def use_compiled(self, coordinates: Dict[str, Coordinates]) -> None:
+        """Serve these precomputed results (keyed by coordinate_key) ahead of the LRU."""
+        with self._lock:
+            self._compiled = dict(coordinates)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit, miss and eviction counts since the last clear(), plus the current sizes."""
+        with self._lock:
+            return {"hits": self._hits, "misses": self._misses, "evictions": self._evictions,
+                    "size": len(self._entries), "maxsize": self.maxsize, "compiled": len(self._compiled)}
+
+    def clear(self) -> None:
+        """Forget every cached entry and reset the counters; compiled results stay."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = self._evictions = 0
+
+
+# One cache for the whole process
+COORDINATE_CACHE = CoordinateCache()
+
+
+def parse_coordinates_cached(coord_str) -> Coordinates:
+    """parse_coordinates through the shared COORDINATE_CACHE."""
+    return COORDINATE_CACHE.parse(coord_str)
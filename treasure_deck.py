@@ -0,0 +1,112 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Sequence
+
+import pydeck as pdk
+from pydeck.bindings.json_tools import default_serialize
+
+# Serialized layers kept by a LayerJsonCache, by count and by total JSON size;
+# a 100k point layer is about 12 MB
+LAYER_CACHE_SIZE = 16
+LAYER_CACHE_BYTES = 256 * 1024 * 1024
+
+
+def serialize_layer(layer: pdk.Layer) -> str:
+    """JSON of one layer as Deck.to_json writes it, without the whitespace."""
+    return json.dumps(layer, sort_keys=True, separators=(",", ":"), default=default_serialize)
+
+
+class SplicedDeck(pdk.Deck):
+    """A Deck whose first layers were serialized ahead of time.
+
+    static_layers holds the JSON of layers that do not change between
+    reruns, from serialize_layer. to_json serializes only the view, the
+    settings and the (small) layers passed as layers, and splices the
+    cached JSON in front of them, so a large base layer is neither
+    converted to records nor encoded again.
+    """
+
+    def __init__(self, static_layers: Sequence[str], layers: Optional[Sequence[pdk.Layer]] = None, **kwargs):
+        super().__init__(layers=list(layers or []), **kwargs)
+        self.static_layers = list(static_layers)
+
+    def to_json(self) -> str:
+        # Keep the cached JSON out of pydeck's attribute serialization
+        static_layers = self.__dict__.pop("static_layers")
+        try:
+            spec = json.loads(super().to_json())
+        finally:
+            self.static_layers = static_layers
+        layers = [json.dumps(layer, sort_keys=True) for layer in spec.pop("layers", [])]
+        head = json.dumps(spec, sort_keys=True)[:-1] + (", " if spec else "")
+        return f'{head}"layers": [{", ".join(static_layers + layers)}]}}'
+
+
+class LayerJsonCache:
+    """Bounded LRU of serialized layers, shared between sessions.
+
+    get(key, build) returns the serialize_layer() JSON cached under key,
+    calling build() for a pdk.Layer and serializing it only on a miss.
+    The key must name everything the layer shows, such as the country
+    filter and the version of its files; the selection overlay and the
+    view are not part of a cached layer, and a SplicedDeck adds them on
+    every rerun. Entries are evicted least recently used first, once
+    there are more than maxsize or their JSON adds up to more than
+    max_bytes; a layer larger than max_bytes on its own is returned but
+    not kept. Safe to share between threads; building happens outside
+    the lock.
+    """
+
+    def __init__(self, maxsize: int = LAYER_CACHE_SIZE, max_bytes: int = LAYER_CACHE_BYTES):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: Hashable, build: Callable[[], pdk.Layer]) -> str:
+        """The layer JSON cached under key, built and serialized on first use."""
+        with self._lock:
+            layer_json = self._entries.get(key)
+            if layer_json is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return layer_json
+            self._misses += 1
+
+        layer_json = serialize_layer(build())
+        # serialize_layer escapes non-ASCII text, so one character is one byte
+        size = len(layer_json)
+        if size > self.max_bytes:
+            return layer_json
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._entries[key] = layer_json
+            self._bytes += size
+            while len(self._entries) > self.maxsize or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self._evictions += 1
+        return layer_json
+
+    def stats(self) -> Dict[str, float]:
+        """Hit, miss and eviction counts and hit rate since the last clear(), plus the current sizes."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {"hits": self._hits, "misses": self._misses, "evictions": self._evictions,
+                    "hit_rate": self._hits / lookups if lookups else 0.0,
+                    "size": len(self._entries), "maxsize": self.maxsize,
+                    "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+    def clear(self) -> None:
+        """Forget every cached layer and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._hits = self._misses = self._evictions = 0
@@ -0,0 +1,142 @@
+import math
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from treasure_clusters import MAX_MERCATOR_LATITUDE, WORLD_PIXELS
+from treasure_schema import LIKELIHOOD_COLUMN, likelihood_number
+from treasure_style import POSITION_DECIMALS
+
+# Fill of a hexagon from its count, low to high (deck.gl's default HexagonLayer range)
+DENSITY_COLORS: List[List[int]] = [
+    [1, 152, 189, 160], [73, 227, 206, 170], [216, 254, 181, 180],
+    [254, 237, 177, 190], [254, 173, 84, 200], [209, 55, 78, 210],
+]
+
+SQRT3 = math.sqrt(3)
+
+
+class DensityLevel(NamedTuple):
+    """The hexagon bins of one zoom level, one entry per non-empty bin."""
+    q: np.ndarray          # axial hexagon coordinates
+    r: np.ndarray
+    positions: np.ndarray  # (k, 2) [longitude, latitude] of the bin centers
+    counts: np.ndarray     # treasures per bin
+    weights: np.ndarray    # sum of the treasures' likelihoods, as fractions of 1
+
+
+def likelihood_weights(values: pd.Series) -> np.ndarray:
+    """Likelihoods as fractions of 1; ingest stores every source's likelihood as a percentage."""
+    numbers = pd.to_numeric(values, errors='coerce') if values.dtype != object else \
+        pd.Series([likelihood_number(v) for v in values], index=values.index)
+    weights = numbers.to_numpy(dtype=np.float64, na_value=np.nan) / 100
+    return np.nan_to_num(weights, nan=0.0)
+
+
+def _pixels_to_lonlat(x: np.ndarray, y: np.ndarray, world: float) -> np.ndarray:
+    longitudes = x / world * 360 - 180
+    latitudes = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * y / world))))
+    return np.column_stack([longitudes, latitudes])
+
+
+class DensityIndex:
+    """Hexagonal density bins of a treasure frame for every zoom level.
+
+    At zoom z the map is WORLD_PIXELS * 2**z pixels wide; points are binned
+    into pointy-top hexagons cell_pixels wide in those pixels, so a bin
+    covers the same area of the screen at every zoom. Each bin keeps its
+    count and the sum of its treasures' likelihoods. Every level up to
+    max_zoom is built when the index is created; deeper zooms use the
+    last level. Only bins are ever sent to the browser, so what the map
+    receives depends on the zoom and not on the size of the dataset.
+    Instances are never mutated and can be shared between sessions.
+    """
+
+    def __init__(self, frame: pd.DataFrame, max_zoom: int = 8, cell_pixels: int = 32):
+        self.max_zoom = max_zoom
+        self.cell_pixels = cell_pixels
+        longitudes = frame["longitude"].to_numpy(dtype=np.float64)
+        latitudes = frame["latitude"].to_numpy(dtype=np.float64)
+        keep = ~(np.isnan(longitudes) | np.isnan(latitudes))
+        weights = likelihood_weights(frame[LIKELIHOOD_COLUMN])[keep] if LIKELIHOOD_COLUMN in frame.columns \
+            else np.zeros(int(keep.sum()))
+
+        lat = np.radians(np.clip(latitudes[keep], -MAX_MERCATOR_LATITUDE, MAX_MERCATOR_LATITUDE))
+        # Web Mercator position on a map one pixel wide
+        x = (longitudes[keep] + 180) / 360
+        y = (1 - np.log(np.tan(lat) + 1 / np.cos(lat)) / np.pi) / 2
+
+        self.levels: Dict[int, DensityLevel] = {}
+        for zoom in range(max_zoom + 1):
+            self.levels[zoom] = self._bin(x * WORLD_PIXELS * 2 ** zoom, y * WORLD_PIXELS * 2 ** zoom, weights,
+                                          WORLD_PIXELS * 2 ** zoom)
+
+    def _size(self) -> float:
+        """Hexagon circumradius in pixels."""
+        return self.cell_pixels / SQRT3
+
+    def _bin(self, px: np.ndarray, py: np.ndarray, weights: np.ndarray, world: float) -> DensityLevel:
+        size = self._size()
+        # Fractional axial coordinates, rounded to the nearest hexagon in cube space
+        fq = (SQRT3 / 3 * px - py / 3) / size
+        fr = (2 / 3 * py) / size
+        fs = -fq - fr
+        q, r, s = np.round(fq), np.round(fr), np.round(fs)
+        dq, dr, ds = np.abs(q - fq), np.abs(r - fr), np.abs(s - fs)
+        fix_q = (dq > dr) & (dq > ds)
+        fix_r = ~fix_q & (dr > ds)
+        q = np.where(fix_q, -r - s, q).astype(np.int64)
+        r = np.where(fix_r, -q - s, r).astype(np.int64)
+
+        codes, uniques = pd.factorize(q * (1 << 32) + (r + (1 << 31)))
+        counts = np.bincount(codes, minlength=len(uniques))
+        sums = np.bincount(codes, weights=weights, minlength=len(uniques))
+        bin_q = np.asarray(uniques) >> 32
+        bin_r = (np.asarray(uniques) & 0xFFFFFFFF) - (1 << 31)
+        centers = _pixels_to_lonlat(size * SQRT3 * (bin_q + bin_r / 2), size * 1.5 * bin_r, world)
+        return DensityLevel(bin_q, bin_r, centers, counts, sums)
+
+    def level(self, zoom: float) -> DensityLevel:
+        """Bins drawn at zoom; zooms past max_zoom use the last level."""
+        return self.levels[min(max(int(np.floor(zoom)), 0), self.max_zoom)]
+
+    def hexagons(self, zoom: float, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """(k, 7, 2) closed [longitude, latitude] outlines of the bins at zoom."""
+        level_zoom = min(max(int(np.floor(zoom)), 0), self.max_zoom)
+        level = self.levels[level_zoom]
+        q, r = (level.q, level.r) if mask is None else (level.q[mask], level.r[mask])
+        size = self._size()
+        cx, cy = size * SQRT3 * (q + r / 2), size * 1.5 * r
+        angles = np.radians(30 + 60 * np.arange(7))
+        px = cx[:, None] + size * np.cos(angles)[None, :]
+        py = cy[:, None] + size * np.sin(angles)[None, :]
+        world = WORLD_PIXELS * 2 ** level_zoom
+        return _pixels_to_lonlat(px.ravel(), py.ravel(), world).reshape(len(q), 7, 2)
+
+    def layer_data(self, zoom: float, label_column: str, mask: Optional[np.ndarray] = None,
+                   outlines: bool = True) -> pd.DataFrame:
+        """Map layer data of the bins at zoom, optionally only those in mask.
+
+        Columns: "position" (bin center), "count", "weight" (likelihood
+        sum), "color" (from DENSITY_COLORS on a log scale of the count),
+        label_column ("<count> treasures", for the tooltip) and, with
+        outlines, "polygon" (the hexagon's corners).
+        """
+        level = self.level(zoom)
+        positions, counts, weights = level.positions, level.counts, level.weights
+        if mask is not None:
+            positions, counts, weights = positions[mask], counts[mask], weights[mask]
+        shades = np.log1p(counts) / np.log1p(counts.max()) if len(counts) else counts.astype(float)
+        colors = np.array(DENSITY_COLORS, dtype=np.uint8)[np.minimum((shades * len(DENSITY_COLORS)).astype(int),
+                                                                     len(DENSITY_COLORS) - 1)]
+        data = pd.DataFrame({
+            "position": np.round(positions, POSITION_DECIMALS).tolist(),
+            "count": counts.tolist(),
+            "weight": np.round(weights, 3).tolist(),
+            "color": colors.reshape(-1, 4).tolist(),
+            label_column: [f"{count} treasures" for count in counts],
+        })
+        if outlines:
+            data["polygon"] = np.round(self.hexagons(zoom, mask), POSITION_DECIMALS).tolist()
+        return data
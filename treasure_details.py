@@ -0,0 +1,71 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence
+
+import pandas as pd
+
+# Records kept by a DetailStore; a record is one row, so this bounds memory by rows looked at
+DETAIL_CACHE_SIZE = 1024
+
+
+class DetailStore:
+    """Server-side text of the map points, looked up by their transported "id".
+
+    With MapStyle(transport_columns=[]) a point sends the browser only its
+    position, color, radius and "id" (its row position in the frame); the
+    tooltip fields and detail panel of a clicked point are resolved here
+    instead. get(id) turns the row into a {column: value} record through a
+    bounded LRU, so repeat lookups of popular treasures skip the frame.
+    Safe to share between threads, and so between Streamlit sessions.
+    """
+
+    def __init__(self, frame: pd.DataFrame, columns: Optional[Sequence[str]] = None,
+                 maxsize: int = DETAIL_CACHE_SIZE):
+        self.frame = frame
+        self.columns = list(frame.columns) if columns is None else [c for c in columns if c in frame.columns]
+        self.maxsize = maxsize
+        self._positions = [frame.columns.get_loc(column) for column in self.columns]
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, row_id: Any) -> Optional[Dict[str, Any]]:
+        """The record of the row behind a transported id, or None for an id not in the frame."""
+        try:
+            row = int(row_id)
+        except (TypeError, ValueError):
+            return None
+        if not 0 <= row < len(self.frame):
+            return None
+
+        with self._lock:
+            record = self._entries.get(row)
+            if record is not None:
+                self._entries.move_to_end(row)
+                self._hits += 1
+                return record
+            self._misses += 1
+
+        values = self.frame.iloc[row, self._positions]
+        record = dict(zip(self.columns, values.tolist()))
+        with self._lock:
+            self._entries[row] = record
+            self._entries.move_to_end(row)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+        return record
+
+    def stats(self) -> Dict[str, int]:
+        """Hit, miss and eviction counts since the last clear(), plus the current sizes."""
+        with self._lock:
+            return {"hits": self._hits, "misses": self._misses, "evictions": self._evictions,
+                    "size": len(self._entries), "maxsize": self.maxsize}
+
+    def clear(self) -> None:
+        """Forget every cached record and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = self._evictions = 0
@@ -0,0 +1,285 @@
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+# Largest single JSON value (a treasure record, in characters) the streaming
+# reader buffers; a value still unfinished past this is a malformed or
+# truncated file, not a record
+MAX_JSON_VALUE_CHARS = 16 * 1024 * 1024
+
+
+class FormatAdapter(ABC):
+    """Base class for raw/ source file formats.
+
+    An adapter names the file extensions it reads, a decode step from raw
+    bytes to a document, a cheap sniff of the decoded document, and the
+    extraction of treasure records from it. Adapters sharing a decode
+    function see the same decoded document, so each file is read and
+    decoded once however many adapters are tried. An adapter missing any of
+    the three cannot be instantiated, and so cannot be registered.
+    """
+
+    name = "base"
+    extensions: Tuple[str, ...] = ()
+
+    @staticmethod
+    @abstractmethod
+    def decode(raw: bytes) -> Any:
+        """The document encoded in a file's raw bytes."""
+
+    @abstractmethod
+    def sniff(self, document: Any) -> bool:
+        """Whether a decoded document is in this format."""
+
+    @abstractmethod
+    def records(self, document: Any) -> List[Dict[str, Any]]:
+        """The treasure records of a document this adapter sniffed."""
+
+
+def decode_json(raw: bytes) -> Any:
+    """Decode a JSON document from raw file bytes."""
+    return json.loads(raw)
+
+
+def _require_records(rows: Any) -> List[Dict[str, Any]]:
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise ValueError("Treasure data must be a list of objects")
+    return rows
+
+
+class TablesJsonFormat(FormatAdapter):
+    """Wrapper format with the rows under tables[0].data (Italy.json style)."""
+
+    name = "json-tables"
+    extensions = ('.json',)
+    decode = staticmethod(decode_json)
+
+    def sniff(self, document: Any) -> bool:
+        return isinstance(document, dict) and 'tables' in document
+
+    def records(self, document: Any) -> List[Dict[str, Any]]:
+        return _require_records(document['tables'][0]['data'])
+
+
+class ArrayJsonFormat(FormatAdapter):
+    """Direct array of treasure objects (Spain.json style)."""
+
+    name = "json-array"
+    extensions = ('.json',)
+    decode = staticmethod(decode_json)
+
+    def sniff(self, document: Any) -> bool:
+        return isinstance(document, list)
+
+    def records(self, document: Any) -> List[Dict[str, Any]]:
+        return _require_records(document)
+
+
+# Adapters are tried in order; the first whose sniff matches wins
+FORMAT_REGISTRY: List[FormatAdapter] = [TablesJsonFormat(), ArrayJsonFormat()]
+
+
+def register_format(adapter: FormatAdapter, first: bool = False) -> None:
+    """Add a source format, e.g. CSV or GeoJSON, without touching the loader."""
+    if not isinstance(adapter, FormatAdapter):
+        raise TypeError(f"Source formats must be FormatAdapter instances, not {type(adapter).__name__}")
+    if not adapter.extensions:
+        raise ValueError(f"Format {adapter.name!r} names no file extensions")
+    if first:
+        FORMAT_REGISTRY.insert(0, adapter)
+    else:
+        FORMAT_REGISTRY.append(adapter)
+
+
+def registered_extensions() -> Tuple[str, ...]:
+    """File extensions that at least one registered adapter can read."""
+    extensions = []
+    for adapter in FORMAT_REGISTRY:
+        for extension in adapter.extensions:
+            if extension not in extensions:
+                extensions.append(extension)
+    return tuple(extensions)
+
+
+def list_raw_sources(raw_dir: str) -> List[str]:
+    """Paths of the readable country files in raw_dir, in sorted name order."""
+    extensions = registered_extensions()
+    names = sorted(f for f in os.listdir(raw_dir) if os.path.splitext(f)[1].lower() in extensions)
+    return [os.path.join(raw_dir, f) for f in names]
+
+
+def parse_records(raw: bytes, extension: str) -> Tuple[str, List[Dict[str, Any]]]:
+    """Sniff already-read file bytes and return (format name, records)."""
+    decoded: Dict[Callable[[bytes], Any], Any] = {}
+    for adapter in FORMAT_REGISTRY:
+        if extension not in adapter.extensions:
+            continue
+        if adapter.decode not in decoded:
+            decoded[adapter.decode] = adapter.decode(raw)
+        document = decoded[adapter.decode]
+        if adapter.sniff(document):
+            return adapter.name, adapter.records(document)
+    raise ValueError(f"No registered format recognises this {extension or 'extensionless'} file")
+
+
+def read_records(path: str) -> Tuple[str, List[Dict[str, Any]]]:
+    """Read a source file once and return (format name, records)."""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    return parse_records(raw, os.path.splitext(path)[1].lower())
+
+
+class _JsonTokenStream:
+    """Incremental reader over a JSON text file for walking arrays lazily.
+
+    Only the unread tail of the file is buffered: values are decoded one at
+    a time with JSONDecoder.raw_decode and the consumed prefix is dropped,
+    so memory stays around chunk_size plus the largest single value. A
+    value that has not decoded within max_value_size characters raises
+    ValueError instead of buffering the rest of the file.
+    """
+
+    def __init__(self, f, chunk_size: int, max_value_size: int = MAX_JSON_VALUE_CHARS):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.max_value_size = max_value_size
+        self.buf = ''
+        self.pos = 0
+        self.dropped = 0  # characters consumed and dropped from the front of buf
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _read_more(self, size: int) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(size)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop everything already consumed before growing the buffer
+        self.dropped += self.pos
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character without consuming it ('' at EOF)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._read_more(self.chunk_size):
+                return ''
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected '{char}' in JSON stream, found '{found or 'end of file'}'")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value."""
+        self.peek()
+        read_size = self.chunk_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                pending = len(self.buf) - self.pos
+                if pending >= self.max_value_size:
+                    raise ValueError(f"JSON value at character {self.dropped + self.pos} is not complete within "
+                                     f"{self.max_value_size} characters; the file is malformed or truncated")
+                if not self._read_more(min(read_size, self.max_value_size - pending)):
+                    raise
+                read_size *= 2
+                continue
+            # A number or literal ending exactly at the buffer edge may be cut
+            # short ("12" of "123"); make sure a delimiter follows it
+            if end == len(self.buf) and self._read_more(read_size):
+                read_size *= 2
+                continue
+            self.pos = end
+            return value
+
+    def iter_array(self) -> Iterator[Any]:
+        """Yield the elements of the array starting at the cursor, one at a time."""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            separator = self.peek()
+            self.pos += 1
+            if separator == ']':
+                return
+            if separator != ',':
+                raise ValueError(f"Expected ',' or ']' in JSON array, found '{separator or 'end of file'}'")
+
+    def iter_object_keys(self) -> Iterator[str]:
+        """Yield each key of the object at the cursor, leaving it positioned at the value.
+
+        The caller must consume the value (value(), iter_array(), ...) before
+        asking for the next key.
+        """
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            yield key
+            separator = self.peek()
+            self.pos += 1
+            if separator == '}':
+                return
+            if separator != ',':
+                raise ValueError(f"Expected ',' or '}}' in JSON object, found '{separator or 'end of file'}'")
+
+
+def _iter_table_records(stream: _JsonTokenStream) -> Iterator[Dict[str, Any]]:
+    """Walk {"tables": [{"data": [...]}, ...]} and yield tables[0].data lazily."""
+    for key in stream.iter_object_keys():
+        if key != 'tables':
+            stream.value()
+            continue
+        stream.expect('[')
+        if stream.peek() != '{':
+            raise ValueError("JSON 'tables' entry has no table object")
+        for table_key in stream.iter_object_keys():
+            if table_key != 'data':
+                stream.value()
+                continue
+            for record in stream.iter_array():
+                if not isinstance(record, dict):
+                    raise ValueError("Treasure data must be a list of objects")
+                yield record
+        # Like the in-memory adapter, only the first table holds treasure
+        # rows, so nothing after it needs to be read
+        return
+    raise ValueError("JSON object has no 'tables' entry")
+
+
+def iter_json_records(path: str, chunk_size: int = 64 * 1024,
+                      max_value_size: int = MAX_JSON_VALUE_CHARS) -> Iterator[Dict[str, Any]]:
+    """Stream treasure records from a country JSON file of any size.
+
+    Handles both the direct array format and the tables[0].data wrapper,
+    sniffed from the first character, without loading the document. A
+    record longer than max_value_size characters raises ValueError.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        stream = _JsonTokenStream(f, chunk_size, max_value_size)
+        first = stream.peek()
+        if first == '[':
+            for record in stream.iter_array():
+                if not isinstance(record, dict):
+                    raise ValueError("Treasure data must be a list of objects")
+                yield record
+        elif first == '{':
+            yield from _iter_table_records(stream)
+        else:
+            raise ValueError(f"Unrecognised JSON treasure file: starts with '{first or 'end of file'}'")
@@ -0,0 +1,114 @@
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+# Approximate bounding box of every Area the data uses, keyed like the raw/
+# file names and workbook sheets. A box whose lon_min is greater than its
+# lon_max wraps across the antimeridian.
+COUNTRY_BOUNDARIES: Dict[str, Dict[str, float]] = {
+    # Northern Hemisphere countries
+    'Denmark': {'lat_min': 54.5, 'lat_max': 57.5, 'lon_min': 8.0, 'lon_max': 15.5},
+    'France': {'lat_min': 41.3, 'lat_max': 51.1, 'lon_min': -5.1, 'lon_max': 9.6},
+    'Germany': {'lat_min': 47.3, 'lat_max': 55.1, 'lon_min': 5.9, 'lon_max': 15.0},
+    'England': {'lat_min': 49.9, 'lat_max': 55.8, 'lon_min': -6.4, 'lon_max': 1.8},
+    'Scotland': {'lat_min': 54.6, 'lat_max': 60.9, 'lon_min': -8.7, 'lon_max': -0.7},
+    'Wales': {'lat_min': 51.3, 'lat_max': 53.5, 'lon_min': -5.4, 'lon_max': -2.6},
+    'North Ireland': {'lat_min': 54.0, 'lat_max': 55.4, 'lon_min': -8.2, 'lon_max': -5.4},
+    'Ireland': {'lat_min': 51.4, 'lat_max': 55.4, 'lon_min': -10.5, 'lon_max': -5.4},
+    'Italy': {'lat_min': 35.5, 'lat_max': 47.1, 'lon_min': 6.6, 'lon_max': 18.5},
+    'Portugal': {'lat_min': 36.9, 'lat_max': 42.2, 'lon_min': -9.5, 'lon_max': -6.2},
+    'Spain': {'lat_min': 35.2, 'lat_max': 43.8, 'lon_min': -9.3, 'lon_max': 4.3},
+    'Netherlands': {'lat_min': 50.7, 'lat_max': 53.6, 'lon_min': 3.3, 'lon_max': 7.3},
+    'Sweden': {'lat_min': 55.3, 'lat_max': 69.1, 'lon_min': 10.9, 'lon_max': 24.2},
+    'Austria': {'lat_min': 46.4, 'lat_max': 49.0, 'lon_min': 9.5, 'lon_max': 17.2},
+    'Hungary': {'lat_min': 45.7, 'lat_max': 48.6, 'lon_min': 16.1, 'lon_max': 22.9},
+    'Poland': {'lat_min': 49.0, 'lat_max': 54.8, 'lon_min': 14.1, 'lon_max': 24.1},
+    'Bulgaria': {'lat_min': 41.2, 'lat_max': 44.2, 'lon_min': 22.4, 'lon_max': 28.6},
+    'Greece': {'lat_min': 34.8, 'lat_max': 41.7, 'lon_min': 19.4, 'lon_max': 29.6},
+    'Morocco': {'lat_min': 27.7, 'lat_max': 35.9, 'lon_min': -13.2, 'lon_max': -1.0},
+    'Libya': {'lat_min': 19.5, 'lat_max': 33.2, 'lon_min': 9.3, 'lon_max': 25.2},
+    'Egypt': {'lat_min': 22.0, 'lat_max': 31.7, 'lon_min': 24.7, 'lon_max': 36.9},
+    'Nigeria': {'lat_min': 4.2, 'lat_max': 13.9, 'lon_min': 2.7, 'lon_max': 14.7},
+    'Ghana': {'lat_min': 4.7, 'lat_max': 11.2, 'lon_min': -3.3, 'lon_max': 1.2},
+    'Ethiopia': {'lat_min': 3.4, 'lat_max': 14.9, 'lon_min': 33.0, 'lon_max': 48.0},
+    'Afghanistan': {'lat_min': 29.4, 'lat_max': 38.5, 'lon_min': 60.5, 'lon_max': 74.9},
+    'India': {'lat_min': 6.7, 'lat_max': 35.7, 'lon_min': 68.1, 'lon_max': 97.4},
+    'Thailand': {'lat_min': 5.6, 'lat_max': 20.5, 'lon_min': 97.3, 'lon_max': 105.7},
+    'China': {'lat_min': 18.2, 'lat_max': 53.6, 'lon_min': 73.5, 'lon_max': 135.1},
+    'SouthKorea': {'lat_min': 33.1, 'lat_max': 38.7, 'lon_min': 124.6, 'lon_max': 131.9},
+    'Japan': {'lat_min': 24.0, 'lat_max': 45.6, 'lon_min': 122.9, 'lon_max': 153.0},
+    'Mexico': {'lat_min': 14.5, 'lat_max': 32.7, 'lon_min': -118.4, 'lon_max': -86.7},
+    'Philippines': {'lat_min': 4.6, 'lat_max': 21.1, 'lon_min': 116.9, 'lon_max': 126.6},
+    'Venezuela': {'lat_min': 0.6, 'lat_max': 12.3, 'lon_min': -73.4, 'lon_max': -59.8},
+    'Guyana': {'lat_min': 1.2, 'lat_max': 8.6, 'lon_min': -61.4, 'lon_max': -56.5},
+    'Suriname': {'lat_min': 1.8, 'lat_max': 6.0, 'lon_min': -58.1, 'lon_max': -53.9},
+
+    # Mixed Northern/Southern Hemisphere countries
+    'Colombia': {'lat_min': -4.2, 'lat_max': 13.4, 'lon_min': -81.8, 'lon_max': -66.9},
+    'Ecuador': {'lat_min': -5.0, 'lat_max': 1.7, 'lon_min': -92.0, 'lon_max': -75.2},
+    'Kenya': {'lat_min': -4.7, 'lat_max': 5.0, 'lon_min': 33.9, 'lon_max': 41.9},
+    'Peru': {'lat_min': -18.4, 'lat_max': -0.0, 'lon_min': -81.3, 'lon_max': -68.7},
+    'Indonesia': {'lat_min': -11.0, 'lat_max': 6.0, 'lon_min': 95.0, 'lon_max': 141.0},
+    'Brazil': {'lat_min': -33.7, 'lat_max': 5.3, 'lon_min': -73.9, 'lon_max': -28.8},
+
+    # Southern Hemisphere countries
+    'Australia': {'lat_min': -43.6, 'lat_max': -10.7, 'lon_min': 113.3, 'lon_max': 153.6},
+    'NewZealand': {'lat_min': -47.3, 'lat_max': -34.4, 'lon_min': 166.4, 'lon_max': 178.5},
+    'Madagascar': {'lat_min': -25.6, 'lat_max': -11.9, 'lon_min': 43.2, 'lon_max': 50.5},
+    'Zimbabwe': {'lat_min': -22.4, 'lat_max': -15.6, 'lon_min': 25.2, 'lon_max': 33.1},
+    'Botswana': {'lat_min': -26.9, 'lat_max': -17.8, 'lon_min': 20.0, 'lon_max': 29.4},
+    'Namibia': {'lat_min': -28.9, 'lat_max': -16.9, 'lon_min': 11.7, 'lon_max': 25.3},
+    'Zambia': {'lat_min': -18.1, 'lat_max': -8.2, 'lon_min': 21.9, 'lon_max': 33.7},
+    'SouthAfrica': {'lat_min': -34.8, 'lat_max': -22.1, 'lon_min': 16.5, 'lon_max': 32.9},
+    'Chile': {'lat_min': -55.9, 'lat_max': -17.5, 'lon_min': -109.5, 'lon_max': -66.4},
+    'Argentina': {'lat_min': -55.1, 'lat_max': -21.8, 'lon_min': -73.6, 'lon_max': -53.6},
+    'Uruguay': {'lat_min': -35.0, 'lat_max': -30.1, 'lon_min': -58.4, 'lon_max': -53.1},
+    'Paraguay': {'lat_min': -27.6, 'lat_max': -19.3, 'lon_min': -62.6, 'lon_max': -54.3},
+    'Bolivia': {'lat_min': -22.9, 'lat_max': -9.7, 'lon_min': -69.6, 'lon_max': -57.5},
+    'Antarctica': {'lat_min': -90.0, 'lat_max': -60.0, 'lon_min': -180.0, 'lon_max': 180.0}
+}
+
+
+def country_bbox(area: str, boundaries: Dict[str, Dict[str, float]] = COUNTRY_BOUNDARIES) -> Optional[list]:
+    """[min_lat, min_lon, max_lat, max_lon] of an Area, or None if it has no box."""
+    bounds = boundaries.get(area)
+    if bounds is None:
+        return None
+    return [bounds['lat_min'], bounds['lon_min'], bounds['lat_max'], bounds['lon_max']]
+
+
+def out_of_bounds(areas: Sequence, latitudes: Sequence[float], longitudes: Sequence[float],
+                  boundaries: Dict[str, Dict[str, float]] = COUNTRY_BOUNDARIES) -> np.ndarray:
+    """Boolean mask of rows lying outside the bounding box of their own Area.
+
+    Works on whole columns at once: each distinct Area is looked up once and
+    its box broadcast to its rows. Rows whose Area has no box are never
+    flagged; rows with a missing latitude or longitude always are.
+    """
+    codes, uniques = pd.factorize(pd.Series(areas, copy=False))
+    # One row of limits per distinct Area, plus a final unbounded row that
+    # the -1 code of a missing Area indexes
+    unbounded = (-np.inf, np.inf, -np.inf, np.inf)
+    limits = np.array([
+        (bounds['lat_min'], bounds['lat_max'], bounds['lon_min'], bounds['lon_max'])
+        if (bounds := boundaries.get(area)) is not None else unbounded
+        for area in uniques
+    ] + [unbounded], dtype=float).reshape(-1, 4)
+    lat_min, lat_max, lon_min, lon_max = limits[codes].T
+
+    lat = np.asarray(latitudes, dtype=float)
+    lon = np.asarray(longitudes, dtype=float)
+    inside_lat = (lat >= lat_min) & (lat <= lat_max)
+    inside_lon = np.where(lon_min <= lon_max,
+                          (lon >= lon_min) & (lon <= lon_max),
+                          (lon >= lon_min) | (lon <= lon_max))
+    return ~(inside_lat & inside_lon)
+
+
+def out_of_bounds_rows(df: pd.DataFrame, boundaries: Dict[str, Dict[str, float]] = COUNTRY_BOUNDARIES) -> pd.DataFrame:
+    """The rows of a combined treasure frame that lie outside their Area's box."""
+    if df.empty:
+        return df
+    return df[out_of_bounds(df["Area"], df["latitude"], df["longitude"], boundaries)]
@@ -0,0 +1,402 @@
+import hashlib
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from treasure_cache import WorkbookCache
+from treasure_coords import COORDINATE_CACHE, parse_coordinates_cached
+from treasure_formats import iter_json_records, list_raw_sources, read_records
+from treasure_parse_stats import PARSE_STATS
+
+
+EXCEL_EXTENSIONS = ('.xlsx', '.xls')
+
+# JSON files larger than this are streamed record by record instead of being
+# decoded whole, and every STREAM_BATCH_RECORDS records become one batch
+STREAMING_THRESHOLD_BYTES = 4 * 1024 * 1024
+STREAM_BATCH_RECORDS = 10000
+# Streamed text columns with at most this many distinct values share one
+# string object per value instead of one per row
+STREAM_SHARED_VALUES = 1024
+
+# Batches with at least this many rows parse coordinates a column at a time;
+# below it the fixed cost of the column kernels outweighs the per-row loop
+COLUMN_PARSE_MIN_ROWS = 1000
+
+COORDINATE_COLUMN = "Coordinates (Approximate)"
+LIKELIHOOD_COLUMN = "Likelihood (%)"
+
+# Columns that every normalized batch carries, with their final dtypes
+DERIVED_COLUMN_DTYPES = {
+    "latitude": np.float64,
+    "longitude": np.float64,
+    "radius": np.int64,
+}
+
+# A normalized record batch maps each column name to a list of values; all
+# lists in one batch have the same length. Batches folded from a streamed
+# file (see merge_streamed_batches) hold the derived columns as 1-d arrays.
+RecordBatch = Dict[str, List[Any]]
+
+# Called with (source name, exception) when a single source fails to load
+ErrorHandler = Callable[[str, Exception], None]
+
+
+def likelihood_radius(value: Any, radius_config: Dict[str, int], fraction_scale: bool = False) -> int:
+    """Map a likelihood value to a point radius.
+
+    Strings like "85%" are always read as percentages. Numbers are read as
+    fractions (0.85) when fraction_scale is set, as in the Excel workbook,
+    and as percentages (85) otherwise, as in the JSON files.
+    """
+    if pd.isna(value):
+        return radius_config["low"]
+    if isinstance(value, str):
+        value = float(value.strip('%'))
+        scale = 1
+    elif isinstance(value, (int, float, np.integer, np.floating)):
+        scale = 0.01 if fraction_scale else 1
+    else:
+        return radius_config["low"]
+
+    if value >= 80 * scale:
+        return radius_config["high"]
+    if value >= 60 * scale:
+        return radius_config["medium"]
+    return radius_config["low"]
+
+
+def likelihood_percent(value: Any) -> Any:
+    """A fractional likelihood (0.85) as a percentage (85.0); strings and gaps pass through."""
+    if isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool) and not pd.isna(value):
+        return round(float(value) * 100, 9)
+    return value
+
+
+def records_to_columns(records: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """Pivot a list of record dicts into column lists, filling gaps with NaN."""
+    columns: Dict[str, List[Any]] = {}
+    for index, record in enumerate(records):
+        for key in record:
+            if key not in columns:
+                columns[key] = [np.nan] * index
+        for key, values in columns.items():
+            values.append(record.get(key, np.nan))
+    return columns
+
+
+def normalize_batch(columns: Dict[str, List[Any]], area: str, radius_config: Dict[str, int],
+                    fraction_scale: bool = False, source: Optional[str] = None) -> RecordBatch:
+    """Add Area, latitude, longitude and radius, dropping unparseable rows.
+
+    With fraction_scale, numeric likelihoods are fractions of 1 and are
+    rewritten as percentages, so every batch's likelihood column is on the
+    scale its name says. source names the batch's file (default: area) in
+    the parser statistics.
+    """
+    coord_values = columns[COORDINATE_COLUMN]
+    likelihood_values = columns[LIKELIHOOD_COLUMN]
+
+    started = time.perf_counter()
+    if len(coord_values) >= COLUMN_PARSE_MIN_ROWS:
+        lat_array, lon_array = COORDINATE_CACHE.parse_many(coord_values)
+        keep = np.flatnonzero(~(np.isnan(lat_array) | np.isnan(lon_array))).tolist()
+        latitudes = lat_array[keep].tolist()
+        longitudes = lon_array[keep].tolist()
+    else:
+        keep = []
+        latitudes = []
+        longitudes = []
+        for row, coord_str in enumerate(coord_values):
+            lat, lon = parse_coordinates_cached(coord_str)
+            if lat is None or lon is None:
+                continue
+            keep.append(row)
+            latitudes.append(lat)
+            longitudes.append(lon)
+    if PARSE_STATS.enabled:
+        PARSE_STATS.record_batch(source or area, coord_values, time.perf_counter() - started)
+    radii = [likelihood_radius(likelihood_values[row], radius_config, fraction_scale) for row in keep]
+
+    batch = {name: [values[row] for row in keep] for name, values in columns.items()}
+    if fraction_scale:
+        batch[LIKELIHOOD_COLUMN] = [likelihood_percent(value) for value in batch[LIKELIHOOD_COLUMN]]
+    batch["Area"] = [area] * len(keep)
+    batch["latitude"] = latitudes
+    batch["longitude"] = longitudes
+    batch["radius"] = radii
+    return batch
+
+
+def batch_length(batch: RecordBatch) -> int:
+    """Number of rows in a record batch."""
+    return len(next(iter(batch.values()))) if batch else 0
+
+
+def read_workbook_sheets(excel_path: str, cache_dir: Optional[str] = None) -> List[Tuple[str, pd.DataFrame]]:
+    """Read every sheet of a workbook through one open ExcelFile.
+
+    With cache_dir, the workbook bytes are read once, hashed, and the sheets
+    come from the converted WorkbookCache entry for that hash when there is
+    one; otherwise they are parsed from the same bytes and cached.
+    """
+    if cache_dir is None:
+        return _parse_workbook(excel_path)
+
+    with open(excel_path, 'rb') as f:
+        raw = f.read()
+    sha256 = hashlib.sha256(raw).hexdigest()
+    cache = WorkbookCache(cache_dir)
+    sheets = cache.load(excel_path, sha256)
+    if sheets is None:
+        sheets = _parse_workbook(io.BytesIO(raw))
+        cache.save(excel_path, sha256, sheets)
+    return sheets
+
+
+def _parse_workbook(source: Any) -> List[Tuple[str, pd.DataFrame]]:
+    # pandas opens XLSX files with openpyxl in read-only mode; parsing each
+    # sheet from the one ExcelFile avoids reopening the workbook per sheet
+    excel_file = pd.ExcelFile(source)
+    try:
+        return [(sheet_name, excel_file.parse(sheet_name)) for sheet_name in excel_file.sheet_names]
+    finally:
+        excel_file.close()
+
+
+def iter_excel_batches(excel_path: str, radius_config: Dict[str, int],
+                       cache_dir: Optional[str] = None) -> Iterator[RecordBatch]:
+    """Yield one normalized batch per sheet of a treasure workbook."""
+    for sheet_name, df in read_workbook_sheets(excel_path, cache_dir):
+        source = f"{os.path.basename(excel_path)}:{sheet_name}"
+        PARSE_STATS.begin(source)
+        # Excel stores likelihood as a fraction of 1
+        yield normalize_batch(df.to_dict('list'), sheet_name, radius_config, fraction_scale=True, source=source)
+
+
+def load_record_file(path: str, radius_config: Dict[str, int]) -> RecordBatch:
+    """Read, sniff and normalize one country file from raw/.
+
+    The file is read and decoded once; the format registry picks the
+    adapter. This is the unit of work handed to ingest pool workers, so it
+    only touches its own file and returns plain lists.
+    """
+    _, records = read_records(path)
+
+    # Area is the filename without its extension
+    area_name = os.path.splitext(os.path.basename(path))[0]
+    PARSE_STATS.begin(os.path.basename(path))
+    return normalize_batch(records_to_columns(records), area_name, radius_config,
+                           source=os.path.basename(path))
+
+
+def iter_streamed_batches(path: str, radius_config: Dict[str, int],
+                          batch_records: int = STREAM_BATCH_RECORDS) -> Iterator[RecordBatch]:
+    """Normalize a large JSON country file in fixed-size record chunks.
+
+    Records come from the incremental reader, so the raw document is never
+    held in memory; only the current chunk and the normalized batches are.
+    """
+    area_name = os.path.splitext(os.path.basename(path))[0]
+    chunk: List[Dict[str, Any]] = []
+    PARSE_STATS.begin(os.path.basename(path))
+
+    def flush() -> RecordBatch:
+        columns = records_to_columns(chunk)
+        # A chunk may lack a column other chunks have; treat it as blank here
+        for name in (COORDINATE_COLUMN, LIKELIHOOD_COLUMN):
+            columns.setdefault(name, [np.nan] * len(chunk))
+        return normalize_batch(columns, area_name, radius_config, source=os.path.basename(path))
+
+    for record in iter_json_records(path):
+        chunk.append(record)
+        if len(chunk) >= batch_records:
+            yield flush()
+            chunk = []
+    if chunk:
+        yield flush()
+
+
+def merge_streamed_batches(batches: Iterable[RecordBatch]) -> List[RecordBatch]:
+    """Fold streamed chunks into a single batch as each one arrives.
+
+    The derived columns of a chunk are packed into numpy arrays right away,
+    repeated strings of low-cardinality columns (see STREAM_SHARED_VALUES)
+    are shared, and the chunk is dropped, so apart from the rows kept only
+    one chunk of records is alive at a time, rather than every chunk's lists
+    at once. Columns a chunk lacks are filled with NaN, as in assemble_frame.
+    """
+    columns: Dict[str, List[Any]] = {}
+    arrays: Dict[str, List[np.ndarray]] = {}
+    shared: Dict[str, Optional[Dict[str, str]]] = {}
+    order: Dict[str, None] = {}
+    rows = 0
+    for batch in batches:
+        for name, values in batch.items():
+            order.setdefault(name)
+            if name in DERIVED_COLUMN_DTYPES:
+                arrays.setdefault(name, []).append(np.asarray(values, dtype=DERIVED_COLUMN_DTYPES[name]))
+                continue
+            memo = shared.setdefault(name, {})
+            if memo is not None:
+                values = [memo.setdefault(value, value) if isinstance(value, str) else value for value in values]
+                if len(memo) > STREAM_SHARED_VALUES:
+                    # Mostly distinct values; sharing would only add a dict entry per row
+                    shared[name] = None
+            columns.setdefault(name, [np.nan] * rows).extend(values)
+        rows += batch_length(batch)
+        for values in columns.values():
+            values.extend([np.nan] * (rows - len(values)))
+    if not order:
+        return []
+    return [{name: np.concatenate(arrays[name]) if name in arrays else columns[name] for name in order}]
+
+
+def _is_large_json(path: str) -> bool:
+    if not path.lower().endswith('.json'):
+        return False
+    try:
+        return os.path.getsize(path) > STREAMING_THRESHOLD_BYTES
+    except OSError:
+        return False
+
+
+def load_source(path: str, radius_config: Dict[str, int],
+                workbook_cache_dir: Optional[str] = None) -> List[RecordBatch]:
+    """Parse one source file (a workbook or a raw/ country file) into batches."""
+    if os.path.splitext(path)[1].lower() in EXCEL_EXTENSIONS:
+        return list(iter_excel_batches(path, radius_config, workbook_cache_dir))
+    if _is_large_json(path):
+        return merge_streamed_batches(iter_streamed_batches(path, radius_config))
+    return [load_record_file(path, radius_config)]
+
+
+def iter_sources(paths: List[str], radius_config: Dict[str, int],
+                 on_error: Optional[ErrorHandler] = None,
+                 workers: int = 1, executor: str = "thread",
+                 workbook_cache_dir: Optional[str] = None) -> Iterator[Tuple[str, List[RecordBatch]]]:
+    """Yield (path, batches) for each source path, in the order given.
+
+    With workers > 1 the reading, decoding and coordinate parsing run on a
+    thread or process pool (executor="thread" or "process"); results are
+    still yielded in path order and errors are reported from the calling
+    thread, named by file. Workbooks are read through the converted sheet
+    cache in workbook_cache_dir when one is given.
+    """
+    if workers > 1 and len(paths) > 1:
+        pool_class = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+        with pool_class(max_workers=workers) as pool:
+            futures = [pool.submit(load_source, path, radius_config, workbook_cache_dir) for path in paths]
+            yield from _iter_results(zip(paths, (future.result for future in futures)), on_error)
+    else:
+        thunks = (partial(load_source, path, radius_config, workbook_cache_dir) for path in paths)
+        yield from _iter_results(zip(paths, thunks), on_error)
+
+
+def _iter_results(results: Iterable[Tuple[str, Callable[[], List[RecordBatch]]]],
+                  on_error: Optional[ErrorHandler]) -> Iterator[Tuple[str, List[RecordBatch]]]:
+    """Resolve (path, batches thunk) pairs in order, routing failures to on_error."""
+    for path, get_batches in results:
+        try:
+            batches = get_batches()
+        except Exception as e:
+            if on_error is None:
+                raise
+            on_error(os.path.basename(path), e)
+            continue
+        yield path, batches
+
+
+def iter_json_batches(raw_dir: str, radius_config: Dict[str, int],
+                      on_error: Optional[ErrorHandler] = None,
+                      workers: int = 1, executor: str = "thread") -> Iterator[RecordBatch]:
+    """Yield one normalized batch per country file in raw_dir, in name order."""
+    for _, batches in iter_sources(list_raw_sources(raw_dir), radius_config, on_error, workers, executor):
+        yield from batches
+
+
+def iter_dataset_sources(base_dir: str, radius_config: Dict[str, int],
+                         on_error: Optional[ErrorHandler] = None,
+                         workers: int = 1, executor: str = "thread",
+                         workbook_cache_dir: Optional[str] = None) -> Iterator[Tuple[str, List[RecordBatch]]]:
+    """Yield (path, batches) for treasure.xlsx followed by every file in raw/.
+
+    A workbook failure propagates to the caller; per-file raw/ failures go
+    to on_error.
+    """
+    excel_path = os.path.join(base_dir, "treasure.xlsx")
+    yield excel_path, list(iter_excel_batches(excel_path, radius_config, workbook_cache_dir))
+
+    raw_dir = os.path.join(base_dir, "raw")
+    if os.path.exists(raw_dir):
+        yield from iter_sources(list_raw_sources(raw_dir), radius_config, on_error, workers, executor)
+
+
+def iter_dataset_batches(base_dir: str, radius_config: Dict[str, int],
+                         on_error: Optional[ErrorHandler] = None,
+                         workers: int = 1, executor: str = "thread") -> Iterator[RecordBatch]:
+    """Yield batches from treasure.xlsx followed by every file in raw/."""
+    for _, batches in iter_dataset_sources(base_dir, radius_config, on_error, workers, executor):
+        yield from batches
+
+
+def assemble_sources(sources: Iterable[Tuple[str, List[RecordBatch]]]) -> Tuple[pd.DataFrame, Dict[str, Tuple[int, int]]]:
+    """Assemble (path, batches) pairs into one frame plus each path's row range."""
+    batches: List[RecordBatch] = []
+    row_ranges = {}
+    offset = 0
+    for path, source_batches in sources:
+        rows = sum(batch_length(batch) for batch in source_batches)
+        row_ranges[path] = (offset, offset + rows)
+        offset += rows
+        batches.extend(source_batches)
+    return assemble_frame(batches), row_ranges
+
+
+def assemble_frame(batches: Iterable[RecordBatch]) -> pd.DataFrame:
+    """Build the combined frame from record batches in a single pass.
+
+    Column order follows first appearance across batches, and columns a batch
+    lacks are filled with NaN, matching what repeated pd.concat would give
+    without copying the accumulated frame once per source.
+    """
+    batches = list(batches)
+    if not batches:
+        return pd.DataFrame()
+
+    column_order: List[str] = []
+    seen = set()
+    for batch in batches:
+        for name in batch:
+            if name not in seen:
+                seen.add(name)
+                column_order.append(name)
+
+    total_rows = sum(batch_length(batch) for batch in batches)
+    data = {}
+    for name in column_order:
+        dtype = DERIVED_COLUMN_DTYPES.get(name, object)
+        if dtype is object:
+            data[name] = np.full(total_rows, np.nan, dtype=object)
+        else:
+            data[name] = np.empty(total_rows, dtype=dtype)
+
+    offset = 0
+    for batch in batches:
+        rows = batch_length(batch)
+        for name, values in batch.items():
+            column = data[name]
+            if column.dtype == object:
+                # fromiter keeps list cells (URL lists) as single objects
+                column[offset:offset + rows] = np.fromiter(values, dtype=object, count=rows)
+            else:
+                column[offset:offset + rows] = values
+        offset += rows
+
+    return pd.DataFrame(data, columns=column_order).infer_objects()
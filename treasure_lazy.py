@@ -0,0 +1,203 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from treasure_cache import DEFAULT_CACHE_DIR, write_atomic
+from treasure_formats import list_raw_sources
+from treasure_ingest import ErrorHandler, assemble_frame, iter_sources
+
+
+# Bump whenever the summary fields or the parsing rules behind them change
+COUNTRY_MANIFEST_VERSION = 2
+
+
+def summarize_batches(batches: List[Dict[str, List]]) -> Dict[str, Any]:
+    """Row count, bounding box and mean position of one country's batches."""
+    latitudes = [lat for batch in batches for lat in batch["latitude"]]
+    longitudes = [lon for batch in batches for lon in batch["longitude"]]
+    if not latitudes:
+        return {"rows": 0, "bbox": None, "center": None}
+    return {
+        "rows": len(latitudes),
+        # [min_lat, min_lon, max_lat, max_lon]
+        "bbox": [min(latitudes), min(longitudes), max(latitudes), max(longitudes)],
+        "center": [sum(latitudes) / len(latitudes), sum(longitudes) / len(longitudes)],
+    }
+
+
+class LazyCountryDataset:
+    """Treasure rows of the raw/ country files, parsed only when asked for.
+
+    Startup only needs the country manifest: each country's row count,
+    bounding box and mean position, persisted next to the other compiled
+    artifacts and recomputed just for files whose mtime or size moved.
+    A country's full rows are parsed the first time it is requested, or
+    read from a compiled shard when one is current, and kept in an LRU
+    cache of at most max_countries countries. Rows parsed to re-summarize
+    a changed file go into the same cache. Each cached frame remembers the
+    mtime and size of the file it was parsed from and is dropped once the
+    file moves on.
+    """
+
+    def __init__(self, base_dir: str, radius_config: Dict[str, int],
+                 max_countries: int = 8, cache_dir: str = DEFAULT_CACHE_DIR,
+                 workers: int = 1, executor: str = "thread", shard_store: Any = None):
+        self.base_dir = base_dir
+        self.raw_dir = os.path.join(base_dir, "raw")
+        self.radius_config = radius_config
+        self.max_countries = max_countries
+        self.cache_dir = os.path.join(base_dir, cache_dir)
+        self.manifest_path = os.path.join(self.cache_dir, "countries.manifest.json")
+        self.workers = workers
+        self.executor = executor
+        # Optional treasure_shards.ShardStore; countries whose shard is still
+        # current are read from it instead of being parsed
+        self.shard_store = shard_store
+
+        self._lock = threading.Lock()
+        # country -> {"file", "mtime_ns", "size", "rows", "bbox", "center", "error"}
+        self._manifest: Optional[Dict[str, Dict[str, Any]]] = None
+        # country -> (mtime_ns, size, frame) of the file the frame was parsed from
+        self._frames: "OrderedDict[str, Tuple[int, int, pd.DataFrame]]" = OrderedDict()
+
+    def _read_manifest(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if manifest.get("version") != COUNTRY_MANIFEST_VERSION:
+            return {}
+        return manifest.get("countries", {})
+
+    def _write_manifest(self, countries: Dict[str, Dict[str, Any]]) -> None:
+        payload = {"version": COUNTRY_MANIFEST_VERSION, "countries": countries}
+        try:
+            write_atomic(self.cache_dir, self.manifest_path,
+                         json.dumps(payload, indent=2, sort_keys=True).encode('utf-8'))
+        except OSError:
+            pass
+
+    def manifest(self) -> Dict[str, Dict[str, Any]]:
+        """Summary of every country file, re-summarizing only files that changed."""
+        with self._lock:
+            known = self._manifest if self._manifest is not None else self._read_manifest()
+            paths = list_raw_sources(self.raw_dir) if os.path.isdir(self.raw_dir) else []
+
+            countries = {}
+            changed = []
+            for path in paths:
+                country = os.path.splitext(os.path.basename(path))[0]
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entry = known.get(country)
+                if entry and entry["file"] == os.path.basename(path) and \
+                        entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                    countries[country] = entry
+                elif self._has_fresh_shard(country, stat):
+                    shard = self.shard_store.manifest()[country]
+                    countries[country] = {"file": os.path.basename(path), "mtime_ns": stat.st_mtime_ns,
+                                          "size": stat.st_size, "rows": shard["rows"], "bbox": shard["bbox"],
+                                          "center": shard["center"], "error": None}
+                else:
+                    countries[country] = {"file": os.path.basename(path), "mtime_ns": stat.st_mtime_ns,
+                                          "size": stat.st_size, "rows": 0, "bbox": None, "center": None,
+                                          "error": None}
+                    changed.append(path)
+
+            if changed:
+                def record_error(source_name, error):
+                    country = os.path.splitext(source_name)[0]
+                    countries[country]["error"] = f"Error processing {source_name}: {error}"
+
+                for path in changed:
+                    self._frames.pop(os.path.splitext(os.path.basename(path))[0], None)
+                # The parsed rows are cached too, so selecting the country does not parse it again
+                for path, batches in iter_sources(changed, self.radius_config, on_error=record_error,
+                                                  workers=self.workers, executor=self.executor):
+                    country = os.path.splitext(os.path.basename(path))[0]
+                    countries[country].update(summarize_batches(batches))
+                    entry = countries[country]
+                    self._remember(country, entry["mtime_ns"], entry["size"], assemble_frame(batches))
+
+            if changed or countries.keys() != known.keys():
+                self._write_manifest(countries)
+            for country in set(self._frames) - set(countries):
+                del self._frames[country]
+            self._manifest = countries
+            return dict(countries)
+
+    def get(self, country: str) -> pd.DataFrame:
+        """Full rows of one country, parsed on first use and then served from the LRU."""
+        with self._lock:
+            manifest = self._manifest if self._manifest is not None else {}
+        entry = manifest.get(country)
+        if entry is None:
+            manifest = self.manifest()
+            entry = manifest.get(country)
+            if entry is None:
+                raise KeyError(f"Unknown country: {country}")
+
+        path = os.path.join(self.raw_dir, entry["file"])
+        stat = os.stat(path)
+        with self._lock:
+            cached = self._frames.get(country)
+            if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+                self._frames.move_to_end(country)
+                return cached[2]
+
+        # Parse outside the lock so other countries can be served meanwhile
+        if self._has_fresh_shard(country, stat):
+            frame = self.shard_store.load(country)
+            shard = self.shard_store.manifest()[country]
+            summary = {"rows": shard["rows"], "bbox": shard["bbox"], "center": shard["center"]}
+        else:
+            _, batches = next(iter_sources([path], self.radius_config))
+            frame = assemble_frame(batches)
+            summary = summarize_batches(batches)
+
+        with self._lock:
+            if entry["mtime_ns"] != stat.st_mtime_ns or entry["size"] != stat.st_size:
+                # The file changed since the manifest was written; refresh its summary
+                entry = dict(entry, mtime_ns=stat.st_mtime_ns, size=stat.st_size, error=None, **summary)
+                if self._manifest is not None:
+                    self._manifest[country] = entry
+                    self._write_manifest(self._manifest)
+            self._remember(country, stat.st_mtime_ns, stat.st_size, frame)
+        return frame
+
+    def _remember(self, country: str, mtime_ns: int, size: int, frame: pd.DataFrame) -> None:
+        # Callers hold the lock
+        self._frames[country] = (mtime_ns, size, frame)
+        self._frames.move_to_end(country)
+        while len(self._frames) > self.max_countries:
+            self._frames.popitem(last=False)
+
+    def load(self, countries: List[str], on_error: Optional[ErrorHandler] = None) -> pd.DataFrame:
+        """Rows of the given countries, in the order given, as one frame."""
+        frames = []
+        for country in countries:
+            try:
+                frames.append(self.get(country))
+            except Exception as e:
+                if on_error is None:
+                    raise
+                on_error(country, e)
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+    def _has_fresh_shard(self, country: str, stat: os.stat_result) -> bool:
+        return self.shard_store is not None and self.shard_store.is_fresh(country, stat)
+
+    def cached_countries(self) -> List[str]:
+        """Countries whose rows are currently held, least recently used first."""
+        with self._lock:
+            return list(self._frames)
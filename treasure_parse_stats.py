@@ -0,0 +1,117 @@
+import json
+import threading
+from typing import Any, Dict, Iterable
+
+import pandas as pd
+
+from treasure_coords import COORDINATE_FORMATS, classify_coordinates, coordinate_key
+
+
+def _empty_entry() -> Dict[str, Any]:
+    return {"rows": 0, "parsed": 0, "formats": {name: 0 for name in COORDINATE_FORMATS},
+            "missing": 0, "failed": 0, "swapped": 0, "parse_seconds": 0.0}
+
+
+class ParseStats:
+    """Opt-in per-source counters for coordinate parsing.
+
+    For each source (a raw/ file or a workbook sheet) it counts the rows each
+    coordinate format handled, the rows ingest drops because their
+    coordinates are blank ("missing") or do not parse ("failed"), the rows
+    whose latitude and longitude were swapped back, and the time spent
+    parsing. Classifying rows costs a second pass, so nothing is recorded
+    until enable() is called. Loaders call begin() as they start parsing a
+    source, so a re-parsed source (say, an edited file picked up by the
+    reloader) replaces its row counts; only parse time accumulates. Counts
+    are kept by the process that parses; process pool workers keep their own.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._sources: Dict[str, Dict[str, Any]] = {}
+
+    def enable(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+
+    def begin(self, source: str) -> None:
+        """Start a new parse of source: clear its counters but keep its total parse time."""
+        if not self.enabled:
+            return
+        with self._lock:
+            previous = self._sources.get(source)
+            entry = _empty_entry()
+            if previous is not None:
+                entry["parse_seconds"] = previous["parse_seconds"]
+            self._sources[source] = entry
+
+    def record_batch(self, source: str, coord_values: Iterable[Any], parse_seconds: float) -> None:
+        """Classify one batch's coordinate values and add them to source's counters.
+
+        Batches of one parse (the chunks of a streamed file) add up; call
+        begin() first so that a re-parse does not add to the last one.
+        """
+        entry = _empty_entry()
+        for value in coord_values:
+            entry["rows"] += 1
+            key = coordinate_key(value)
+            if not key:
+                entry["missing"] += 1
+                continue
+            name, swapped = classify_coordinates(key)
+            if name is None:
+                entry["failed"] += 1
+                continue
+            entry["parsed"] += 1
+            entry["formats"][name] += 1
+            entry["swapped"] += swapped
+        entry["parse_seconds"] = parse_seconds
+
+        with self._lock:
+            totals = self._sources.setdefault(source, _empty_entry())
+            for field, value in entry.items():
+                if field == "formats":
+                    for name, count in value.items():
+                        totals["formats"][name] += count
+                else:
+                    totals[field] += value
+
+    def sources(self) -> Dict[str, Dict[str, Any]]:
+        """Counters by source, as plain dicts."""
+        with self._lock:
+            return json.loads(json.dumps(self._sources))
+
+    def totals(self) -> Dict[str, Any]:
+        """Counters summed over every source."""
+        totals = _empty_entry()
+        for entry in self.sources().values():
+            for field, value in entry.items():
+                if field == "formats":
+                    for name, count in value.items():
+                        totals["formats"][name] += count
+                else:
+                    totals[field] += value
+        return totals
+
+    def to_frame(self) -> pd.DataFrame:
+        """One row per source, formats as columns, for display."""
+        rows = []
+        for source, entry in sorted(self.sources().items()):
+            row = {"Source": source, "Rows": entry["rows"], "Parsed": entry["parsed"]}
+            row.update(entry["formats"])
+            row.update({"Missing": entry["missing"], "Failed": entry["failed"], "Swapped": entry["swapped"],
+                        "Parse ms": round(entry["parse_seconds"] * 1000, 2)})
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    def to_json(self) -> str:
+        """Every source's counters plus the totals, as a JSON document."""
+        return json.dumps({"sources": self.sources(), "totals": self.totals()}, indent=2, sort_keys=True)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._sources.clear()
+
+
+# One set of counters for the whole process
+PARSE_STATS = ParseStats()
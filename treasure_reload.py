@@ -0,0 +1,240 @@
+import logging
+import os
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from treasure_cache import DatasetSnapshot, collect_source_paths, file_digest
+from treasure_coord_sidecar import apply_sidecar
+from treasure_ingest import assemble_frame, iter_sources
+from treasure_schema import compact_frame
+
+logger = logging.getLogger(__name__)
+
+class DatasetVersion(NamedTuple):
+    """One immutable published state of the live treasure dataset."""
+    number: int
+    frame: pd.DataFrame
+    errors: List[str]
+    reparsed: List[str]   # Source files re-parsed to produce this version
+
+
+class HotReloader:
+    """Keeps a live treasure dataset in sync with its source files.
+
+    Each refresh stats the watched workbooks and raw/*.json files, re-hashes
+    only those whose mtime or size moved, and re-parses only those whose
+    content actually changed. Their rows are spliced between the untouched
+    row ranges of the previous frame, and the result is published as a new
+    DatasetVersion by a single reference swap. Readers call current() and
+    keep using the version they got; it is never mutated. A failed
+    background refresh keeps the last version, is logged, and is held in
+    last_error until a refresh succeeds again.
+    """
+
+    def __init__(self, base_dir: str, radius_config: Dict[str, int],
+                 workbooks: Sequence[str] = ("treasure.xlsx",),
+                 snapshot: Optional[DatasetSnapshot] = None,
+                 settings: Optional[Dict[str, Any]] = None,
+                 workers: int = 1, executor: str = "thread",
+                 workbook_cache_dir: Optional[str] = None, compact: bool = False,
+                 coordinate_sidecar: Optional[str] = None):
+        self.base_dir = base_dir
+        self.radius_config = radius_config
+        self.workbooks = tuple(workbooks)
+        self.snapshot = snapshot
+        self.settings = settings
+        self.workers = workers
+        self.executor = executor
+        # Relative paths are taken from base_dir
+        self.workbook_cache_dir = os.path.join(base_dir, workbook_cache_dir) if workbook_cache_dir else None
+        self.compact = compact
+        # Compiled coordinates (see treasure_coord_sidecar), relative to base_dir
+        self.coordinate_sidecar = coordinate_sidecar
+
+        self._lock = threading.Lock()
+        self._version: Optional[DatasetVersion] = None
+        # Full-schema frame behind the current version; rows are spliced from
+        # it, while readers may get a compact copy (see treasure_schema)
+        self._frame: Optional[pd.DataFrame] = None
+        # path -> {"mtime_ns", "size", "sha256", "rows": (start, stop) or None,
+        #          "columns": [column names], "error": str or None}
+        self._states: Dict[str, Dict[str, Any]] = {}
+        self._stop_event = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        # Why the last background refresh failed; None once one succeeds
+        self.last_error: Optional[str] = None
+
+    def source_paths(self) -> List[str]:
+        """Watched source files that currently exist, workbooks first."""
+        return collect_source_paths(self.base_dir, self.workbooks)
+
+    def current(self) -> DatasetVersion:
+        """The latest published version, loading it on first use."""
+        version = self._version
+        if version is None:
+            version = self.refresh()
+        return version
+
+    def refresh(self) -> DatasetVersion:
+        """Re-parse changed sources and publish a new version if anything moved."""
+        with self._lock:
+            paths = self.source_paths()
+
+            if self._version is None and self.snapshot is not None:
+                version = self._seed_from_snapshot(paths)
+                if version is not None:
+                    return version
+
+            states, changed = self._scan(paths)
+            removed = [path for path in self._states if path not in states]
+            if self._version is not None and not changed and not removed:
+                self._states = states
+                return self._version
+
+            parsed = {path: None for path in changed}
+            if changed and self.coordinate_sidecar is not None:
+                apply_sidecar(self.base_dir, self.coordinate_sidecar, workbooks=self.workbooks)
+            errors = {}
+
+            def record_error(source_name, error):
+                errors[source_name] = f"Error processing {source_name}: {error}"
+
+            for path, batches in iter_sources(changed, self.radius_config, on_error=record_error,
+                                              workers=self.workers, executor=self.executor,
+                                              workbook_cache_dir=self.workbook_cache_dir):
+                parsed[path] = batches
+
+            frame = self._splice(paths, states, parsed, errors)
+            version = DatasetVersion(
+                number=self._version.number + 1 if self._version is not None else 1,
+                frame=self._publishable(frame),
+                errors=[state["error"] for state in states.values() if state["error"]],
+                reparsed=[os.path.basename(path) for path in changed],
+            )
+            self._states = states
+            self._frame = frame
+            # Publishing is a single reference assignment, so readers see
+            # either the old version or the new one, never a partial frame.
+            self._version = version
+
+            if self.snapshot is not None and not version.errors and not frame.empty:
+                row_ranges = {path: state["rows"] for path, state in states.items() if state["rows"]}
+                self.snapshot.save(frame, paths, self.settings, row_ranges)
+            return version
+
+    def _scan(self, paths: List[str]) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+        """Stat every source and return (new states, paths whose content changed)."""
+        states = {}
+        changed = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                previous = self._states.get(path)
+                if previous and previous["mtime_ns"] == stat.st_mtime_ns and previous["size"] == stat.st_size:
+                    states[path] = dict(previous)
+                    continue
+                sha256 = file_digest(path)
+            except OSError:
+                # Deleted between listing and stat; treat as removed
+                continue
+
+            if previous and previous["sha256"] == sha256:
+                states[path] = dict(previous, mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            else:
+                states[path] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": sha256,
+                                "rows": None, "columns": [], "error": None}
+                changed.append(path)
+        return states, changed
+
+    def _splice(self, paths: List[str], states: Dict[str, Dict[str, Any]],
+                parsed: Dict[str, Optional[list]], errors: Dict[str, str]) -> pd.DataFrame:
+        """Build the next frame from reused row ranges and freshly parsed sources."""
+        previous_frame = self._frame
+        pieces = []
+        offset = 0
+        for path in paths:
+            state = states.get(path)
+            if state is None:
+                continue
+
+            if path in parsed:
+                batches = parsed[path]
+                state["error"] = errors.get(os.path.basename(path))
+                piece = assemble_frame(batches) if batches else None
+                state["columns"] = list(piece.columns) if piece is not None else []
+            elif state["rows"] is not None:
+                start, stop = state["rows"]
+                # Only the source's own columns, so a column that disappeared
+                # from the changed files does not linger as all-NaN
+                piece = previous_frame.iloc[start:stop][state["columns"]]
+            else:
+                piece = None
+
+            if piece is not None and len(piece) > 0:
+                state["rows"] = (offset, offset + len(piece))
+                offset += len(piece)
+                pieces.append(piece)
+            else:
+                state["rows"] = None
+
+        if not pieces:
+            return pd.DataFrame()
+        return pd.concat(pieces, ignore_index=True)
+
+    def _seed_from_snapshot(self, paths: List[str]) -> Optional[DatasetVersion]:
+        """Publish the compiled snapshot as version 1 if it is fresh and has row ranges."""
+        frame = self.snapshot.load(paths, self.settings)
+        manifest = self.snapshot.manifest
+        if frame is None or not manifest or "row_ranges" not in manifest:
+            return None
+
+        row_ranges = manifest["row_ranges"]
+        states = {}
+        for path in paths:
+            rel_path = os.path.relpath(path, self.base_dir).replace(os.sep, '/')
+            source = manifest["sources"][rel_path]
+            rows = tuple(row_ranges[rel_path]) if row_ranges.get(rel_path) else None
+            # The snapshot does not record which columns each source had, so
+            # take the ones with any value in its rows
+            columns = list(frame.columns[frame.iloc[rows[0]:rows[1]].notna().any()]) if rows else []
+            states[path] = {"mtime_ns": source["mtime_ns"], "size": source["size"], "sha256": source["sha256"],
+                            "rows": rows, "columns": columns, "error": None}
+
+        self._states = states
+        self._frame = frame
+        self._version = DatasetVersion(number=1, frame=self._publishable(frame), errors=[], reparsed=[])
+        return self._version
+
+    def _publishable(self, frame: pd.DataFrame) -> pd.DataFrame:
+        return compact_frame(frame) if self.compact else frame
+
+    def start(self, interval: float) -> None:
+        """Poll the sources every interval seconds on a daemon thread."""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop_event.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval,),
+                                         name="treasure-reloader", daemon=True)
+        self._watcher.start()
+
+    def stop(self) -> None:
+        """Stop the polling thread started by start()."""
+        self._stop_event.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def _watch(self, interval: float) -> None:
+        while not self._stop_event.wait(interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                # A half-written file must not kill the watcher; the next
+                # poll sees the finished file and retries. A failure that
+                # persists stays visible through last_error and the log.
+                logger.exception("Background refresh of %s failed", self.base_dir)
+                self.last_error = f"{type(e).__name__}: {e}"
+            else:
+                self.last_error = None
@@ -0,0 +1,98 @@
+import sys
+from typing import Any, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - pyarrow ships with streamlit
+    pa = None
+
+
+# Low-cardinality text columns stored as pandas categoricals
+CATEGORY_COLUMNS = ("Area", "Treasure Value")
+# Columns holding a list of strings per row
+URL_LIST_COLUMNS = ("Supporting Evidence URLs",)
+LIKELIHOOD_COLUMN = "Likelihood (%)"
+COORDINATE_COLUMNS = ("latitude", "longitude")
+
+
+def likelihood_number(value: Any) -> float:
+    """Numeric likelihood on the scale it was written in ("65%" -> 65.0)."""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return np.nan
+    try:
+        if isinstance(value, str):
+            return float(value.strip().rstrip('%'))
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _url_list_array(series: pd.Series) -> Any:
+    """Store per-row URL lists as one Arrow list array (flat strings plus offsets)."""
+    lists = [[str(url) for url in value] if isinstance(value, (list, tuple)) else None for value in series]
+    return pd.arrays.ArrowExtensionArray(pa.array(lists, type=pa.list_(pa.string())))
+
+
+def flat_url_lists(series: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (urls, offsets) for a compact URL list column.
+
+    Row i's URLs are urls[offsets[i]:offsets[i + 1]]; rows without a list
+    contribute an empty range.
+    """
+    array = pa.array(series, type=pa.list_(pa.string()), from_pandas=True)
+    array = array.fill_null(pa.scalar([], type=array.type))
+    # Offsets are relative to the buffer; rebase them so slices start at 0
+    offsets = array.offsets.to_numpy().astype(np.int32)
+    urls = array.values.to_numpy(zero_copy_only=False)[offsets[0]:offsets[-1]]
+    return urls, offsets - offsets[0]
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Return a copy of the combined treasure frame in the compact schema.
+
+    Area and Treasure Value become categoricals, coordinates float32, radius
+    the smallest integer type that holds it, likelihood a plain number
+    (a nullable integer when every value is whole, so 95 stays 95),
+    URL lists a single Arrow list column, and any text left in object
+    columns is interned so repeated strings share one object.
+    """
+    if df.empty:
+        return df.copy()
+
+    columns = {}
+    for name in df.columns:
+        series = df[name]
+        if name in CATEGORY_COLUMNS:
+            series = series.astype('category')
+        elif name in COORDINATE_COLUMNS:
+            series = series.astype(np.float32)
+        elif name == "radius":
+            series = pd.to_numeric(series, downcast='integer')
+        elif name == LIKELIHOOD_COLUMN:
+            # float64 rather than float32 so values print as written (0.85, not 0.8500000238)
+            series = pd.Series([likelihood_number(v) for v in series], index=df.index, dtype=np.float64)
+            values = series.dropna()
+            if (values == np.floor(values)).all():
+                series = pd.to_numeric(series.astype('Int64'), downcast='integer')
+        elif name in URL_LIST_COLUMNS and pa is not None:
+            series = pd.Series(_url_list_array(series), index=df.index, name=name)
+        elif series.dtype == object and all(isinstance(v, str) for v in series.dropna()):
+            series = pd.Series([sys.intern(v) if isinstance(v, str) else v for v in series],
+                               index=df.index, dtype=object)
+        columns[name] = series
+    return pd.DataFrame(columns, index=df.index)
+
+
+def frame_memory(df: pd.DataFrame) -> int:
+    """Bytes held by a frame, counting the contents of Python object cells."""
+    total = int(df.memory_usage(index=True, deep=True).sum())
+    for name in df.columns:
+        if df[name].dtype == object:
+            # memory_usage(deep=True) sizes lists but not the strings inside
+            for value in df[name]:
+                if isinstance(value, (list, tuple)):
+                    total += sum(sys.getsizeof(item) for item in value)
+    return total
@@ -1,13 +1,14 @@
 import json
 import re
 import urllib.parse
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, Iterator, List, Optional, Tuple, Any
 
 
 class TreasureDataValidator:
     """Security-focused validator for treasure location data."""
     
-    # Denmark coordinate boundaries for validation
+    # Denmark coordinate boundaries for validation (COUNTRY_BOUNDARIES['Denmark']
+    # in treasure_geo, which holds the boxes of every other country)
     DENMARK_LAT_MIN = 54.5
     DENMARK_LAT_MAX = 57.5  
     DENMARK_LON_MIN = 8.0
@@ -89,22 +90,30 @@ class TreasureDataValidator:
             return False, f"URL parsing error: {str(e)}"
     
     @staticmethod
-    def validate_coordinates(coord_str: str) -> Tuple[bool, Optional[float], Optional[float], str]:
-        """Validate and parse coordinates with Denmark-specific checks."""
+    def validate_coordinates(coord_str: str, country: str = "Denmark") -> Tuple[bool, Optional[float], Optional[float], str]:
+        """Validate and parse coordinates, checking they fall inside the country's bounding box."""
         try:
             # Use the existing coordinate parsing logic
-            from app import parse_coordinates
+            from treasure_coords import parse_coordinates
+            from treasure_geo import COUNTRY_BOUNDARIES
             lat, lon = parse_coordinates(coord_str)
             
             if lat is None or lon is None:
                 return False, None, None, "Failed to parse coordinates"
             
-            # Check if coordinates are within Denmark boundaries
-            if not (TreasureDataValidator.DENMARK_LAT_MIN <= lat <= TreasureDataValidator.DENMARK_LAT_MAX):
-                return False, lat, lon, f"Latitude {lat} outside Denmark bounds"
-            
-            if not (TreasureDataValidator.DENMARK_LON_MIN <= lon <= TreasureDataValidator.DENMARK_LON_MAX):
-                return False, lat, lon, f"Longitude {lon} outside Denmark bounds"
+            # Check if coordinates are within the country's boundaries
+            bounds = COUNTRY_BOUNDARIES.get(country)
+            if bounds is not None:
+                if not (bounds['lat_min'] <= lat <= bounds['lat_max']):
+                    return False, lat, lon, f"Latitude {lat} outside {country} bounds"
+
+                if bounds['lon_min'] <= bounds['lon_max']:
+                    inside_lon = bounds['lon_min'] <= lon <= bounds['lon_max']
+                else:
+                    # The box wraps across the antimeridian
+                    inside_lon = lon >= bounds['lon_min'] or lon <= bounds['lon_max']
+                if not inside_lon:
+                    return False, lat, lon, f"Longitude {lon} outside {country} bounds"
             
             return True, lat, lon, "Valid coordinates"
             
@@ -270,6 +279,28 @@ class TreasureDataValidator:
         is_valid = len(validated_entries) > 0
         return is_valid, validated_entries, errors
 
+    @staticmethod
+    def find_out_of_bounds(df) -> Any:
+        """Rows of a combined treasure frame outside their Area's bounding box, checked in one pass."""
+        from treasure_geo import out_of_bounds_rows
+        return out_of_bounds_rows(df)
+
+    @staticmethod
+    def validate_json_stream(file_path: str) -> Iterator[Tuple[int, bool, Dict[str, Any], List[str]]]:
+        """Validate a JSON file entry by entry without loading it whole.
+
+        Unlike validate_json_file there is no file size or entry count cap;
+        yields (index, is_valid, sanitized_entry, errors) per entry. Path and
+        structure problems raise ValueError.
+        """
+        if '..' in file_path or file_path.startswith('/'):
+            raise ValueError("Invalid file path detected")
+
+        from treasure_formats import iter_json_records
+        for i, entry in enumerate(iter_json_records(file_path)):
+            entry_valid, sanitized_entry, entry_errors = TreasureDataValidator.validate_treasure_entry(entry)
+            yield i, entry_valid, sanitized_entry, entry_errors
+
 
 def secure_load_treasure_data(file_path: str):
     """Securely load and validate treasure data from JSON file."""
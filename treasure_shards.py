@@ -0,0 +1,257 @@
+"""Compile raw/ country files into per-country Arrow shards.
+
+Usage: python treasure_shards.py [--base-dir DIR] [--shard-dir DIR] [--workers N]
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from treasure_cache import DEFAULT_CACHE_DIR, decode_buffer, encode_frame, file_digest, pa, write_atomic
+from treasure_formats import list_raw_sources
+from treasure_ingest import ErrorHandler, assemble_frame, iter_sources
+from treasure_lazy import summarize_batches
+
+
+# Bump whenever the shard or manifest layout, or the parsing rules behind it, change
+SHARD_FORMAT_VERSION = 2
+
+# Shard directory, relative to the app directory
+DEFAULT_SHARD_DIR = os.path.join(DEFAULT_CACHE_DIR, "shards")
+
+# Shards start on 64-byte boundaries so Arrow buffers can be used in place
+SHARD_ALIGNMENT = 64
+
+# Matches the apps' LIKELIHOOD_RADIUS_CONFIG
+DEFAULT_RADIUS_CONFIG = {"high": 10000, "medium": 7000, "low": 4000}
+
+BBox = List[float]  # [min_lat, min_lon, max_lat, max_lon]
+
+
+def bbox_intersects(a: BBox, b: BBox) -> bool:
+    """True if two [min_lat, min_lon, max_lat, max_lon] boxes overlap."""
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+class ShardStore:
+    """Per-country Arrow shards packed into one file plus a JSON manifest.
+
+    build() compiles every raw/ country file into an Arrow IPC shard and
+    packs the shards back to back into ``shards-<id>.bin``. The manifest
+    records each country's row count, bounding box, mean position, byte
+    offset and length in the pack, shard checksum and the source file it
+    came from. Readers memory-map the pack and decode only the shards they
+    ask for; queries skip whole shards whose bounding box misses the area
+    of interest. Unchanged sources are copied from the previous pack
+    instead of being parsed again.
+    """
+
+    def __init__(self, base_dir: str, radius_config: Dict[str, int] = DEFAULT_RADIUS_CONFIG,
+                 shard_dir: str = DEFAULT_SHARD_DIR):
+        self.base_dir = base_dir
+        self.raw_dir = os.path.join(base_dir, "raw")
+        self.radius_config = radius_config
+        self.shard_dir = os.path.join(base_dir, shard_dir)
+        self.manifest_path = os.path.join(self.shard_dir, "shards.manifest.json")
+
+        self._lock = threading.Lock()
+        self._manifest: Optional[Dict[str, Any]] = None
+        self._manifest_mtime_ns: Optional[int] = None
+        self._pack: Any = None
+        self._pack_name: Optional[str] = None
+
+    def _settings(self) -> Dict[str, Any]:
+        return {"radius": self.radius_config}
+
+    def _read_manifest(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get("version") != SHARD_FORMAT_VERSION:
+            return None
+        # JSON turns tuples and int keys into lists and strings; compare the same way
+        if manifest.get("settings") != json.loads(json.dumps(self._settings())):
+            return None
+        return manifest
+
+    def _current(self) -> Optional[Dict[str, Any]]:
+        """The manifest on disk, re-read only when the file was replaced."""
+        try:
+            mtime_ns = os.stat(self.manifest_path).st_mtime_ns
+        except OSError:
+            return None
+        with self._lock:
+            if self._manifest_mtime_ns != mtime_ns:
+                self._manifest = self._read_manifest()
+                self._manifest_mtime_ns = mtime_ns
+            return self._manifest
+
+    def manifest(self) -> Dict[str, Dict[str, Any]]:
+        """Shard entries by country; empty when nothing usable has been built."""
+        manifest = self._current()
+        return dict(manifest["countries"]) if manifest else {}
+
+    def errors(self) -> Dict[str, str]:
+        """Source files that failed to compile in the last build, with the reason."""
+        manifest = self._current()
+        return dict(manifest.get("errors", {})) if manifest else {}
+
+    def is_fresh(self, country: str, stat: os.stat_result) -> bool:
+        """True if the country's shard was compiled from a file with this stat."""
+        entry = self.manifest().get(country)
+        return bool(entry) and entry["source"]["mtime_ns"] == stat.st_mtime_ns and \
+            entry["source"]["size"] == stat.st_size
+
+    def _shard_bytes(self, manifest: Dict[str, Any], entry: Dict[str, Any]) -> Any:
+        """Zero-copy view of one shard in the memory-mapped pack."""
+        with self._lock:
+            if self._pack_name != manifest["pack"]:
+                if self._pack is not None:
+                    self._pack.close()
+                self._pack = pa.memory_map(os.path.join(self.shard_dir, manifest["pack"]), 'r')
+                self._pack_name = manifest["pack"]
+            return self._pack.read_at(entry["length"], entry["offset"])
+
+    def load(self, country: str, verify: bool = False) -> pd.DataFrame:
+        """Decode one country's shard; with verify, check its checksum first."""
+        manifest = self._current()
+        if not manifest or country not in manifest["countries"]:
+            raise KeyError(f"No shard for {country}")
+        entry = manifest["countries"][country]
+        buffer = self._shard_bytes(manifest, entry)
+        if verify and hashlib.sha256(memoryview(buffer)).hexdigest() != entry["sha256"]:
+            raise ValueError(f"Shard checksum mismatch for {country}")
+        return decode_buffer(buffer, entry["json_columns"])
+
+    def select(self, countries: Optional[Iterable[str]] = None, bbox: Optional[BBox] = None) -> List[str]:
+        """Countries with a shard, limited to the given ones and to shards overlapping bbox."""
+        entries = self.manifest()
+        wanted = sorted(entries) if countries is None else [c for c in countries if c in entries]
+        if bbox is not None:
+            wanted = [c for c in wanted if bbox_intersects(entries[c]["bbox"], bbox)]
+        return wanted
+
+    def query(self, countries: Optional[Iterable[str]] = None, bbox: Optional[BBox] = None,
+              verify: bool = False) -> pd.DataFrame:
+        """Rows of the selected shards as one frame; shards outside bbox are never read."""
+        frames = [self.load(country, verify) for country in self.select(countries, bbox)]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+    def build(self, workers: int = 1, executor: str = "thread",
+              on_error: Optional[ErrorHandler] = None) -> Dict[str, Dict[str, Any]]:
+        """Compile raw/ into a new pack and manifest; returns the new entries."""
+        if pa is None:
+            raise RuntimeError("pyarrow is required to build shards")
+        previous = self._read_manifest()
+        previous_countries = previous["countries"] if previous else {}
+
+        sources = {}
+        changed = []
+        for path in list_raw_sources(self.raw_dir) if os.path.isdir(self.raw_dir) else []:
+            country = os.path.splitext(os.path.basename(path))[0]
+            stat = os.stat(path)
+            source = {"file": os.path.basename(path), "mtime_ns": stat.st_mtime_ns,
+                      "size": stat.st_size, "sha256": file_digest(path)}
+            sources[country] = source
+            old = previous_countries.get(country)
+            if not old or old["source"]["sha256"] != source["sha256"]:
+                changed.append(path)
+
+        errors = {}
+
+        def record_error(source_name, error):
+            errors[source_name] = f"Error processing {source_name}: {error}"
+            if on_error is not None:
+                on_error(source_name, error)
+
+        compiled: Dict[str, Tuple[bytes, Dict[str, Any]]] = {}
+        for path, batches in iter_sources(changed, self.radius_config, on_error=record_error,
+                                          workers=workers, executor=executor):
+            country = os.path.splitext(os.path.basename(path))[0]
+            frame = assemble_frame(batches)
+            if frame.empty:
+                continue
+            payload, json_columns = encode_frame(frame)
+            compiled[country] = (payload, dict(summarize_batches(batches), json_columns=json_columns))
+
+        changed_countries = {os.path.splitext(os.path.basename(path))[0] for path in changed}
+        countries = {}
+        os.makedirs(self.shard_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.shard_dir, suffix='.tmp')
+        pack_digest = hashlib.sha256()
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                offset = 0
+                for country in sorted(sources):
+                    if country in compiled:
+                        payload, summary = compiled[country]
+                    elif country in previous_countries and country not in changed_countries:
+                        old = previous_countries[country]
+                        payload = memoryview(self._shard_bytes(previous, old)).tobytes()
+                        summary = {key: old[key] for key in ("rows", "bbox", "center", "json_columns")}
+                    else:
+                        continue
+
+                    padding = -offset % SHARD_ALIGNMENT
+                    f.write(b'\0' * padding)
+                    offset += padding
+                    f.write(payload)
+                    sha256 = hashlib.sha256(payload).hexdigest()
+                    pack_digest.update(sha256.encode('ascii'))
+                    countries[country] = dict(summary, offset=offset, length=len(payload),
+                                              sha256=sha256, source=sources[country])
+                    offset += len(payload)
+
+            pack_name = f"shards-{pack_digest.hexdigest()[:16]}.bin"
+            os.replace(tmp_path, os.path.join(self.shard_dir, pack_name))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        manifest = {"version": SHARD_FORMAT_VERSION, "settings": self._settings(), "pack": pack_name,
+                    "countries": countries, "errors": errors}
+        write_atomic(self.shard_dir, self.manifest_path,
+                     json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+
+        # Readers that still map an older pack keep working; new readers
+        # follow the manifest to the new one
+        for name in os.listdir(self.shard_dir):
+            if re.fullmatch(r"shards-[0-9a-f]{16}\.bin", name) and name != pack_name:
+                try:
+                    os.remove(os.path.join(self.shard_dir, name))
+                except OSError:
+                    pass
+        return countries
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-dir", default=os.path.dirname(os.path.abspath(__file__)),
+                        help="App directory containing raw/ (default: this directory)")
+    parser.add_argument("--shard-dir", default=DEFAULT_SHARD_DIR, help="Output directory, relative to --base-dir")
+    parser.add_argument("--workers", type=int, default=1, help="Country files parsed concurrently")
+    args = parser.parse_args(argv)
+
+    store = ShardStore(args.base_dir, shard_dir=args.shard_dir)
+    countries = store.build(workers=args.workers)
+    for error in store.errors().values():
+        print(error, file=sys.stderr)
+    print(f"Compiled {len(countries)} country shards ({sum(e['rows'] for e in countries.values())} rows) "
+          f"into {store.shard_dir}")
+    return 1 if store.errors() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+# RGBA fill of a map point by its Treasure Value; values not listed get DEFAULT_COLOR
+VALUE_COLORS: Dict[str, List[int]] = {
+    "Priceless": [255, 215, 0, 200],    # Gold
+    "Exceptional": [255, 165, 0, 200],  # Orange
+    "High": [255, 69, 0, 200],          # Red-Orange
+}
+DEFAULT_COLOR = [128, 128, 128, 200]    # Gray for Medium/Low/Unknown
+SELECTED_COLOR = [30, 144, 255, 230]    # Blue for the selected treasure
+
+VALUE_COLUMN = "Treasure Value"
+
+
+def tier_colors(values: Sequence, colors: Dict[str, List[int]] = VALUE_COLORS,
+                default: List[int] = DEFAULT_COLOR) -> np.ndarray:
+    """(n, 4) uint8 RGBA array with the color of each value's tier.
+
+    Each distinct value is looked up once and its color broadcast to its
+    rows, so the cost does not grow with a Python call per row.
+    """
+    codes, uniques = pd.factorize(pd.Series(values, copy=False))
+    # A final default row for the -1 code of missing values
+    palette = np.array([colors.get(value, default) for value in uniques] + [default], dtype=np.uint8)
+    return palette[codes]
+
+
+# Decimal places kept in transported positions; 5 is about a meter
+POSITION_DECIMALS = 5
+
+
+class MapStyle:
+    """Color attributes of one dataset frame for the treasure map.
+
+    The base color of every row, the frame handed to the map layer and the
+    rows of each id are built once, when the frame is loaded. A selection
+    never touches them:
+    selected(id) returns only the selected rows, recolored, to draw as an
+    overlay on top, so its cost depends on how many rows share the id and
+    not on the size of the dataset. Instances are never mutated and can be
+    shared between sessions.
+
+    With transport_columns, the layer data is trimmed to what the browser
+    needs: "position" ([longitude, latitude], rounded to POSITION_DECIMALS),
+    "color", "radius", "id" (the row's position in the frame, for details()
+    to resolve on the server) and the listed columns, such as the fields a
+    tooltip shows. Without it, the layer data is the whole frame plus
+    "color". position_accessor is the get_position a layer of either data
+    needs.
+    """
+
+    def __init__(self, frame: pd.DataFrame, id_column: str, colors: Dict[str, List[int]] = VALUE_COLORS,
+                 default: List[int] = DEFAULT_COLOR, selected_color: List[int] = SELECTED_COLOR,
+                 transport_columns: Optional[Sequence[str]] = None):
+        self.frame = frame
+        self.id_column = id_column
+        self.selected_color = list(selected_color)
+        if VALUE_COLUMN in frame.columns:
+            self.colors = tier_colors(frame[VALUE_COLUMN], colors, default)
+        else:
+            self.colors = np.tile(np.array(default, dtype=np.uint8), (len(frame), 1))
+        # pydeck serializes data row by row, so list attributes hold one list per row
+        color = pd.Series(self.colors.tolist(), index=frame.index, dtype=object)
+        if transport_columns is None:
+            self.data = frame.assign(color=color)
+            self.position_accessor = ["longitude", "latitude"]
+        else:
+            positions = np.column_stack([frame["longitude"].to_numpy(dtype=np.float64),
+                                         frame["latitude"].to_numpy(dtype=np.float64)])
+            columns = {
+                "position": pd.Series(np.round(positions, POSITION_DECIMALS).tolist(), index=frame.index,
+                                      dtype=object),
+                "color": color,
+                "radius": pd.Series(frame["radius"].to_numpy().tolist(), index=frame.index, dtype=object),
+                "id": pd.Series(np.arange(len(frame)), index=frame.index),
+            }
+            columns.update((name, frame[name]) for name in transport_columns)
+            self.data = pd.DataFrame(columns, index=frame.index)
+            self.position_accessor = "position"
+        ids = pd.Series(frame[id_column].to_numpy(dtype=object))
+        self._rows: Dict[Any, np.ndarray] = {key: np.asarray(rows)
+                                             for key, rows in ids.groupby(ids, sort=False).indices.items()}
+
+    def rows_of(self, treasure_id: Any) -> np.ndarray:
+        """Positions of the rows whose id column equals treasure_id."""
+        return self._rows.get(treasure_id, np.empty(0, dtype=np.intp))
+
+    def selected(self, treasure_id: Any) -> pd.DataFrame:
+        """The rows of treasure_id in the selection color, empty if nothing is selected."""
+        rows = self.rows_of(treasure_id) if treasure_id is not None else np.empty(0, dtype=np.intp)
+        overlay = self.data.iloc[rows]
+        return overlay.assign(color=pd.Series([self.selected_color] * len(rows), index=overlay.index, dtype=object))
+
+    def details(self, row_id: int) -> pd.Series:
+        """The full frame row behind a transported "id"."""
+        return self.frame.iloc[row_id]
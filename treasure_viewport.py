@@ -0,0 +1,114 @@
+import math
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from treasure_clusters import MAX_MERCATOR_LATITUDE, WORLD_PIXELS
+
+
+class Bounds(NamedTuple):
+    """A longitude/latitude box; west > east means it wraps across the antimeridian."""
+    west: float
+    south: float
+    east: float
+    north: float
+
+
+def _mercator_y(latitude: float) -> float:
+    lat = math.radians(max(-MAX_MERCATOR_LATITUDE, min(MAX_MERCATOR_LATITUDE, latitude)))
+    return (1 - math.log(math.tan(lat) + 1 / math.cos(lat)) / math.pi) / 2
+
+
+def _latitude(y: float) -> float:
+    return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y))))
+
+
+def viewport_bounds(latitude: float, longitude: float, zoom: float, width: int, height: int,
+                    margin: float = 0.5, snap: int = 4) -> Optional[Bounds]:
+    """The box a width x height map centered on latitude/longitude shows at zoom.
+
+    margin widens the box by that fraction of the view on every side, so
+    small pans stay covered. The edges are then rounded outward to 1/snap
+    of the view, so nearby centers give the same box and can share cached
+    layers. Longitudes wrap across the antimeridian; latitudes stop at the
+    poles. None means the box covers every longitude and latitude and
+    nothing needs culling.
+    """
+    world = WORLD_PIXELS * 2 ** zoom
+    half_width = width * (0.5 + margin) / world
+    half_height = height * (0.5 + margin) / world
+    if half_width >= 0.5 and half_height >= 0.5:
+        return None
+
+    step_x, step_y = width / world / snap, height / world / snap
+    x = (longitude + 180) / 360
+    y = _mercator_y(latitude)
+    x0, x1 = math.floor((x - half_width) / step_x) * step_x, math.ceil((x + half_width) / step_x) * step_x
+    y0, y1 = math.floor((y - half_height) / step_y) * step_y, math.ceil((y + half_height) / step_y) * step_y
+
+    if x1 - x0 >= 1:
+        west, east = -180.0, 180.0
+    else:
+        west = (x0 % 1) * 360 - 180
+        east = (x1 % 1) * 360 - 180
+        if east == -180.0:
+            east = 180.0
+    north = 90.0 if y0 <= 0 else _latitude(y0)
+    south = -90.0 if y1 >= 1 else _latitude(y1)
+    return Bounds(round(west, 6), round(south, 6), round(east, 6), round(north, 6))
+
+
+def in_bounds(longitudes: np.ndarray, latitudes: np.ndarray, bounds: Optional[Bounds]) -> np.ndarray:
+    """Boolean mask of the points inside bounds (every point for None)."""
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    if bounds is None:
+        return ~(np.isnan(longitudes) | np.isnan(latitudes))
+    inside_lat = (latitudes >= bounds.south) & (latitudes <= bounds.north)
+    if bounds.west <= bounds.east:
+        inside_lon = (longitudes >= bounds.west) & (longitudes <= bounds.east)
+    else:
+        inside_lon = (longitudes >= bounds.west) | (longitudes <= bounds.east)
+    return inside_lat & inside_lon
+
+
+class PointGrid:
+    """Grid index of point positions for bounding-box queries.
+
+    Points are bucketed into a 2**bits x 2**bits longitude/latitude grid and
+    sorted by column, then row, so the rows of one grid column in a latitude
+    range are a contiguous slice found by binary search. A query costs one
+    search per grid column the box spans, plus an exact check of the
+    candidates, and never scans points outside those columns.
+    """
+
+    def __init__(self, longitudes: np.ndarray, latitudes: np.ndarray, bits: int = 10):
+        self.side = 2 ** bits
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        rows = np.flatnonzero(~(np.isnan(self.longitudes) | np.isnan(self.latitudes)))
+        keys = self._column(self.longitudes[rows]) * self.side + self._row(self.latitudes[rows])
+        order = np.argsort(keys, kind="stable")
+        self.rows = rows[order]
+        self.keys = keys[order]
+
+    def _column(self, longitudes):
+        return np.clip(np.floor((np.asarray(longitudes) + 180) / 360 * self.side), 0, self.side - 1).astype(np.int64)
+
+    def _row(self, latitudes):
+        return np.clip(np.floor((np.asarray(latitudes) + 90) / 180 * self.side), 0, self.side - 1).astype(np.int64)
+
+    def query(self, bounds: Optional[Bounds]) -> np.ndarray:
+        """Sorted positions of the points inside bounds (every point for None)."""
+        if bounds is None:
+            return np.sort(self.rows)
+        first, last = self._column([bounds.west, bounds.east])
+        columns = np.arange(first, last + 1) if bounds.west <= bounds.east else \
+            np.concatenate([np.arange(first, self.side), np.arange(0, last + 1)])
+        bottom, top = self._row([bounds.south, bounds.north])
+        starts = np.searchsorted(self.keys, columns * self.side + bottom, side="left")
+        stops = np.searchsorted(self.keys, columns * self.side + top, side="right")
+        candidates = self.rows[np.concatenate([np.arange(start, stop) for start, stop in zip(starts, stops)])] \
+            if len(columns) else self.rows[:0]
+        inside = in_bounds(self.longitudes[candidates], self.latitudes[candidates], bounds)
+        return np.sort(candidates[inside])